@@ -13,3 +13,4 @@
 
 # register the Pyomo components
 import watertap.core.plugins.solvers
+import watertap.core.plugins.block_triangular
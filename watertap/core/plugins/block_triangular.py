@@ -0,0 +1,307 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sps
+from scipy.sparse.csgraph import maximum_bipartite_matching, connected_components
+
+import pyomo.environ as pyo
+from pyomo.common.collections import Bunch, ComponentMap
+from pyomo.core.base.block import _BlockData
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.core.expr.calculus.derivatives import differentiate
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
+from pyomo.util.subsystems import create_subsystem_block, TemporarySubsystemManager
+
+from idaes.core.util.scaling import get_scaling_factor
+from idaes.logger import getLogger
+
+from watertap.core.plugins.solvers import _StructureKey
+
+_log = getLogger("watertap.core")
+
+# Number of decompositions kept by each solver object
+_MAX_CACHED_DECOMPOSITIONS = 32
+
+# Newton step sizes below this are considered failed line searches
+_MIN_STEP = 1e-4
+
+
+@pyo.SolverFactory.register("block-triangular-watertap",
+        doc="Solves square systems block by block in their block-triangular order, "
+            "with Newton's method or Ipopt for each block")
+class BlockTriangularWaterTAP:
+    """
+    Solves a square system of equations (e.g., to initialize a unit model) as a
+    sequence of small systems. The active equality constraints and the unfixed
+    variables in them are permuted to block-triangular form, i.e., a perfect
+    matching of constraints and variables is found and its strongly connected
+    components are put in topological order, so that every diagonal block only
+    depends on the variables of the blocks before it.
+
+    Each block is solved by Newton's method with a backtracking line search on
+    the scaled residuals, and by the ``subsolver`` if Newton's method fails. The
+    decomposition is kept by the solver object and reused for as long as the
+    active constraints and fixed variables of the model do not change. Models
+    that are not square, or structurally singular, are passed to the subsolver
+    whole.
+
+    Options:
+        tol : Largest scaled residual of a solved block (Default: 1e-8)
+        max_iter : Newton iterations per block (Default: 50)
+        subsolver : Name of the solver for the blocks Newton's method cannot
+                    solve (Default: 'ipopt-watertap')
+
+    All other options are passed on to the subsolver.
+    """
+
+    def __init__(self, **kwds):
+        self.options = Bunch()
+        if "options" in kwds and kwds["options"] is not None:
+            self.options.update(kwds["options"])
+        self._decompositions = OrderedDict()
+
+    def available(self, exception_flag=True):
+        return True
+
+    def license_is_valid(self):
+        return True
+
+    def version(self):
+        return (0, 0, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, traceback):
+        pass
+
+    def solve(self, model, tee=False, **kwds):
+        if not isinstance(model, _BlockData):
+            raise TypeError("BlockTriangularWaterTAP.solve takes 1 positional argument: a Pyomo ConcreteModel or Block")
+
+        start_time = time.time()
+        options = Bunch(**self.options)
+        options.update(kwds.pop("options", None) or {})
+        tol = options.pop("tol", 1e-08)
+        max_iter = options.pop("max_iter", 50)
+        subsolver_name = options.pop("subsolver", "ipopt-watertap")
+        subsolver = None
+        # Keywords like symbolic_solver_labels only matter to the subsolver
+        kwds["tee"] = tee
+
+        blocks = self._get_decomposition(model)
+
+        results = SolverResults()
+        results.solver.name = "block-triangular-watertap"
+        results.solver.status = SolverStatus.ok
+        results.solver.termination_condition = TerminationCondition.optimal
+
+        if blocks is None:
+            if tee:
+                print("block-triangular-watertap: the system is not square, solving it as a whole")
+            subsolver = _get_subsolver(subsolver_name, options)
+            sub_results = subsolver.solve(model, **kwds)
+            results.solver.status = sub_results.solver.status
+            results.solver.termination_condition = sub_results.solver.termination_condition
+            results.solver.num_blocks = 1
+            results.solver.subsolver_blocks = 1
+            results.solver.time = time.time() - start_time
+            return results
+
+        newton_blocks = 0
+        subsolver_blocks = 0
+        for k, (constraints, variables) in enumerate(blocks):
+            if _newton(constraints, variables, tol, max_iter):
+                newton_blocks += 1
+                continue
+
+            subsolver_blocks += 1
+            if tee:
+                print(f"block-triangular-watertap: Newton's method failed on block {k} "
+                      f"of size {len(variables)}, calling the subsolver")
+            if subsolver is None:
+                subsolver = _get_subsolver(subsolver_name, options)
+            sub_results = _solve_subsystem(subsolver, constraints, variables, kwds)
+            if not pyo.check_optimal_termination(sub_results):
+                _log.warning(f"block-triangular-watertap: failed to solve block {k} with "
+                             f"constraints {[c.name for c in constraints]}")
+                results.solver.status = SolverStatus.warning
+                results.solver.termination_condition = sub_results.solver.termination_condition
+                results.solver.message = f"Failed to solve block {k}"
+                break
+
+        results.solver.num_blocks = len(blocks)
+        results.solver.largest_block = max((len(v) for _, v in blocks), default=0)
+        results.solver.newton_blocks = newton_blocks
+        results.solver.subsolver_blocks = subsolver_blocks
+        results.solver.time = time.time() - start_time
+
+        if tee:
+            print(f"block-triangular-watertap: solved {newton_blocks} of {len(blocks)} blocks "
+                  f"(largest {results.solver.largest_block}) with Newton's method "
+                  f"and {subsolver_blocks} with the subsolver")
+        return results
+
+    def _get_decomposition(self, model):
+        key = _StructureKey.from_model(model)
+        if key in self._decompositions:
+            self._decompositions.move_to_end(key)
+            return self._decompositions[key]
+
+        blocks = block_triangularize(model)
+        self._decompositions[key] = blocks
+        if len(self._decompositions) > _MAX_CACHED_DECOMPOSITIONS:
+            self._decompositions.popitem(last=False)
+        return blocks
+
+
+def block_triangularize(model):
+    """
+    Permute the active equality constraints of a square model and the unfixed
+    variables in them to block-triangular form.
+
+    Args:
+        model : Pyomo model or block
+
+    Returns:
+        List of (constraints, variables) of the diagonal blocks, in the order they
+        are solved in, or None if the model is not square or structurally singular
+    """
+    constraints = []
+    for c in model.component_data_objects(pyo.Constraint, active=True, descend_into=True):
+        if not c.equality:
+            return None
+        constraints.append(c)
+
+    index = ComponentMap()
+    variables = []
+    rows, cols = [], []
+    for i, c in enumerate(constraints):
+        for v in identify_variables(c.body, include_fixed=False):
+            if v not in index:
+                index[v] = len(variables)
+                variables.append(v)
+            rows.append(i)
+            cols.append(index[v])
+
+    n = len(constraints)
+    if n == 0 or len(variables) != n:
+        return None
+
+    incidence = sps.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    # match[i] is the variable determined by constraint i
+    match = maximum_bipartite_matching(incidence, perm_type="column")
+    if np.any(match < 0):
+        return None
+    matched_constraint = np.empty(n, dtype=int)
+    matched_constraint[match] = np.arange(n)
+
+    # Constraint i depends on the constraint that determines each of its variables
+    dependency = sps.csr_matrix((np.ones(len(rows)), (rows, matched_constraint[cols])), shape=(n, n))
+    num_blocks, labels = connected_components(dependency, directed=True, connection="strong")
+
+    # Topological order of the blocks: a block comes after all blocks it depends on
+    block_rows = np.array(rows)
+    block_deps = labels[matched_constraint[cols]]
+    block_of_row = labels[block_rows]
+    edges = set(zip(block_of_row[block_of_row != block_deps], block_deps[block_of_row != block_deps]))
+    num_deps = np.zeros(num_blocks, dtype=int)
+    dependents = [[] for _ in range(num_blocks)]
+    for b, d in edges:
+        num_deps[b] += 1
+        dependents[d].append(b)
+
+    members = [[] for _ in range(num_blocks)]
+    for i in range(n):
+        members[labels[i]].append(i)
+
+    order = [b for b in range(num_blocks) if num_deps[b] == 0]
+    for b in order:
+        for d in dependents[b]:
+            num_deps[d] -= 1
+            if num_deps[d] == 0:
+                order.append(d)
+
+    return [([constraints[i] for i in members[b]], [variables[match[i]] for i in members[b]])
+            for b in order]
+
+
+def _residuals(constraints, scale):
+    return scale*np.array([pyo.value(c.body) - pyo.value(c.upper) for c in constraints])
+
+
+def _newton(constraints, variables, tol, max_iter):
+    # Solve one block by Newton's method, leaving the variables
+    # unchanged if it fails
+    start = [v.value for v in variables]
+    x = np.array([0. if val is None else val for val in start], dtype=float)
+    lb = np.array([-np.inf if v.lb is None else v.lb for v in variables], dtype=float)
+    ub = np.array([np.inf if v.ub is None else v.ub for v in variables], dtype=float)
+    x = np.clip(x, lb, ub)
+    scale = np.array([get_scaling_factor(c, default=1) for c in constraints], dtype=float)
+
+    def set_values(x):
+        for v, val in zip(variables, x):
+            v.set_value(float(val), skip_validation=True)
+
+    try:
+        set_values(x)
+        r = _residuals(constraints, scale)
+        for iteration in range(max_iter + 1):
+            norm = np.max(np.abs(r))
+            if norm <= tol:
+                return True
+            if iteration == max_iter or not np.isfinite(norm):
+                break
+
+            jac = np.array([differentiate(c.body, wrt_list=variables, mode=differentiate.Modes.reverse_numeric)
+                            for c in constraints], dtype=float)
+            step = np.linalg.solve(scale[:, None]*jac, -r)
+
+            alpha = 1.
+            while alpha >= _MIN_STEP:
+                x_trial = np.clip(x + alpha*step, lb, ub)
+                set_values(x_trial)
+                try:
+                    r_trial = _residuals(constraints, scale)
+                except (ValueError, OverflowError, ZeroDivisionError):
+                    r_trial = None
+                if r_trial is not None and np.max(np.abs(r_trial)) < (1 - 1e-4*alpha)*norm:
+                    break
+                alpha /= 2
+            else:
+                break
+            x, r = x_trial, r_trial
+    except (ValueError, OverflowError, ZeroDivisionError, np.linalg.LinAlgError):
+        pass
+
+    for v, val in zip(variables, start):
+        v.set_value(val, skip_validation=True)
+    return False
+
+
+def _get_subsolver(name, options):
+    subsolver = pyo.SolverFactory(name)
+    subsolver.options.update(options)
+    return subsolver
+
+
+def _solve_subsystem(subsolver, constraints, variables, kwds):
+    block = create_subsystem_block(constraints, variables)
+    # The variables of the blocks before are inputs to this one
+    with TemporarySubsystemManager(to_fix=list(block.input_vars.values())):
+        return subsolver.solve(block, **kwds)
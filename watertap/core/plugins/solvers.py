@@ -11,9 +11,21 @@
 #
 ###############################################################################
 
+import re
+import time
+import weakref
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
 import pyomo.environ as pyo
 from pyomo.core.base.block import _BlockData
 from pyomo.core.kernel.block import IBlock
+from pyomo.common.collections import Bunch
+from pyomo.common.tempfiles import TempfileManager
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
 from pyomo.solvers.plugins.solvers.IPOPT import IPOPT
 
 import idaes.core.util.scaling as iscale
@@ -21,8 +33,27 @@ from idaes.core.util.scaling import (
         get_scaling_factor, set_scaling_factor, unset_scaling_factor)
 from idaes.logger import getLogger
 
+from watertap.core.util.aggregation import VariableAggregator
+from watertap.core.util.profiling import solver_profiler, parse_ipopt_timing_statistics
+
 _log = getLogger("watertap.core")
 
+# Line of the Ipopt log reporting the number of iterations taken
+_ITERATIONS_REGEX = re.compile(r"^Number of Iterations\.*:\s*(\d+)", re.MULTILINE)
+
+# Ipopt options set by the warm_start option, unless given by the user
+_WARM_START_OPTIONS = {
+        "warm_start_init_point": "yes",
+        "warm_start_bound_push": 1e-06,
+        "warm_start_mult_bound_push": 1e-06,
+        "mu_init": 1e-06,
+        }
+
+# The adaptive iteration cap is applied once this many converged
+# solves are known, and never set below _MIN_ADAPTIVE_MAX_ITER
+_MIN_ITERATION_HISTORY = 5
+_MIN_ADAPTIVE_MAX_ITER = 50
+
 
 @pyo.SolverFactory.register("ipopt-watertap",
         doc="The Ipopt NLP solver, with user-based variable and automatic Jacobian constraint scaling")
@@ -31,8 +62,51 @@ class IpoptWaterTAP(IPOPT):
     def __init__(self, **kwds):
         kwds["name"] = "ipopt-watertap"
         self._cleanup_needed = False
+        self._structure = None
+        self._warm_start_model = None
+        self._aggregator = None
+        self._profile = None
+        self._iteration_history = deque(maxlen=20)
+        self._adaptive_max_iter = None
+        self._wall_time_limit = None
+        self._timed_out = False
+        self._injected_options = dict()
         super().__init__(**kwds)
 
+    def solve(self, *args, **kwds):
+        start_time = time.time()
+        self._warm_start_model = None
+        self._aggregator = None
+        self._profile = None
+        self._adaptive_max_iter = None
+        self._wall_time_limit = None
+        self._timed_out = False
+        self._injected_options = dict()
+        try:
+            results = super().solve(*args, **kwds)
+        finally:
+            self._remove_injected_options()
+            if self._aggregator is not None:
+                self._aggregator.restore()
+
+        # The solution (and with it the multipliers) is only
+        # loaded into the model after _postsolve
+        load_solutions = kwds.get("load_solutions", True) and not self._timed_out
+        if self._aggregator is not None:
+            if load_solutions:
+                self._load_aggregated_solution(args[0])
+            self._aggregator = None
+        if self._warm_start_model is not None:
+            if load_solutions:
+                self._update_warm_start(results)
+            self._warm_start_model = None
+        if self._adaptive_max_iter is not None:
+            if pyo.check_optimal_termination(results) and results.solver.iterations is not None:
+                self._iteration_history.append(results.solver.iterations)
+        if self._profile is not None:
+            self._record_profile(results, start_time)
+        return results
+
     def _presolve(self, *args, **kwds):
         if len(args) > 1 or len(args) == 0:
             raise TypeError(f"IpoptWaterTAP.solve takes 1 positional argument but {len(args)} were given")
@@ -47,9 +121,42 @@ class IpoptWaterTAP(IPOPT):
         if "constr_viol_tol" not in self.options:
             self.options["constr_viol_tol"] = 1e-08
 
+        # With profile (or inside solver_profiler.profile), the time of every
+        # step of the solve is recorded, including Ipopt's timing statistics
+        if self._get_option("profile", solver_profiler.enabled):
+            self._profile = dict()
+            self._inject_option("print_timing_statistics", "yes")
+
+        # With warm_start, the multipliers of the previous converged solve
+        # of the model are passed to Ipopt as its starting point
+        if self._get_option("warm_start", False):
+            self._set_warm_start(args[0], kwds)
+
+        # With wall_time_limit, the Ipopt process is killed after this many
+        # seconds, as a backstop to Ipopt's own max_wall_time (which is passed
+        # through), e.g. for a solve stuck inside a single iteration
+        self._wall_time_limit = self._get_option("wall_time_limit", None)
+
+        # With adaptive_max_iter, max_iter is capped at this multiple of the median
+        # number of iterations of the last converged solves of this solver object
+        self._adaptive_max_iter = self._get_option("adaptive_max_iter", None)
+        iteration_history = self._get_option("iteration_history", 20)
+        if self._adaptive_max_iter is not None:
+            self._set_adaptive_max_iter(iteration_history)
+
+        # With aggregate_variables, variables linked by trivial equalities
+        # (x == y or x == constant) are eliminated for the solve
+        if self._get_option("aggregate_variables", False):
+            self._aggregator = VariableAggregator(args[0])
+            with self._profiled("aggregation"):
+                num_eliminated = self._aggregator.apply()
+            if self._tee:
+                print(f"ipopt-watertap: eliminated {num_eliminated} variables and "
+                        f"{self._aggregator.num_links} linking constraints")
+
         if not self._is_user_scaling():
             self._cleanup_needed = False
-            return super()._presolve(*args, **kwds)
+            return self._timed_presolve(*args, **kwds)
 
         if self._tee:
             print("ipopt-watertap: Ipopt with user variable scaling and IDAES jacobian constraint scaling")
@@ -79,22 +186,40 @@ class IpoptWaterTAP(IPOPT):
         ignore_variable_scaling = self._get_option("ignore_variable_scaling", False)
         ignore_constraint_scaling = self._get_option("ignore_constraint_scaling", False)
 
+        # With cache_constraint_scaling, the Jacobian constraint scaling found by
+        # one solve is reused by the next solves of the same model, as long as it
+        # keeps the same active constraints (with the same user scaling factors)
+        # and fixed variables, e.g., throughout a parameter sweep. The NL file is
+        # still written, and the bounds relaxed, in every solve.
+        cache_constraint_scaling = self._get_option("cache_constraint_scaling", False)
+
         self._model = args[0]
-        self._cache_scaling_factors()
-        self._cache_and_set_relaxed_bounds(bound_relax_factor)
+
+        with self._profiled("scaling_cache"):
+            self._cache_scaling_factors()
+        with self._profiled("bound_relaxation"):
+            fixed_vars = self._cache_and_set_relaxed_bounds(bound_relax_factor)
         self._cleanup_needed = True
 
+        if cache_constraint_scaling:
+            settings = (bound_relax_factor, max_grad, min_scale, ignore_variable_scaling, ignore_constraint_scaling)
+            if self._is_cached_structure(fixed_vars, settings):
+                return self._reuse_structure(*args, **kwds)
+            self._structure = None
+
         # NOTE: This function sets the scaling factors on the
         #       constraints. Hence we cache the constraint scaling
         #       factors and reset them to their original values
         #       so that repeated calls to solve change the scaling
-        #       each time based on the initial values, just like in Ipopt.
+        #       each time based on the initial values, just like in Ipopt
+        #       (unless cache_constraint_scaling is set).
         try:
-            iscale.constraint_autoscale_large_jac(self._model,
-                    ignore_constraint_scaling=ignore_constraint_scaling,
-                    ignore_variable_scaling=ignore_variable_scaling,
-                    max_grad=max_grad,
-                    min_scale=min_scale)
+            with self._profiled("constraint_autoscale"):
+                iscale.constraint_autoscale_large_jac(self._model,
+                        ignore_constraint_scaling=ignore_constraint_scaling,
+                        ignore_variable_scaling=ignore_variable_scaling,
+                        max_grad=max_grad,
+                        min_scale=min_scale)
         except Exception as err:
             if str(err) == "Error in AMPL evaluation":
                 print("ipopt-watertap: Issue in AMPL function evaluation; Jacobian constraint scaling not applied.")
@@ -109,10 +234,123 @@ class IpoptWaterTAP(IPOPT):
                 print("Error in constraint_autoscale_large_jac")
                 self._cleanup()
                 raise
+        else:
+            if cache_constraint_scaling:
+                self._save_structure(fixed_vars, settings)
 
         try:
             # this creates the NL file, among other things
-            return super()._presolve(*args, **kwds)
+            return self._timed_presolve(*args, **kwds)
+        except:
+            self._cleanup()
+            raise
+
+    def _set_warm_start(self, model, kwds):
+        # Ipopt reads the constraint multipliers from the dual suffix and the
+        # bound multipliers from the ipopt_zL_in/ipopt_zU_in suffixes, and
+        # writes them to the dual and ipopt_zL_out/ipopt_zU_out suffixes
+        for name, direction in (("dual", pyo.Suffix.IMPORT_EXPORT),
+                                ("ipopt_zL_out", pyo.Suffix.IMPORT),
+                                ("ipopt_zU_out", pyo.Suffix.IMPORT),
+                                ("ipopt_zL_in", pyo.Suffix.EXPORT),
+                                ("ipopt_zU_in", pyo.Suffix.EXPORT)):
+            suffix = model.component(name)
+            if suffix is None:
+                model.add_component(name, pyo.Suffix(direction=direction))
+            elif not isinstance(suffix, pyo.Suffix):
+                raise RuntimeError(f"ipopt-watertap: option warm_start requires the component "
+                        f"{suffix.name} of {model.name} to be a Suffix")
+            elif suffix.get_direction() != direction:
+                suffix.set_direction(pyo.Suffix.IMPORT_EXPORT)
+
+        # The solver only collects the import suffixes
+        # of the model before calling _presolve
+        suffixes = kwds.setdefault("suffixes", [])
+        for name in ("dual", "ipopt_zL_out", "ipopt_zU_out"):
+            if name not in suffixes:
+                suffixes.append(name)
+
+        self._warm_start_model = model
+
+        # Ipopt reads and writes the multipliers of the unscaled problem
+        # with the bounds it was given. These are the same in every solve,
+        # as the bounds are relaxed and the constraints scaled afresh (or
+        # by the same factors), so the multipliers need no conversion.
+        if len(model.ipopt_zL_in) == 0 and len(model.ipopt_zU_in) == 0 and len(model.dual) == 0:
+            # no converged solve to start from
+            return
+        if self._tee:
+            print("ipopt-watertap: warm starting from the multipliers of the previous solve")
+        for option, value in _WARM_START_OPTIONS.items():
+            self._inject_option(option, value)
+
+    def _inject_option(self, option_name, value):
+        # Set an Ipopt option for this solve only, unless given by the user;
+        # solve removes it again afterwards
+        if option_name in self.options:
+            return
+        self.options[option_name] = value
+        self._injected_options[option_name] = value
+        if self._tee:
+            print(f"ipopt-watertap: setting {option_name}={value} for this solve")
+
+    def _remove_injected_options(self):
+        for option_name, value in self._injected_options.items():
+            if option_name in self.options and self.options[option_name] == value:
+                del self.options[option_name]
+        self._injected_options = dict()
+
+    def _update_warm_start(self, results):
+        model = self._warm_start_model
+        if pyo.check_optimal_termination(results):
+            model.ipopt_zL_in.clear_all_values()
+            model.ipopt_zL_in.update(model.ipopt_zL_out.items())
+            model.ipopt_zU_in.clear_all_values()
+            model.ipopt_zU_in.update(model.ipopt_zU_out.items())
+        else:
+            # start the next solve cold rather than from a failed solve
+            for name in ("dual", "ipopt_zL_out", "ipopt_zU_out", "ipopt_zL_in", "ipopt_zU_in"):
+                model.component(name).clear_all_values()
+
+    def _load_aggregated_solution(self, model):
+        def import_suffix(name):
+            suffix = model.component(name)
+            if isinstance(suffix, pyo.Suffix) and suffix.import_enabled():
+                return suffix
+            return None
+        self._aggregator.load_solution(dual=import_suffix("dual"),
+                zL=import_suffix("ipopt_zL_out"), zU=import_suffix("ipopt_zU_out"))
+
+    def _structure_key(self, fixed_vars, settings):
+        # The user scaling factors of the constraints are inputs of the
+        # Jacobian constraint scaling as well
+        return (_StructureKey(self._model, [c for c, _ in self._scaling_cache], fixed_vars),
+                tuple(sf for _, sf in self._scaling_cache), settings)
+
+    def _save_structure(self, fixed_vars, settings):
+        self._structure = {
+                "key": self._structure_key(fixed_vars, settings),
+                "constraint_scaling": [get_scaling_factor(c) for c, _ in self._scaling_cache],
+                }
+
+    def _is_cached_structure(self, fixed_vars, settings):
+        return self._structure is not None and \
+                self._structure["key"] == self._structure_key(fixed_vars, settings)
+
+    def _reuse_structure(self, *args, **kwds):
+        if self._tee:
+            print("ipopt-watertap: reusing the constraint scaling of the previous solve (cache_constraint_scaling)")
+
+        # Apply the constraint scaling computed by an earlier solve, rather
+        # than evaluating the Jacobian again
+        for (c, _), sf in zip(self._scaling_cache, self._structure["constraint_scaling"]):
+            if sf is None:
+                unset_scaling_factor(c)
+            else:
+                set_scaling_factor(c, sf)
+
+        try:
+            return self._timed_presolve(*args, **kwds)
         except:
             self._cleanup()
             raise
@@ -124,9 +362,95 @@ class IpoptWaterTAP(IPOPT):
             # remove our reference to the model
             del self._model
 
+    def _apply_solver(self):
+        if self._wall_time_limit is not None:
+            if self._timelimit is None or self._wall_time_limit < self._timelimit:
+                self._timelimit = self._wall_time_limit
+        with self._profiled("ipopt_run"):
+            try:
+                return super()._apply_solver()
+            except subprocess.TimeoutExpired:
+                # The Ipopt subprocess has been killed; _postsolve
+                # still cleans up the model
+                self._timed_out = True
+                self._rc, self._log = None, ""
+                return Bunch(rc=None, log="")
+
     def _postsolve(self):
-        self._cleanup()
-        return super()._postsolve()
+        with self._profiled("cleanup"):
+            self._cleanup()
+        if self._timed_out:
+            results = self._timed_out_results()
+        else:
+            with self._profiled("sol_read"):
+                results = super()._postsolve()
+        self._record_statistics(results)
+        self._postsolve_time = time.time()
+        return results
+
+    def _timed_presolve(self, *args, **kwds):
+        start_time = time.time()
+        try:
+            return super()._presolve(*args, **kwds)
+        finally:
+            self._nl_write_time = time.time() - start_time
+            if self._profile is not None:
+                self._profile["nl_write"] = self._nl_write_time
+
+    def _timed_out_results(self):
+        # There is no solution file to read, and nothing to load
+        TempfileManager.pop(remove=not self._keepfiles)
+        self._load_solutions = False
+
+        results = SolverResults()
+        results.solver.name = self.name
+        results.solver.status = SolverStatus.aborted
+        results.solver.termination_condition = TerminationCondition.maxTimeLimit
+        results.solver.message = f"Ipopt was killed after the time limit of {self._timelimit} s"
+        if self._tee:
+            print(f"ipopt-watertap: {results.solver.message}")
+        return results
+
+    def _set_adaptive_max_iter(self, iteration_history):
+        if self._iteration_history.maxlen != iteration_history:
+            self._iteration_history = deque(self._iteration_history, maxlen=iteration_history)
+        if len(self._iteration_history) < min(_MIN_ITERATION_HISTORY, iteration_history):
+            return
+
+        max_iter = max(_MIN_ADAPTIVE_MAX_ITER,
+                int(np.ceil(self._adaptive_max_iter*np.median(self._iteration_history))))
+        if max_iter < self.options.get("max_iter", 3000):
+            self.options["max_iter"] = max_iter
+            if self._tee:
+                print(f"ipopt-watertap: adaptive max_iter={max_iter}")
+
+    @contextmanager
+    def _profiled(self, step):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            if self._profile is not None:
+                self._profile[step] = self._profile.get(step, 0.) + time.time() - start_time
+
+    def _record_profile(self, results, start_time):
+        # Loading the solution (and mapping it back) follows _postsolve
+        self._profile["load_solution"] = time.time() - self._postsolve_time
+        self._profile["total"] = time.time() - start_time
+        results.solver.profile = {
+                "python": self._profile,
+                "ipopt": parse_ipopt_timing_statistics(getattr(self, "_log", None)),
+                }
+        solver_profiler.record(results.solver.profile)
+        self._profile = None
+
+    def _record_statistics(self, results):
+        # Report the time spent writing the NL file and the
+        # number of Ipopt iterations alongside the solve time
+        results.solver.nl_write_time = getattr(self, "_nl_write_time", None)
+
+        match = _ITERATIONS_REGEX.search(getattr(self, "_log", None) or "")
+        results.solver.iterations = int(match.group(1)) if match else None
 
     def _cache_scaling_factors(self):
         self._scaling_cache = [ (c, get_scaling_factor(c)) for c in
@@ -142,9 +466,14 @@ class IpoptWaterTAP(IPOPT):
         del self._scaling_cache
 
     def _cache_and_set_relaxed_bounds(self, bound_relax_factor):
+        # Returns the fixed variables, which are part of the
+        # structure of the problem the solver sees
         self._bound_cache = pyo.ComponentMap()
+        fixed_vars = []
         val = pyo.value
         for v in self._model.component_data_objects(pyo.Var, active=True, descend_into=True):
+            if v.fixed:
+                fixed_vars.append(v)
             # we could hit a variable more
             # than once because of References
             if v in self._bound_cache:
@@ -157,6 +486,7 @@ class IpoptWaterTAP(IPOPT):
                 v.lb = val((v.lb*sf - bound_relax_factor*max(1, abs(val(v.lb*sf))))/sf)
             if v.ub is not None:
                 v.ub = val((v.ub*sf + bound_relax_factor*max(1, abs(val(v.ub*sf))))/sf)
+        return fixed_vars
 
     def _reset_bounds(self):
         for v, (lb, ub) in self._bound_cache.items():
@@ -188,6 +518,43 @@ class IpoptWaterTAP(IPOPT):
         return True
 
 
+class _StructureKey:
+    """
+    Key of the structure of a model: its active constraints and its fixed
+    variables, which determine the problem a solver sees (the values of the
+    fixed variables may change freely). The key holds the components
+    themselves (keeping them alive) and compares them by identity, so unlike
+    their ids, they cannot be recycled for the components of another model.
+    """
+
+    def __init__(self, model, constraints, fixed_vars):
+        self._model = weakref.ref(model)
+        self._constraints = tuple(constraints)
+        self._fixed_vars = tuple(fixed_vars)
+        self._hash = hash((id(model), tuple(map(id, self._constraints)), tuple(map(id, self._fixed_vars))))
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model,
+                model.component_data_objects(pyo.Constraint, active=True, descend_into=True),
+                (v for v in model.component_data_objects(pyo.Var, active=True, descend_into=True) if v.fixed))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        # Compared by identity, as == builds an expression for Pyomo components
+        return isinstance(other, _StructureKey) and self._hash == other._hash and \
+                self._model() is not None and self._model() is other._model() and \
+                _same_components(self._constraints, other._constraints) and \
+                _same_components(self._fixed_vars, other._fixed_vars)
+
+
+def _same_components(components, other_components):
+    return len(components) == len(other_components) and \
+            all(c is other_c for c, other_c in zip(components, other_components))
+
+
 ## reconfigure IDAES to use the ipopt-watertap solver
 import idaes
 _default_solver_config_value = idaes.cfg.get("default_solver")
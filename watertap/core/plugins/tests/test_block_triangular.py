@@ -0,0 +1,114 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import pytest
+import pyomo.environ as pyo
+
+from idaes.core.util.scaling import set_scaling_factor
+from watertap.core.plugins.block_triangular import BlockTriangularWaterTAP, block_triangularize
+
+
+class TestBlockTriangularWaterTAP:
+    @pytest.fixture
+    def m(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(range(6), initialize=1)
+        m.f = pyo.Var(initialize=2)
+        m.f.fix()
+        m.c0 = pyo.Constraint(expr=m.x[0] == 2*m.f)
+        m.c1 = pyo.Constraint(expr=m.x[1]**2 + m.x[2] == m.x[0] + 5)
+        m.c2 = pyo.Constraint(expr=m.x[2] == pyo.exp(m.x[1]) - 3)
+        m.c3 = pyo.Constraint(expr=m.x[3]*m.x[1] == 1)
+        m.c4 = pyo.Constraint(expr=m.x[4] + m.x[5] == m.x[3])
+        m.c5 = pyo.Constraint(expr=1e3*(m.x[4] - m.x[5]) == 1e3)
+        set_scaling_factor(m.c5, 1e-3)
+        return m
+
+    @pytest.fixture
+    def s(self):
+        return pyo.SolverFactory('block-triangular-watertap')
+
+    def _test_residuals(self, m):
+        for c in m.component_data_objects(pyo.Constraint, active=True):
+            assert pyo.value(c.body) == pytest.approx(pyo.value(c.upper), abs=1e-7)
+
+    @pytest.mark.unit
+    def test_registration(self, s):
+        assert s.__class__ is BlockTriangularWaterTAP
+
+    @pytest.mark.unit
+    def test_block_triangularize(self, m):
+        blocks = block_triangularize(m)
+        assert [[c.name for c in cons] for cons, _ in blocks] == \
+                [['c0'], ['c1', 'c2'], ['c3'], ['c4', 'c5']]
+        assert [[v.name for v in variables] for _, variables in blocks][0] == ['x[0]']
+
+        # not square
+        m.f.unfix()
+        assert block_triangularize(m) is None
+        m.f.fix()
+
+        # structurally singular
+        m.c3.deactivate()
+        m.c6 = pyo.Constraint(expr=m.x[0] + m.x[1] == m.x[2])
+        assert block_triangularize(m) is None
+
+    @pytest.mark.unit
+    def test_solve(self, m, s):
+        results = s.solve(m)
+        pyo.assert_optimal_termination(results)
+        self._test_residuals(m)
+        assert results.solver.num_blocks == 4
+        assert results.solver.largest_block == 2
+        assert results.solver.newton_blocks == 4
+        assert results.solver.subsolver_blocks == 0
+
+    @pytest.mark.unit
+    def test_reuse_decomposition(self, m, s):
+        pyo.assert_optimal_termination(s.solve(m))
+        m.f.fix(3)
+        pyo.assert_optimal_termination(s.solve(m))
+        self._test_residuals(m)
+        assert len(s._decompositions) == 1
+
+        m.c0.deactivate()
+        m.x[0].fix(4)
+        pyo.assert_optimal_termination(s.solve(m))
+        self._test_residuals(m)
+        assert len(s._decompositions) == 2
+
+    @pytest.mark.component
+    def test_subsolver_fallback(self, s):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(initialize=0, bounds=(0, 10))
+        m.y = pyo.Var(initialize=1)
+        # The Jacobian is singular at the initial point
+        m.c = pyo.Constraint(expr=m.x**2 == 4)
+        m.d = pyo.Constraint(expr=m.y == 2*m.x)
+
+        results = s.solve(m)
+        pyo.assert_optimal_termination(results)
+        assert results.solver.subsolver_blocks == 1
+        assert pyo.value(m.x) == pytest.approx(2)
+        assert pyo.value(m.y) == pytest.approx(4)
+
+    @pytest.mark.component
+    def test_not_square(self, s):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var([1, 2], initialize=1, bounds=(0, 10))
+        m.c = pyo.Constraint(expr=m.x[1] + m.x[2] == 4)
+        m.o = pyo.Objective(expr=(m.x[1] - m.x[2])**2)
+
+        results = s.solve(m)
+        pyo.assert_optimal_termination(results)
+        assert pyo.value(m.x[1]) == pytest.approx(2)
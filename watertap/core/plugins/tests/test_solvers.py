@@ -12,6 +12,7 @@
 ###############################################################################
 
 import pytest
+import subprocess
 import pyomo.environ as pyo
 import idaes.core.util.scaling as iscale
 
@@ -20,7 +21,8 @@ from pyomo.common.errors import ApplicationError
 from idaes.core.util.scaling import (set_scaling_factor, get_scaling_factor,
         constraints_with_scale_factor_generator, unscaled_constraints_generator)
 from idaes.core.util import get_solver
-from watertap.core.plugins.solvers import IpoptWaterTAP
+from watertap.core.plugins.solvers import IpoptWaterTAP, _StructureKey
+from watertap.core.util.profiling import solver_profiler
 
 class TestIpoptWaterTAP:
     @pytest.fixture(scope="class")
@@ -107,6 +109,16 @@ class TestIpoptWaterTAP:
 
         assert not hasattr(s, '_model')
 
+    @pytest.mark.unit
+    def test_postsolve_records_statistics(self, m, s):
+        results = s.solve(m)
+        pyo.assert_optimal_termination(results)
+
+        assert isinstance(results.solver.iterations, int)
+        assert results.solver.iterations > 0
+        assert results.solver.nl_write_time >= 0
+        assert results.solver.time >= 0
+
     @pytest.mark.unit
     def test_option_absorption(self, m, s):
         s.options['ignore_variable_scaling'] = True
@@ -116,6 +128,134 @@ class TestIpoptWaterTAP:
         assert not hasattr(s, "_scaling_cache")
         del s.options['ignore_variable_scaling']
 
+    @pytest.mark.unit
+    def test_cache_constraint_scaling(self, m, s):
+        constraint_autoscale_large_jac = iscale.constraint_autoscale_large_jac
+        calls = []
+        def _counted_constraint_autoscale_large_jac(*args, **kwargs):
+            calls.append(args[0])
+            return constraint_autoscale_large_jac(*args, **kwargs)
+        iscale.constraint_autoscale_large_jac = _counted_constraint_autoscale_large_jac
+
+        s.options['cache_constraint_scaling'] = True
+        try:
+            pyo.assert_optimal_termination(s.solve(m))
+            pyo.assert_optimal_termination(s.solve(m))
+            # The constraint scaling of the first solve is reused
+            assert len(calls) == 1
+            self._test_bounds(m)
+            assert list(constraints_with_scale_factor_generator(m)) == [(m.b.d, 1e6)]
+
+            # Fixing a variable changes the structure
+            m.b.a[2].fix(1)
+            pyo.assert_optimal_termination(s.solve(m))
+            assert len(calls) == 2
+            m.b.a[2].unfix()
+            pyo.assert_optimal_termination(s.solve(m))
+            assert len(calls) == 3
+
+            # So do different scaling options
+            s.options['nlp_scaling_max_gradient'] = 10
+            pyo.assert_optimal_termination(s.solve(m))
+            assert len(calls) == 4
+            del s.options['nlp_scaling_max_gradient']
+
+            # Without the option every solve scales the constraints again
+            del s.options['cache_constraint_scaling']
+            pyo.assert_optimal_termination(s.solve(m))
+            pyo.assert_optimal_termination(s.solve(m))
+            assert len(calls) == 6
+        finally:
+            iscale.constraint_autoscale_large_jac = constraint_autoscale_large_jac
+            s.options.pop('cache_constraint_scaling', None)
+            s.options.pop('nlp_scaling_max_gradient', None)
+        self._test_bounds(m)
+        assert not hasattr(s, "_scaling_cache")
+
+    @pytest.mark.unit
+    def test_structure_key(self, m):
+        key = _StructureKey.from_model(m)
+        assert key == _StructureKey.from_model(m)
+        assert hash(key) == hash(_StructureKey.from_model(m))
+
+        # Keys of models with the same structure, or after a change to it, differ
+        m2 = m.clone()
+        assert key != _StructureKey.from_model(m2)
+        m.b.a[2].fix(1)
+        try:
+            assert key != _StructureKey.from_model(m)
+        finally:
+            m.b.a[2].unfix()
+        m.b.c[1].deactivate()
+        try:
+            assert key != _StructureKey.from_model(m)
+        finally:
+            m.b.c[1].activate()
+        assert key == _StructureKey.from_model(m)
+
+        # The key keeps the components alive, so their ids are never reused
+        key2 = _StructureKey.from_model(m2)
+        constraint_ids = {id(c) for c in key2._constraints}
+        del m2
+        for _ in range(10):
+            m3 = m.clone()
+            assert key2 != _StructureKey.from_model(m3)
+            assert not constraint_ids & {id(c) for c in m3.component_data_objects(pyo.Constraint)}
+
+    @pytest.mark.unit
+    def test_cache_constraint_scaling_other_model(self, m, s):
+        constraint_autoscale_large_jac = iscale.constraint_autoscale_large_jac
+        calls = []
+        def _counted_constraint_autoscale_large_jac(*args, **kwargs):
+            calls.append(args[0])
+            return constraint_autoscale_large_jac(*args, **kwargs)
+        iscale.constraint_autoscale_large_jac = _counted_constraint_autoscale_large_jac
+
+        s.options['cache_constraint_scaling'] = True
+        try:
+            pyo.assert_optimal_termination(s.solve(m))
+            # A copy of the model with the same structure is scaled on its own
+            m2 = m.clone()
+            pyo.assert_optimal_termination(s.solve(m2))
+            assert calls == [m, m2]
+            del m2
+
+            # So is the model after a change to the user scaling of its constraints
+            set_scaling_factor(m.b.d, 1e5)
+            pyo.assert_optimal_termination(s.solve(m))
+            pyo.assert_optimal_termination(s.solve(m))
+            assert calls == [m, m, m]
+        finally:
+            iscale.constraint_autoscale_large_jac = constraint_autoscale_large_jac
+            s.options.pop('cache_constraint_scaling', None)
+            set_scaling_factor(m.b.d, 1e6)
+        self._test_bounds(m)
+        assert not hasattr(s, "_scaling_cache")
+
+    @pytest.mark.unit
+    def test_cache_constraint_scaling_bounds(self, m, s, monkeypatch):
+        lower_bounds = []
+        apply_solver = s._apply_solver
+        def _recorded_apply_solver():
+            lower_bounds.append(m.b.a[1].lb)
+            return apply_solver()
+        monkeypatch.setattr(s, '_apply_solver', _recorded_apply_solver)
+
+        s.options['cache_constraint_scaling'] = True
+        try:
+            m.b.a[1].setlb(None)
+            pyo.assert_optimal_termination(s.solve(m))
+            # A bound added after the constraint scaling is cached is relaxed as well
+            m.b.a[1].setlb(-10)
+            pyo.assert_optimal_termination(s.solve(m))
+        finally:
+            s.options.pop('cache_constraint_scaling', None)
+            m.b.a[1].setlb(-10)
+
+        assert lower_bounds == [None, -10 - 1e-07]
+        self._test_bounds(m)
+        assert not hasattr(s, "_scaling_cache")
+
     @pytest.mark.unit
     def test_get_option(self, s):
         s.options['ignore_constraint_scaling'] = True
@@ -287,3 +427,204 @@ class TestIpoptWaterTAP:
         s.solve(m2, tee=True)
         assert pyo.value(m2.x) == pytest.approx(5.0e+15, abs=0, rel=1e-8)
         del s.options["bound_relax_factor"]
+
+    @pytest.mark.unit
+    def test_warm_start(self, s):
+        m = pyo.ConcreteModel()
+        m.p = pyo.Param(initialize=1, mutable=True)
+        m.x = pyo.Var([1,2], bounds=(0, 10), initialize=5)
+        m.c = pyo.Constraint(expr=m.x[1] + m.x[2] >= m.p)
+        m.o = pyo.Objective(expr=(m.x[1] - 2)**2 + (m.x[2] + 1)**2)
+
+        s.options['warm_start'] = True
+        try:
+            results = s.solve(m)
+            pyo.assert_optimal_termination(results)
+            cold_iterations = results.solver.iterations
+
+            for name in ('dual', 'ipopt_zL_out', 'ipopt_zU_out', 'ipopt_zL_in', 'ipopt_zU_in'):
+                assert isinstance(m.component(name), pyo.Suffix)
+            assert m.dual[m.c] == pytest.approx(0, abs=1e-6)
+            assert m.ipopt_zL_in[m.x[2]] == pytest.approx(m.ipopt_zL_out[m.x[2]])
+            assert m.ipopt_zL_in[m.x[2]] > 0
+
+            # A nearby problem converges faster from the previous multipliers
+            m.p = 3
+            results = s.solve(m)
+            pyo.assert_optimal_termination(results)
+            assert results.solver.iterations <= cold_iterations
+            assert m.dual[m.c] != pytest.approx(0, abs=1e-6)
+        finally:
+            del s.options['warm_start']
+        assert 'warm_start_init_point' not in s.options
+        for v in m.x.values():
+            assert v.lb == 0
+            assert v.ub == 10
+
+    @pytest.mark.unit
+    def test_warm_start_options(self, monkeypatch):
+        s = pyo.SolverFactory('ipopt-watertap')
+        options = []
+        apply_solver = s._apply_solver
+        def _recorded_apply_solver():
+            options.append(dict(s.options))
+            return apply_solver()
+        monkeypatch.setattr(s, '_apply_solver', _recorded_apply_solver)
+
+        def _build():
+            m = pyo.ConcreteModel()
+            m.x = pyo.Var(bounds=(0, 10), initialize=5)
+            m.o = pyo.Objective(expr=(m.x + 1)**2)
+            return m
+
+        m = _build()
+        s.options['warm_start'] = True
+        s.options['mu_init'] = 1e-4
+        pyo.assert_optimal_termination(s.solve(m))
+        pyo.assert_optimal_termination(s.solve(m))
+
+        # The first solve is cold; the warm start options are set for the second
+        # solve only, without overriding the options of the user
+        assert 'warm_start_init_point' not in options[0]
+        assert options[1]['warm_start_init_point'] == 'yes'
+        assert options[1]['warm_start_bound_push'] == 1e-06
+        assert options[1]['mu_init'] == 1e-4
+        assert 'warm_start_init_point' not in s.options
+        assert s.options['mu_init'] == 1e-4
+
+        # After a failed solve, and on a different model, the solve is cold again
+        for name in ('dual', 'ipopt_zL_out', 'ipopt_zU_out', 'ipopt_zL_in', 'ipopt_zU_in'):
+            m.component(name).clear_all_values()
+        pyo.assert_optimal_termination(s.solve(m))
+        pyo.assert_optimal_termination(s.solve(_build()))
+        assert 'warm_start_init_point' not in options[2]
+        assert 'warm_start_init_point' not in options[3]
+        assert set(s.options) == {'warm_start', 'mu_init'}
+
+    @pytest.mark.unit
+    def test_aggregate_variables(self, s):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var([1,2,3,4], bounds=(0, 10), initialize=1)
+        m.x[3].setub(4)
+        m.l1 = pyo.Constraint(expr=m.x[1] == m.x[2])
+        m.l2 = pyo.Constraint(expr=m.x[2] == m.x[3])
+        m.k = pyo.Constraint(expr=m.x[4] == 2)
+        m.c = pyo.Constraint(expr=m.x[1] + m.x[4] >= 5)
+        m.o = pyo.Objective(expr=(m.x[2] - 1)**2 + m.x[4]**2)
+        m.dual = pyo.Suffix(direction=pyo.Suffix.IMPORT)
+
+        pyo.assert_optimal_termination(s.solve(m))
+        expected = {v: pyo.value(v) for v in (m.x[1], m.x[2], m.x[3], m.x[4])}
+        expected_duals = [m.dual[c] for c in (m.l1, m.l2, m.k, m.c)]
+
+        for v in m.x.values():
+            v.value = 1
+        m.dual.clear_all_values()
+        s.options['aggregate_variables'] = True
+        try:
+            pyo.assert_optimal_termination(s.solve(m))
+        finally:
+            del s.options['aggregate_variables']
+
+        for v, val in expected.items():
+            assert pyo.value(v) == pytest.approx(val, rel=1e-6)
+        assert [m.dual[c] for c in (m.l1, m.l2, m.k, m.c)] == \
+                pytest.approx(expected_duals, rel=1e-5, abs=1e-6)
+
+        # The model is left unchanged
+        for c in (m.l1, m.l2, m.k):
+            assert c.active
+        assert not m.x[4].fixed
+        assert m.x[1].bounds == (0, 10)
+        assert str(m.o.expr) == str((m.x[2] - 1)**2 + m.x[4]**2)
+
+    @pytest.mark.unit
+    def test_profile(self, m, s):
+        solver_profiler.clear()
+        s.options['profile'] = True
+        try:
+            results = s.solve(m)
+        finally:
+            del s.options['profile']
+        pyo.assert_optimal_termination(results)
+        assert 'print_timing_statistics' not in s.options
+
+        profile = results.solver.profile
+        for step in ('scaling_cache', 'nl_write', 'ipopt_run', 'sol_read', 'load_solution', 'total'):
+            assert profile['python'][step] >= 0
+        assert profile['python']['total'] >= profile['python']['ipopt_run']
+        assert 'OverallAlgorithm' in profile['ipopt']
+        assert solver_profiler.summary()[None]['solves'] == 1
+
+        # Without the option, solves are only profiled inside a profiler context
+        results = s.solve(m)
+        assert not hasattr(results.solver, 'profile')
+        with solver_profiler.profile('test'):
+            results = s.solve(m)
+        assert 'total' in results.solver.profile['python']
+        assert 'print_timing_statistics' not in s.options
+        assert solver_profiler.summary()['test']['solves'] == 1
+        solver_profiler.clear()
+
+    @pytest.mark.unit
+    def test_wall_time_limit(self, m, s, monkeypatch):
+        timelimits = []
+        commands = []
+        def _timed_out_execute_command(command):
+            # Like a subprocess killed by its timeout
+            timelimits.append(s._timelimit)
+            commands.append(command.cmd)
+            raise subprocess.TimeoutExpired(command.cmd, s._timelimit)
+        monkeypatch.setattr(s, '_execute_command', _timed_out_execute_command)
+
+        m.a.value = 0.25
+        s.options['wall_time_limit'] = 10
+        s.options['max_wall_time'] = 5
+        try:
+            results = s.solve(m)
+        finally:
+            del s.options['wall_time_limit']
+            del s.options['max_wall_time']
+
+        # Ipopt's own time limit is passed through
+        assert 'max_wall_time=5' in commands[0]
+        assert not any(c.startswith('wall_time_limit') for c in commands[0])
+        assert timelimits == [10]
+        assert results.solver.status == pyo.SolverStatus.aborted
+        assert results.solver.termination_condition == pyo.TerminationCondition.maxTimeLimit
+        assert not pyo.check_optimal_termination(results)
+
+        # The model is cleaned up and left at its starting point
+        assert m.a.value == 0.25
+        self._test_bounds(m)
+        assert not hasattr(s, '_scaling_cache')
+        assert not hasattr(s, '_model')
+        assert list(constraints_with_scale_factor_generator(m)) == [(m.b.d, 1e6)]
+
+    @pytest.mark.unit
+    def test_adaptive_max_iter(self, m):
+        s = pyo.SolverFactory('ipopt-watertap')
+        s.options['adaptive_max_iter'] = 2
+        s.options['iteration_history'] = 10
+        for _ in range(6):
+            results = s.solve(m)
+            pyo.assert_optimal_termination(results)
+        assert len(s._iteration_history) == 6
+        assert 'max_iter' not in s.options
+
+        # Capped at twice the median, but never below the minimum
+        s._iteration_history.extend([100]*10)
+        s._set_adaptive_max_iter(10)
+        assert s.options['max_iter'] == 200
+        s._iteration_history.extend([10]*10)
+        s._set_adaptive_max_iter(10)
+        assert s.options['max_iter'] == 50
+
+        # Without enough history, or with a lower max_iter, nothing changes
+        s.options['max_iter'] = 20
+        s._set_adaptive_max_iter(10)
+        assert s.options['max_iter'] == 20
+        s._iteration_history.clear()
+        del s.options['max_iter']
+        s._set_adaptive_max_iter(10)
+        assert 'max_iter' not in s.options
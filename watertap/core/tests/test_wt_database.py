@@ -15,8 +15,11 @@ Tests for WaterTAP database wrapper
 """
 import pytest
 import os
+import json
+import shutil
 
-from watertap.core.wt_database import Database
+from watertap.core.wt_database import (Database, ParameterView,
+                                       CACHE_DIR_VARIABLE)
 
 
 @pytest.mark.unit
@@ -156,6 +159,38 @@ class TestDatabase():
                 # All other entries should match defaults
                 assert v == db._cached_files["nanofiltration"]["default"][k]
 
+    @pytest.mark.unit
+    def test_get_unit_operation_parameters_view(self, db):
+        data = db.get_unit_operation_parameters(
+            "nanofiltration", subtype=["subtype1", "subtype2"])
+
+        assert isinstance(data, ParameterView)
+        # Later subtypes overwrite earlier ones
+        assert data["recovery_frac_mass_H2O"] == "overloaded_again"
+        assert data["new_param"] is True
+        assert data["new_param_2"] is False
+        assert list(data)[:len(db._cached_files["nanofiltration"]["default"])] \
+            == list(db._cached_files["nanofiltration"]["default"])
+        assert len(data) == \
+            len(db._cached_files["nanofiltration"]["default"]) + 2
+
+        # Repeated lookups return the same objects
+        assert data is db.get_unit_operation_parameters(
+            "nanofiltration", subtype=("subtype1", "subtype2"))
+        assert data["removal_frac_mass_solute"] is \
+            data["removal_frac_mass_solute"]
+
+        # Views are read-only, copies are mutable
+        with pytest.raises(TypeError):
+            data["new_param"] = False
+        with pytest.raises(TypeError):
+            data["removal_frac_mass_solute"]["toc"]["value"] = 0
+        copy = data.to_dict()
+        assert copy == data
+        assert isinstance(copy["removal_frac_mass_solute"], dict)
+        copy["removal_frac_mass_solute"]["toc"]["value"] = 0
+        assert data["removal_frac_mass_solute"]["toc"]["value"] == 0.75
+
     @pytest.mark.unit
     def test_get_unit_operation_parameters_subtype_argument(self, db):
         with pytest.raises(TypeError,
@@ -180,6 +215,14 @@ class TestDatabase():
             "boron", "bromide", "calcium", "chloride", "magnesium",
             "potassium", "sodium", "strontium", "sulfate", "tds", "tss"]
 
+    @pytest.mark.unit
+    def test_get_water_sources(self, db):
+        sources = db.get_water_sources()
+
+        assert "seawater" in sources
+        assert "default" not in sources
+        assert len(sources) == len(db._cached_files["water_sources"]) - 1
+
     @pytest.mark.unit
     def test_get_solute_set_no_default(self, db):
         # First, delete default entry from database
@@ -195,3 +238,106 @@ class TestDatabase():
         db.flush_cache()
 
         assert db._cached_files == {}
+        assert db._parameter_views == {}
+
+
+class TestCompiledCache():
+    @pytest.fixture
+    def dbpath(self, tmp_path):
+        src = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "..", "..", "data", "techno_economic")
+        dbpath = tmp_path / "db"
+        dbpath.mkdir()
+        for f in ["nanofiltration.yaml", "pump.yaml", "water_sources.yaml",
+                  "component_list.yaml"]:
+            shutil.copy(os.path.join(src, f), dbpath / f)
+        return dbpath
+
+    @pytest.mark.unit
+    def test_preload(self, dbpath, tmp_path):
+        cache_dir = tmp_path / "cache"
+        db = Database(dbpath=str(dbpath), cache_dir=str(cache_dir))
+        db.preload()
+
+        assert len(os.listdir(cache_dir)) == 1
+        assert set(db._cached_files) == {
+            "nanofiltration", "pump", "water_sources"}
+        assert isinstance(db.component_list, dict)
+
+        # The cache holds plain JSON data
+        with open(cache_dir / os.listdir(cache_dir)[0], "r") as f:
+            cache = json.load(f)
+        assert json.loads(cache["files"]["pump"]["data"]) == \
+            db._cached_files["pump"]
+
+        # A new Database object gets its own copy of the data
+        db2 = Database(dbpath=str(dbpath), cache_dir=str(cache_dir))
+        data = db2._get_technology("pump")
+        assert data == db._cached_files["pump"]
+        assert data is not db._cached_files["pump"]
+
+    @pytest.mark.unit
+    def test_file_changed(self, dbpath, tmp_path):
+        cache_dir = tmp_path / "cache"
+        db = Database(dbpath=str(dbpath), cache_dir=str(cache_dir))
+        assert db.get_unit_operation_parameters("pump")[
+            "energy_electric_flow_vol_inlet"]["value"] == 0.051
+
+        with open(dbpath / "pump.yaml", "r") as f:
+            lines = f.read()
+        with open(dbpath / "pump.yaml", "w") as f:
+            f.write(lines.replace("value: 0.051", "value: 0.052"))
+        shutil.copy(dbpath / "pump.yaml", dbpath / "pump_copy.yaml")
+
+        # Changes are picked up by new objects or after flushing the cache
+        assert db.get_unit_operation_parameters("pump")[
+            "energy_electric_flow_vol_inlet"]["value"] == 0.051
+        db.flush_cache()
+        assert db.get_unit_operation_parameters("pump")[
+            "energy_electric_flow_vol_inlet"]["value"] == 0.052
+        db2 = Database(dbpath=str(dbpath), cache_dir=str(cache_dir))
+        assert db2.get_unit_operation_parameters("pump_copy")[
+            "energy_electric_flow_vol_inlet"]["value"] == 0.052
+
+    @pytest.mark.unit
+    def test_no_cache(self, dbpath, tmp_path, monkeypatch):
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv(CACHE_DIR_VARIABLE, str(cache_dir))
+        db = Database(dbpath=str(dbpath), cache_dir=False)
+        data = db._get_technology("nanofiltration")
+        assert "default" in data
+
+        db.preload()
+        assert set(db._cached_files) == {
+            "nanofiltration", "pump", "water_sources"}
+        assert not os.path.exists(cache_dir)
+
+    @pytest.mark.unit
+    def test_cache_opt_in(self, dbpath, tmp_path, monkeypatch):
+        # Without a cache directory, nothing is written anywhere
+        monkeypatch.delenv(CACHE_DIR_VARIABLE, raising=False)
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+        db = Database(dbpath=str(dbpath))
+        db.preload()
+        assert "default" in db._get_technology("pump")
+        assert os.listdir(tmp_path) == ["db"]
+
+        # The environment variable opts in
+        monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmp_path / "cache"))
+        Database(dbpath=str(dbpath)).preload()
+        assert len(os.listdir(tmp_path / "cache")) == 1
+
+    @pytest.mark.unit
+    def test_cache_dir_not_owned(self, dbpath, tmp_path, monkeypatch):
+        if not hasattr(os, "getuid"):
+            pytest.skip("Ownership of the cache directory is not checked")
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(cache_dir).st_uid + 1)
+
+        db = Database(dbpath=str(dbpath), cache_dir=str(cache_dir))
+        db.preload()
+        assert "default" in db._get_technology("pump")
+        assert os.listdir(cache_dir) == []
+
@@ -43,6 +43,8 @@ def test_private_attributes():
     assert m.fs.unit._fixed_perf_vars == []
     assert m.fs.unit._initialize is None
     assert m.fs.unit._scaling is None
+    assert m.fs.unit._evaluate is None
+    assert m.fs.unit._evaluate_electricity is None
     assert m.fs.unit._get_Q is None
     assert m.fs.unit._stream_table_dict == {}
     assert m.fs.unit._perf_var_dict == {}
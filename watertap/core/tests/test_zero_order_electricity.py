@@ -19,6 +19,9 @@ from io import StringIO
 from idaes.core import declare_process_block_class, FlowsheetBlock
 from idaes.core.util.model_statistics import degrees_of_freedom
 from idaes.core.util import get_solver
+from functools import partial
+
+from pyomo.common.collections import ComponentSet
 from pyomo.environ import (check_optimal_termination,
                            ConcreteModel,
                            Constraint,
@@ -30,6 +33,8 @@ from pyomo.util.check_units import assert_units_consistent
 
 from watertap.core import (constant_intensity, pump_electricity,
                            WaterParameterBlock, ZeroOrderBaseData)
+from watertap.core.zero_order_electricity import (
+    _evaluate_constant_intensity, _evaluate_pump_electricity)
 
 solver = get_solver()
 
@@ -85,6 +90,8 @@ class TestConstantIntensity:
         assert model.fs.unit._initialize is None
         assert model.fs.unit._scaling is None
         assert model.fs.unit._get_Q is get_Q
+        assert model.fs.unit._evaluate_electricity is \
+            _evaluate_constant_intensity
         assert model.fs.unit._perf_var_dict == {
             "Electricity Demand": model.fs.unit.electricity,
             "Electricity Intensity":
@@ -98,6 +105,15 @@ class TestConstantIntensity:
     def test_unit_consistency(self, model):
         assert_units_consistent(model)
 
+    @pytest.mark.component
+    def test_evaluate(self, model):
+        known = ComponentSet()
+        model.fs.unit._evaluate_electricity(model.fs.unit, known)
+
+        assert pytest.approx(42*10, rel=1e-8) == value(
+            model.fs.unit.electricity[0])
+        assert model.fs.unit.electricity[0] in known
+
     @pytest.mark.component
     def test_solve(self, model):
         results = solver.solve(model)
@@ -182,6 +198,9 @@ class TestPumpElectricity:
         assert model.fs.unit._initialize is None
         assert model.fs.unit._scaling is None
         assert model.fs.unit._get_Q is get_Q
+        assert isinstance(model.fs.unit._evaluate_electricity, partial)
+        assert model.fs.unit._evaluate_electricity.func is \
+            _evaluate_pump_electricity
         assert model.fs.unit._perf_var_dict == {
             "Electricity Demand": model.fs.unit.electricity}
 
@@ -193,6 +212,15 @@ class TestPumpElectricity:
     def test_unit_consistency(self, model):
         assert_units_consistent(model)
 
+    @pytest.mark.component
+    def test_evaluate(self, model):
+        known = ComponentSet()
+        model.fs.unit._evaluate_electricity(model.fs.unit, known)
+
+        assert pytest.approx(2.32479e-2, rel=1e-5) == value(
+            model.fs.unit.electricity[0])
+        assert model.fs.unit.electricity[0] in known
+
     @pytest.mark.component
     def test_solve(self, model):
         results = solver.solve(model)
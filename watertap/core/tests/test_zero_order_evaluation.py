@@ -0,0 +1,178 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+Tests for direct evaluation of zero-order flowsheets
+"""
+import pytest
+
+from idaes.core import declare_process_block_class, FlowsheetBlock
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+from idaes.core.util.model_statistics import (degrees_of_freedom,
+                                              large_residuals_set)
+from idaes.generic_models.unit_models import Product
+from pyomo.common.collections import ComponentSet
+from pyomo.environ import ConcreteModel, TransformationFactory, value
+from pyomo.network import Arc
+
+from watertap.core import (build_pt, build_sido, constant_intensity,
+                           evaluate_zero_order_train, WaterParameterBlock,
+                           ZeroOrderBaseData)
+from watertap.core.zero_order_evaluation import evaluate_constraints
+from watertap.unit_models.zero_order import FeedZO
+
+
+@declare_process_block_class("DerivedSIDO")
+class DerivedSIDOData(ZeroOrderBaseData):
+    def build(self):
+        super().build()
+
+        build_sido(self)
+        constant_intensity(self)
+
+
+@declare_process_block_class("DerivedPT")
+class DerivedPTData(ZeroOrderBaseData):
+    def build(self):
+        super().build()
+
+        build_pt(self)
+        constant_intensity(self)
+
+
+class TestTrain:
+    @pytest.fixture(scope="class")
+    def model(self):
+        m = ConcreteModel()
+
+        m.fs = FlowsheetBlock(default={"dynamic": False})
+
+        m.fs.water_props = WaterParameterBlock(
+            default={"solute_list": ["A", "B"]})
+
+        m.fs.feed = FeedZO(default={"property_package": m.fs.water_props})
+        m.fs.unit1 = DerivedSIDO(
+            default={"property_package": m.fs.water_props})
+        m.fs.unit2 = DerivedPT(
+            default={"property_package": m.fs.water_props})
+        m.fs.unit3 = DerivedSIDO(
+            default={"property_package": m.fs.water_props})
+        m.fs.product = Product(
+            default={"property_package": m.fs.water_props})
+
+        # Declared out of order, to test the evaluation order
+        m.fs.s03 = Arc(source=m.fs.unit2.outlet, destination=m.fs.unit3.inlet)
+        m.fs.s02 = Arc(source=m.fs.unit1.treated,
+                       destination=m.fs.unit2.inlet)
+        m.fs.s01 = Arc(source=m.fs.feed.outlet, destination=m.fs.unit1.inlet)
+        m.fs.s04 = Arc(source=m.fs.unit3.treated,
+                       destination=m.fs.product.inlet)
+        TransformationFactory("network.expand_arcs").apply_to(m)
+
+        m.fs.feed.flow_vol.fix(0.1)
+        m.fs.feed.conc_mass_comp[0, "A"].fix(10)
+        m.fs.feed.conc_mass_comp[0, "B"].fix(20)
+
+        for u in [m.fs.unit1, m.fs.unit3]:
+            u.recovery_frac_mass_H2O.fix(0.9)
+            u.removal_frac_mass_solute[0, "A"].fix(0.5)
+            u.removal_frac_mass_solute[0, "B"].fix(0.2)
+        for u in [m.fs.unit1, m.fs.unit2, m.fs.unit3]:
+            u.energy_electric_flow_vol_inlet.fix(2)
+
+        return m
+
+    @pytest.mark.unit
+    def test_degrees_of_freedom(self, model):
+        assert degrees_of_freedom(model) == 0
+
+    @pytest.mark.component
+    def test_evaluate(self, model):
+        evaluate_zero_order_train(model.fs)
+
+        assert len(large_residuals_set(model, 1e-8)) == 0
+
+    @pytest.mark.component
+    def test_solution(self, model):
+        # H2O: 0.1*1000 - 1 - 2 = 97 kg/s
+        assert (pytest.approx(97*0.9**2, rel=1e-8) ==
+                value(model.fs.product.inlet.flow_mass_comp[0, "H2O"]))
+        assert (pytest.approx(1*0.5**2, rel=1e-8) ==
+                value(model.fs.product.inlet.flow_mass_comp[0, "A"]))
+        assert (pytest.approx(2*0.8**2, rel=1e-8) ==
+                value(model.fs.product.inlet.flow_mass_comp[0, "B"]))
+        assert (pytest.approx(97*0.9*0.1, rel=1e-8) ==
+                value(model.fs.unit3.byproduct.flow_mass_comp[0, "H2O"]))
+
+        # Electricity is based on the inlet flow in m^3/hour
+        assert (pytest.approx(2*0.1*3600, rel=1e-8) ==
+                value(model.fs.unit1.electricity[0]))
+        assert (pytest.approx(2*(97*0.9 + 0.5 + 1.6)/1000*3600, rel=1e-8) ==
+                value(model.fs.unit2.electricity[0]))
+
+    @pytest.mark.component
+    def test_fixed_variables_unchanged(self, model):
+        assert value(model.fs.feed.flow_vol[0]) == 0.1
+        assert model.fs.feed.flow_vol[0].fixed
+        assert value(model.fs.unit1.recovery_frac_mass_H2O[0]) == 0.9
+
+
+@pytest.mark.unit
+def test_evaluate_constraints():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.water_props = WaterParameterBlock(default={"solute_list": ["A"]})
+    m.fs.unit = DerivedSIDO(default={"property_package": m.fs.water_props})
+
+    m.fs.unit.inlet.flow_mass_comp[0, "H2O"].fix(100)
+    m.fs.unit.inlet.flow_mass_comp[0, "A"].fix(1)
+    m.fs.unit.removal_frac_mass_solute[0, "A"].fix(0.5)
+    m.fs.unit.energy_electric_flow_vol_inlet.fix(1)
+
+    # Recovery calculated from a fixed treated flow
+    m.fs.unit.treated.flow_mass_comp[0, "H2O"].fix(80)
+    m.fs.unit.evaluate()
+
+    assert pytest.approx(0.8, rel=1e-8) == value(
+        m.fs.unit.recovery_frac_mass_H2O[0])
+    assert pytest.approx(20, rel=1e-8) == value(
+        m.fs.unit.byproduct.flow_mass_comp[0, "H2O"])
+    assert len(large_residuals_set(m, 1e-8)) == 0
+
+    # Constraints with two unknown variables cannot be evaluated
+    m.fs.unit.treated.flow_mass_comp[0, "H2O"].unfix()
+    m.fs.unit.recovery_frac_mass_H2O.unfix()
+    known = ComponentSet()
+    unresolved = evaluate_constraints(m.fs.unit, known)
+    assert len(unresolved) == 2
+    assert unresolved[0] is m.fs.unit.water_recovery_equation[0]
+    assert unresolved[1] is m.fs.unit.water_balance[0]
+
+    with pytest.raises(InitializationError,
+                       match="fs.unit could not be evaluated directly"):
+        m.fs.unit.evaluate()
+
+
+@pytest.mark.unit
+def test_recycle():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.water_props = WaterParameterBlock(default={"solute_list": ["A"]})
+    m.fs.unit1 = DerivedPT(default={"property_package": m.fs.water_props})
+    m.fs.unit2 = DerivedPT(default={"property_package": m.fs.water_props})
+
+    m.fs.s01 = Arc(source=m.fs.unit1.outlet, destination=m.fs.unit2.inlet)
+    m.fs.s02 = Arc(source=m.fs.unit2.outlet, destination=m.fs.unit1.inlet)
+
+    with pytest.raises(ConfigurationError,
+                       match="fs contains a recycle between the units"):
+        evaluate_zero_order_train(m.fs)
@@ -26,7 +26,8 @@ from pyomo.util.check_units import assert_units_consistent
 
 from watertap.core import WaterParameterBlock, WaterStateBlock, ZeroOrderBaseData
 from watertap.core.zero_order_pt import (
-    build_pt, initialize_pt, calculate_scaling_factors_pt, _get_Q_pt)
+    build_pt, initialize_pt, evaluate_pt, calculate_scaling_factors_pt,
+    _get_Q_pt)
 
 solver = get_solver()
 
@@ -66,6 +67,7 @@ class TestPT:
         assert model.fs.unit._fixed_perf_vars == []
         assert model.fs.unit._initialize is initialize_pt
         assert model.fs.unit._scaling is calculate_scaling_factors_pt
+        assert model.fs.unit._evaluate is evaluate_pt
         assert model.fs.unit._get_Q is _get_Q_pt
         assert model.fs.unit._stream_table_dict == {
             "Inlet": model.fs.unit.inlet,
@@ -0,0 +1,169 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+Tests for vectorized screening of zero-order trains
+"""
+import numpy as np
+import pytest
+
+from idaes.core import FlowsheetBlock
+from pyomo.environ import ConcreteModel, TransformationFactory, value
+from pyomo.network import Arc
+
+from watertap.core import (Database, evaluate_zero_order_train,
+                           screen_zero_order_train, WaterParameterBlock)
+from watertap.unit_models.zero_order import (CoagulationFlocculationZO,
+                                             FeedZO,
+                                             NanofiltrationZO,
+                                             PumpZO,
+                                             SedimentationZO)
+
+_TECHNOLOGIES = ["coag_and_floc", "sedimentation", "nanofiltration", "pump"]
+_SUBTYPES = [[None], [None], [None], [None, "raw_water", "gac_feed"]]
+
+
+@pytest.fixture(scope="module")
+def db():
+    return Database()
+
+
+@pytest.fixture(scope="module")
+def results(db):
+    return screen_zero_order_train(_TECHNOLOGIES,
+                                   subtypes=_SUBTYPES,
+                                   database=db,
+                                   use_default_removal=True)
+
+
+@pytest.mark.unit
+def test_scenarios(db, results):
+    sources = db.get_water_sources()
+    n = len(sources)*3
+
+    assert len(results["scenarios"]) == n
+    assert results["scenarios"][0] == (sources[0], None, None, None, None)
+    assert results["scenarios"][1] == (sources[0], None, None, None,
+                                       "raw_water")
+    assert results["components"][0] == "H2O"
+    assert len(results["components"]) == 1 + len(set(
+        j for w in sources for j in db.get_solute_set(w)))
+
+    nc = len(results["components"])
+    assert results["flow_mass_comp_treated"].shape == (n, 4, nc)
+    assert results["removal_frac_mass_solute"].shape == (n, 4, nc-1)
+    assert results["electricity"].shape == (n, 4)
+
+
+@pytest.mark.unit
+def test_balances(results):
+    inlet = results["flow_mass_comp_inlet"]
+    treated = results["flow_mass_comp_treated"]
+    byproduct = results["flow_mass_comp_byproduct"]
+
+    assert np.allclose(inlet, treated + byproduct)
+    assert np.allclose(inlet[:, 1:, :], treated[:, :-1, :])
+
+    # Pass-through units have no byproduct
+    assert np.all(byproduct[:, 0, :] == 0)
+    assert np.all(byproduct[:, 3, :] == 0)
+
+    # Only the pump subtype changes between these scenarios
+    assert np.allclose(treated[0], treated[1])
+    assert results["electricity"][0, 3] != results["electricity"][1, 3]
+
+
+@pytest.mark.unit
+def test_missing_removal(db):
+    with pytest.raises(KeyError,
+                       match="does not contain an entry for "
+                       "removal_frac_mass_solute"):
+        screen_zero_order_train(["nanofiltration"],
+                                water_sources=["seawater"],
+                                database=db)
+
+
+@pytest.mark.unit
+def test_subtypes_length(db):
+    with pytest.raises(ValueError,
+                       match="Received 1 lists of subtypes for 2 "
+                       "technologies."):
+        screen_zero_order_train(["nanofiltration", "pump"],
+                                subtypes=[[None]],
+                                database=db)
+
+
+@pytest.mark.unit
+def test_model_forms(db):
+    # coag_and_floc is a pass-through unit, even though the database defines
+    # a water recovery for it
+    results = screen_zero_order_train(["coag_and_floc"],
+                                      water_sources=["seawater"],
+                                      database=db)
+    assert np.all(results["flow_mass_comp_byproduct"] == 0)
+
+    results = screen_zero_order_train(["coag_and_floc"],
+                                      water_sources=["seawater"],
+                                      database=db,
+                                      use_default_removal=True,
+                                      model_forms={"coag_and_floc": "sido"})
+    assert results["flow_mass_comp_byproduct"][0, 0, 0] > 0
+
+    with pytest.raises(ValueError,
+                       match="Model form of technology foo is not known"):
+        screen_zero_order_train(["foo"], database=db)
+
+
+@pytest.mark.component
+def test_consistent_with_models(db, results):
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.params = WaterParameterBlock(
+        default={"database": db, "water_source": "seawater"})
+
+    m.fs.feed = FeedZO(default={"property_package": m.fs.params})
+    m.fs.coag = CoagulationFlocculationZO(
+        default={"property_package": m.fs.params, "database": db})
+    m.fs.sed = SedimentationZO(
+        default={"property_package": m.fs.params, "database": db})
+    m.fs.nf = NanofiltrationZO(
+        default={"property_package": m.fs.params, "database": db})
+    m.fs.pump = PumpZO(default={"property_package": m.fs.params,
+                                "database": db,
+                                "process_subtype": "raw_water"})
+
+    m.fs.s01 = Arc(source=m.fs.feed.outlet, destination=m.fs.coag.inlet)
+    m.fs.s02 = Arc(source=m.fs.coag.outlet, destination=m.fs.sed.inlet)
+    m.fs.s03 = Arc(source=m.fs.sed.treated, destination=m.fs.nf.inlet)
+    m.fs.s04 = Arc(source=m.fs.nf.treated, destination=m.fs.pump.inlet)
+    TransformationFactory("network.expand_arcs").apply_to(m)
+
+    m.fs.feed.load_feed_data_from_database()
+    for u in [m.fs.coag, m.fs.sed, m.fs.nf, m.fs.pump]:
+        u.load_parameters_from_database(use_default_removal=True)
+
+    evaluate_zero_order_train(m.fs)
+
+    s = results["scenarios"].index(("seawater", None, None, None,
+                                    "raw_water"))
+    components = results["components"]
+    for k, u in enumerate([m.fs.coag, m.fs.sed, m.fs.nf, m.fs.pump]):
+        outlet = u.outlet if k in (0, 3) else u.treated
+        for j in db.get_solute_set("seawater") + ["H2O"]:
+            assert (pytest.approx(value(outlet.flow_mass_comp[0, j]),
+                                  rel=1e-8) ==
+                    results["flow_mass_comp_treated"][s, k,
+                                                      components.index(j)])
+
+    for k, u in enumerate([m.fs.sed, m.fs.nf, m.fs.pump]):
+        assert (pytest.approx(value(u.electricity[0]), rel=1e-8) ==
+                results["electricity"][s, k+1])
@@ -17,10 +17,12 @@ import pytest
 from io import StringIO
 
 from idaes.core import declare_process_block_class, FlowsheetBlock
-from idaes.core.util.model_statistics import degrees_of_freedom
+from idaes.core.util.model_statistics import (degrees_of_freedom,
+                                              large_residuals_set)
 from idaes.core.util.testing import initialization_tester
 from idaes.core.util import get_solver
 import idaes.core.util.scaling as iscale
+from pyomo.common.collections import ComponentSet
 from pyomo.environ import (check_optimal_termination,
                            ConcreteModel,
                            Constraint,
@@ -32,7 +34,8 @@ from pyomo.util.check_units import assert_units_consistent
 
 from watertap.core import WaterParameterBlock, WaterStateBlock, ZeroOrderBaseData
 from watertap.core.zero_order_sido import (
-    build_sido, initialize_sido, calculate_scaling_factors_sido, _get_Q_sido)
+    build_sido, initialize_sido, evaluate_sido, calculate_scaling_factors_sido,
+    _get_Q_sido)
 
 solver = get_solver()
 
@@ -77,6 +80,7 @@ class TestSIDO:
         assert model.fs.unit._fixed_perf_vars == []
         assert model.fs.unit._initialize is initialize_sido
         assert model.fs.unit._scaling is calculate_scaling_factors_sido
+        assert model.fs.unit._evaluate is evaluate_sido
         assert model.fs.unit._get_Q is _get_Q_sido
         assert model.fs.unit._stream_table_dict == {
             "Inlet": model.fs.unit.inlet,
@@ -143,6 +147,24 @@ class TestSIDO:
     def test_initialization(self, model):
         initialization_tester(model)
 
+    @pytest.mark.component
+    def test_evaluate(self, model):
+        known = ComponentSet()
+        model.fs.unit.evaluate(known=known)
+
+        assert (pytest.approx(800, rel=1e-8) ==
+                value(model.fs.unit.treated.flow_mass_comp[0, "H2O"]))
+        assert (pytest.approx(200, rel=1e-8) ==
+                value(model.fs.unit.byproduct.flow_mass_comp[0, "H2O"]))
+        assert (pytest.approx(21, rel=1e-8) ==
+                value(model.fs.unit.treated.flow_mass_comp[0, "C"]))
+        assert (pytest.approx(9, rel=1e-8) ==
+                value(model.fs.unit.byproduct.flow_mass_comp[0, "C"]))
+        assert len(known) == 8
+
+        # The evaluated state is the solution, so no residuals are left
+        assert len(large_residuals_set(model, 1e-8)) == 0
+
     @pytest.mark.component
     def test_solve(self, model):
         results = solver.solve(model)
@@ -13,3 +13,4 @@
 
 from .initialization import check_solve, assert_no_degrees_of_freedom,\
         assert_degrees_of_freedom
+from .model_state import ModelState
@@ -0,0 +1,365 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains a utility to temporarily eliminate the variables of a model
+that are linked by trivial equality constraints (e.g., expanded Arcs and isothermal
+or isobaric equalities) before a solve, and to map the solution back afterwards.
+"""
+
+from pyomo.environ import Constraint, Objective, Var, value
+from pyomo.common.collections import ComponentMap, ComponentSet
+from pyomo.core.expr.visitor import identify_variables, replace_expressions
+from pyomo.core.expr.calculus.derivatives import differentiate
+from pyomo.repn import generate_standard_repn
+
+
+class VariableAggregator:
+    """
+    Aggregates the variables of a model linked by equality constraints of the
+    form ``a*x - a*y == 0`` or ``a*x == b`` (with fixed variables and parameters
+    taken as constants).
+
+    Every group of variables linked by such constraints is replaced in all other
+    active constraints and objectives by one of its members, which is given the
+    tightest of their bounds, or, if the group is linked to a constant, all its
+    members are fixed to that constant. The linking constraints are deactivated.
+    Groups whose constants or bounds are inconsistent are left unchanged, so the
+    solver can report the infeasibility.
+
+    :meth:`restore` undoes all changes to the model and :meth:`load_solution`
+    then sets the values of the eliminated variables and the multipliers of the
+    linking constraints from the solution of the reduced model.
+
+    Args:
+        blk : Pyomo model or block whose variables are aggregated
+        tolerance : Relative tolerance used to compare constants and bounds
+                    (Default: 1e-8)
+    """
+
+    def __init__(self, blk, tolerance=1e-8):
+        self._blk = blk
+        self._tolerance = tolerance
+        self._groups = []
+        self._links = []
+        self._expressions = []
+        self._changed_groups = []
+        self._applied = False
+
+    @property
+    def num_eliminated(self):
+        """The number of variables eliminated from the model"""
+        return sum(len(g.members) - (0 if g.constant is not None else 1) for g in self._groups)
+
+    @property
+    def num_links(self):
+        """The number of linking constraints deactivated"""
+        return len(self._links)
+
+    def apply(self):
+        """
+        Aggregate the variables of the model.
+
+        Returns:
+            The number of variables eliminated from the model
+        """
+        if self._applied:
+            raise RuntimeError("The variables of the model are already aggregated")
+
+        edges = self._find_links()
+        self._groups = [g for g in _build_groups(edges) if self._check_group(g)]
+        if not self._groups:
+            return 0
+
+        substitution = dict()
+        self._incidence = ComponentMap()
+        self._links = []
+        for g in self._groups:
+            self._links.extend(g.links)
+            for v in g.members:
+                self._incidence[v] = []
+                if g.constant is None and v is not g.root:
+                    substitution[id(v)] = g.root
+
+        # From here on, restore undoes every completed step, also if a later one fails
+        self._applied = True
+        try:
+            self._aggregate(substitution)
+        except:
+            self.restore()
+            self._groups = []
+            self._links = []
+            raise
+
+        return self.num_eliminated
+
+    def _aggregate(self, substitution):
+        for c in self._links:
+            c.deactivate()
+
+        # Substitute the eliminated variables in the other constraints and objectives
+        for comp in self._active_components():
+            variables = [v for v in identify_variables(comp.expr) if v in self._incidence]
+            if not variables:
+                continue
+            for v in variables:
+                self._incidence[v].append(comp)
+            if any(id(v) in substitution for v in variables):
+                expr = comp.expr
+                comp.set_value(replace_expressions(expr, substitution,
+                        descend_into_named_expressions=True, remove_named_expressions=True))
+                self._expressions.append((comp, expr))
+
+        for g in self._groups:
+            if g.constant is None:
+                g.bounds = (g.root.lb, g.root.ub)
+                self._changed_groups.append(g)
+                g.root.setlb(g.lb)
+                g.root.setub(g.ub)
+            else:
+                self._changed_groups.append(g)
+                for v in g.members:
+                    v.fix(g.constant)
+
+    def restore(self):
+        """
+        Undo all changes to the model. Calling restore more than once has no effect.
+        """
+        if not self._applied:
+            return
+        for comp, expr in reversed(self._expressions):
+            comp.set_value(expr)
+        self._expressions = []
+        for c in self._links:
+            c.activate()
+        for g in reversed(self._changed_groups):
+            if g.constant is None:
+                g.root.setlb(g.bounds[0])
+                g.root.setub(g.bounds[1])
+            else:
+                for v in g.members:
+                    v.unfix()
+        self._changed_groups = []
+        self._applied = False
+
+    def load_solution(self, dual=None, zL=None, zU=None):
+        """
+        Set the values of the eliminated variables from the solution of the
+        reduced model, which has to be restored first. If the constraint
+        multipliers (``dual``) of the solution are given, the multipliers of the
+        linking constraints are recovered from the stationarity conditions of the
+        eliminated variables. The bound multipliers (``zL`` and ``zU``) of every
+        aggregated variable are moved to the member whose bound was active.
+
+        The multipliers follow the sign convention of Ipopt's AMPL interface,
+        i.e., the gradient of the objective equals the sum of the constraint
+        multipliers times the constraint gradients plus the bound multipliers.
+
+        Args:
+            dual : Suffix (or dict-like) of constraint multipliers (Default: None)
+            zL : Suffix (or dict-like) of lower bound multipliers (Default: None)
+            zU : Suffix (or dict-like) of upper bound multipliers (Default: None)
+
+        Returns:
+            None
+        """
+        if self._applied:
+            raise RuntimeError("The model has to be restored before the solution is loaded")
+
+        for g in self._groups:
+            if g.constant is None:
+                for v in g.members:
+                    if v is not g.root:
+                        v.set_value(g.root.value, skip_validation=True)
+            for z, owner in ((zL, g.lb_owner), (zU, g.ub_owner)):
+                if z is None:
+                    continue
+                # only the root of a group is part of the reduced model
+                multiplier = z.get(g.root, 0.) if g.constant is None else 0.
+                for v in g.members:
+                    z[v] = 0.
+                if owner is not None:
+                    z[owner] = multiplier
+
+        if dual is None:
+            return
+
+        objectives = [o for o in self._blk.component_data_objects(Objective, active=True, descend_into=True)]
+        for g in self._groups:
+            for c in g.redundant:
+                dual[c] = 0.
+            # The multiplier of the link of every member to its parent balances
+            # the stationarity conditions of the member and all its descendants
+            balance = ComponentMap()
+            for v in reversed(g.order):
+                balance[v] = balance.get(v, 0.) + self._stationarity(v, objectives, dual, zL, zU)
+                if v in g.parent:
+                    parent, link, coef = g.parent[v]
+                    dual[link] = balance[v]/coef
+                    if parent is not None:
+                        balance[parent] = balance.get(parent, 0.) + balance[v]
+
+    def _stationarity(self, v, objectives, dual, zL, zU):
+        # Gradient of the Lagrangian with respect to v, without the linking constraints
+        grad = 0.
+        for comp in self._incidence[v]:
+            if comp.ctype is Objective:
+                grad += value(differentiate(comp.expr, wrt=v, mode=differentiate.Modes.reverse_numeric))
+            elif comp in dual:
+                grad -= dual[comp]*value(differentiate(comp.body, wrt=v, mode=differentiate.Modes.reverse_numeric))
+        for z in (zL, zU):
+            if z is not None:
+                grad -= z.get(v, 0.)
+        return grad
+
+    def _active_components(self):
+        yield from self._blk.component_data_objects(Constraint, active=True, descend_into=True)
+        yield from self._blk.component_data_objects(Objective, active=True, descend_into=True)
+
+    def _find_links(self):
+        edges = []
+        for c in self._blk.component_data_objects(Constraint, active=True, descend_into=True):
+            if not c.equality:
+                continue
+            repn = generate_standard_repn(c.body, compute_values=True, quadratic=False)
+            if not repn.is_linear() or len(repn.linear_vars) > 2:
+                continue
+            rhs = value(c.upper) - repn.constant
+            coefs = list(repn.linear_coefs)
+            if len(coefs) == 1 and coefs[0] != 0:
+                edges.append(_Link(c, repn.linear_vars[0], None, coefs[0], rhs/coefs[0]))
+            elif len(coefs) == 2 and coefs[0] != 0 and coefs[0] == -coefs[1] \
+                    and abs(rhs) <= self._tolerance*abs(coefs[0]):
+                edges.append(_Link(c, repn.linear_vars[0], repn.linear_vars[1], coefs[0], None))
+        return edges
+
+    def _check_group(self, g):
+        tol = self._tolerance
+        if g.constant is not None:
+            if any(abs(k - g.constant) > tol*max(1., abs(k)) for k in g.constants):
+                return False
+            for v in g.members:
+                if v.lb is not None and g.constant < v.lb - tol*max(1., abs(v.lb)):
+                    return False
+                if v.ub is not None and g.constant > v.ub + tol*max(1., abs(v.ub)):
+                    return False
+            return True
+
+        g.lb = g.ub = None
+        g.lb_owner = g.ub_owner = g.root
+        for v in g.members:
+            if v.lb is not None and (g.lb is None or v.lb > g.lb):
+                g.lb, g.lb_owner = v.lb, v
+            if v.ub is not None and (g.ub is None or v.ub < g.ub):
+                g.ub, g.ub_owner = v.ub, v
+        return g.lb is None or g.ub is None or g.lb <= g.ub + tol*max(1., abs(g.ub))
+
+
+class _Link:
+    # A linking constraint coef*(u - v) == 0, or coef*u == coef*constant if v is None
+    __slots__ = ("constraint", "u", "v", "coef", "constant")
+
+    def __init__(self, constraint, u, v, coef, constant):
+        self.constraint = constraint
+        self.u = u
+        self.v = v
+        self.coef = coef
+        self.constant = constant
+
+
+class _Group:
+    # The variables connected by linking constraints, as a spanning tree
+    # rooted in a member or, if the group is linked to a constant, in the
+    # constant (None)
+    def __init__(self):
+        self.members = []
+        self.order = []
+        self.parent = ComponentMap()
+        self.links = []
+        self.redundant = []
+        self.constants = []
+        self.constant = None
+        self.root = None
+        self.lb_owner = None
+        self.ub_owner = None
+
+
+def _build_groups(edges):
+    adjacency = ComponentMap()
+    for e in edges:
+        for v in (e.u, e.v):
+            if v is not None:
+                adjacency.setdefault(v, []).append(e)
+
+    groups = []
+    visited = ComponentSet()
+    for start in adjacency:
+        if start in visited:
+            continue
+
+        # Collect the group first, to root the tree in a constant if there is one
+        g = _Group()
+        stack = [start]
+        visited.add(start)
+        group_edges = []
+        seen = set()
+        while stack:
+            v = stack.pop()
+            g.members.append(v)
+            for e in adjacency[v]:
+                if id(e) in seen:
+                    continue
+                seen.add(id(e))
+                group_edges.append(e)
+                w = e.v if e.u is v else e.u
+                if w is not None and w not in visited:
+                    visited.add(w)
+                    stack.append(w)
+
+        g.links = [e.constraint for e in group_edges]
+        g.constants = [e.constant for e in group_edges if e.v is None]
+
+        # Breadth first spanning tree; every other link is redundant
+        reached = ComponentSet()
+        queue = []
+        used = set()
+        if g.constants:
+            g.constant = g.constants[0]
+            for e in group_edges:
+                if e.v is None and e.u not in reached:
+                    reached.add(e.u)
+                    used.add(id(e))
+                    g.parent[e.u] = (None, e.constraint, e.coef)
+                    queue.append(e.u)
+        else:
+            g.root = g.members[0]
+            reached.add(g.root)
+            queue.append(g.root)
+
+        while queue:
+            v = queue.pop(0)
+            g.order.append(v)
+            for e in adjacency[v]:
+                if e.v is None or id(e) in used:
+                    continue
+                w, coef = (e.v, -e.coef) if e.u is v else (e.u, e.coef)
+                if w in reached:
+                    continue
+                reached.add(w)
+                used.add(id(e))
+                g.parent[w] = (v, e.constraint, coef)
+                queue.append(w)
+
+        g.redundant = [e.constraint for e in group_edges if id(e) not in used]
+        groups.append(g)
+
+    return groups
@@ -0,0 +1,295 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains an on-disk cache of the state of built and initialized
+flowsheets, so that scripts (and every rank of an MPI job) only initialize a
+flowsheet once for a given set of build arguments.
+"""
+
+import hashlib
+import inspect
+import os
+import warnings
+
+import numpy as np
+from pyomo.environ import Var, Param, Suffix, Constraint, Objective, Block, value
+
+from watertap.core.util.model_state import ModelState, ModelSnapshot
+
+# Environment variable naming the default cache directory
+CACHE_DIR_VARIABLE = "WATERTAP_FLOWSHEET_CACHE"
+
+# Version of the layout of the cache files
+_CACHE_FORMAT = 1
+
+
+def cached_flowsheet(build_function, build_kwargs=None, initialize_function=None, initialize_kwargs=None,
+                     cache_dir=None, mpi_comm=None, refresh=False, cache_version=None):
+    """
+    Build a flowsheet with ``build_function`` and bring it into the state
+    ``initialize_function`` leaves it in. If that state was cached by an earlier
+    call with the same functions and arguments, it is loaded from disk instead of
+    calling ``initialize_function``.
+
+    The cached state consists of the values, fixed flags and bounds of all
+    variables, the IDAES scaling factors, the values of mutable parameters and the
+    active flags of all constraints, objectives and blocks. The cache key is
+    derived from the names and source files of both functions, their keyword
+    arguments, ``cache_version`` and the WaterTAP version. Arguments without a
+    plain value (e.g., a solver object) only contribute their type to the key.
+
+    Only the source files of the two functions are part of the key, so edits to
+    other modules (e.g., unit models or property packages in a development
+    install, where the WaterTAP version does not change) are not detected. Pass
+    a new ``cache_version`` or ``refresh=True`` after such changes.
+
+    Args:
+        build_function : Function returning a new (uninitialized) flowsheet
+        build_kwargs : Keyword arguments of ``build_function`` (Default: None)
+        initialize_function : Function initializing the flowsheet, called as
+                              ``initialize_function(m, **initialize_kwargs)``
+                              (Default: None)
+        initialize_kwargs : Keyword arguments of ``initialize_function`` (Default: None)
+        cache_dir : Directory of the cache files; if None, the directory named by
+                    the ``WATERTAP_FLOWSHEET_CACHE`` environment variable is used,
+                    and nothing is cached if it is not set (Default: None)
+        mpi_comm : MPI communicator; only rank 0 initializes the flowsheet on a cache
+                   miss, and the other ranks load the state it cached (Default: None)
+        refresh : If True, the flowsheet is initialized and cached again even if
+                  its state is in the cache (Default: False)
+        cache_version : Any plain value (e.g., a string or number) which is added
+                        to the cache key, to invalidate cached states after changes
+                        the key does not cover (Default: None)
+
+    Returns:
+        The built and initialized flowsheet
+    """
+    if build_kwargs is None:
+        build_kwargs = dict()
+    if initialize_kwargs is None:
+        initialize_kwargs = dict()
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_VARIABLE, None)
+
+    model = build_function(**build_kwargs)
+
+    if cache_dir is None:
+        if initialize_function is not None:
+            initialize_function(model, **initialize_kwargs)
+        return model
+
+    key = flowsheet_cache_key(build_function, build_kwargs, initialize_function, initialize_kwargs,
+                              cache_version=cache_version)
+    fname = os.path.join(cache_dir, f"{build_function.__name__}_{key}.npz")
+
+    rank = 0 if mpi_comm is None else mpi_comm.Get_rank()
+    if rank == 0:
+        loaded = False
+        error = None
+        if os.path.isfile(fname) and not refresh:
+            # Any failure (e.g., a truncated file) must still reach the bcast below
+            try:
+                load_flowsheet_state(model, fname)
+                loaded = True
+            except Exception as err:
+                warnings.warn(f"Could not load the cached flowsheet state {fname} ({err}), "
+                              "initializing the flowsheet again.")
+                # The state may have been loaded in part
+                try:
+                    model = build_function(**build_kwargs)
+                except Exception as build_error:
+                    error = build_error
+
+        if not loaded and error is None:
+            try:
+                if initialize_function is not None:
+                    initialize_function(model, **initialize_kwargs)
+                os.makedirs(cache_dir, exist_ok=True)
+                save_flowsheet_state(model, fname, key=key)
+            except Exception as err:
+                error = err
+
+        # The other ranks wait until the state is in the cache
+        if mpi_comm is not None and mpi_comm.Get_size() > 1:
+            mpi_comm.bcast(error is None, root=0)
+        if error is not None:
+            raise error
+
+    else:
+        if not mpi_comm.bcast(None, root=0):
+            raise RuntimeError("The flowsheet could not be initialized on rank 0.")
+        load_flowsheet_state(model, fname)
+
+    return model
+
+
+def flowsheet_cache_key(build_function, build_kwargs, initialize_function=None, initialize_kwargs=None,
+                        cache_version=None):
+    """
+    Return the cache key (a hexadecimal digest) of a flowsheet built by
+    ``build_function`` and initialized by ``initialize_function``.
+    """
+    h = hashlib.sha256()
+    h.update(f"format={_CACHE_FORMAT};watertap={_watertap_version()};"
+             f"version={_stable_repr(cache_version)};".encode())
+    for function, kwargs in ((build_function, build_kwargs), (initialize_function, initialize_kwargs)):
+        if function is None:
+            h.update(b"None;")
+            continue
+        h.update(f"{function.__module__}.{function.__qualname__}({_stable_repr(kwargs or dict())});".encode())
+        # Editing the module of a function changes the flowsheet it builds
+        h.update(_source_digest(function).encode())
+    return h.hexdigest()[:32]
+
+
+def save_flowsheet_state(model, fname, key=""):
+    """
+    Write the state of ``model`` (see :func:`cached_flowsheet`) to the ``.npz``
+    file ``fname``, by the names of its components.
+    """
+    variables = list(model.component_data_objects(Var, descend_into=True))
+    snapshot = ModelState(model, include_scaling=False).save()
+
+    data = {"key": np.array(key),
+            "var_names": np.array([v.name for v in variables]),
+            "values": snapshot.values,
+            "fixed": snapshot.fixed,
+            "lb": snapshot.lb,
+            "ub": snapshot.ub}
+
+    suffixes = _scaling_suffixes(model)
+    data["suffix_names"] = np.array([s.name for s in suffixes])
+    for k, suffix in enumerate(suffixes):
+        keys = list(suffix.keys())
+        data[f"scaling_keys_{k}"] = np.array([c.name for c in keys])
+        data[f"scaling_factors_{k}"] = np.array([suffix[c] for c in keys], dtype=np.float64)
+
+    params = _mutable_params(model)
+    data["param_names"] = np.array([p.name for p in params])
+    data["param_values"] = np.array([_param_value(p) for p in params], dtype=np.float64)
+
+    components = _activatable_components(model)
+    data["active_names"] = np.array([c.name for c in components])
+    data["active"] = np.array([c.active for c in components], dtype=bool)
+
+    # Write atomically, so that no other process reads a partial file
+    tmp_fname = f"{fname}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_fname, **data)
+    os.replace(tmp_fname, fname)
+
+
+def load_flowsheet_state(model, fname):
+    """
+    Load a state written by :func:`save_flowsheet_state` into ``model``, which must
+    have the same variables as the model the state was saved from.
+    """
+    with np.load(fname, allow_pickle=False) as data:
+        data = dict(data)
+
+    variables = list(model.component_data_objects(Var, descend_into=True))
+    if len(variables) != len(data["var_names"]) or \
+            any(v.name != name for v, name in zip(variables, data["var_names"])):
+        raise ValueError("the variables of the model differ from those of the cached state")
+
+    ModelState(model, include_scaling=False).restore(
+            ModelSnapshot(data["values"], data["fixed"], data["lb"], data["ub"], []))
+
+    # Calling find_component for every component of a large model is slow
+    components = {c.name: c for c in model.component_data_objects(descend_into=True)}
+
+    for k, name in enumerate(data["suffix_names"]):
+        suffix = _find_component(model, components, name)
+        suffix.clear_all_values()
+        for key, sf in zip(data[f"scaling_keys_{k}"], data[f"scaling_factors_{k}"]):
+            suffix[_find_component(model, components, key)] = float(sf)
+
+    for name, val in zip(data["param_names"], data["param_values"]):
+        if not np.isnan(val):
+            _find_component(model, components, name).set_value(float(val))
+
+    for name, active in zip(data["active_names"], data["active"]):
+        component = _find_component(model, components, name)
+        if component.active != active:
+            if active:
+                component.activate()
+            else:
+                component.deactivate()
+
+
+def _find_component(model, components, name):
+    name = str(name)
+    component = components.get(name, None)
+    if component is None:
+        component = model.find_component(name)
+    if component is None:
+        raise ValueError(f"the model has no component named {name}")
+    return component
+
+
+def _scaling_suffixes(model):
+    return [s for s in model.component_data_objects(Suffix, descend_into=True)
+            if s.local_name == "scaling_factor"]
+
+
+def _mutable_params(model):
+    return [p for param in model.component_objects(Param, descend_into=True) if param.mutable
+            for p in param.values()]
+
+
+def _param_value(param):
+    try:
+        return float(value(param, exception=False))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _activatable_components(model):
+    # The model itself is always active
+    return [c for c in model.component_data_objects((Constraint, Objective, Block), descend_into=True)
+            if c is not model]
+
+
+def _stable_repr(obj):
+    # Plain values are represented by their repr, other objects only by their type,
+    # as their repr often contains their (run-dependent) address
+    if isinstance(obj, (str, int, float, bool, type(None))):
+        return repr(obj)
+    if isinstance(obj, (list, tuple)):
+        return f"{type(obj).__name__}({','.join(_stable_repr(v) for v in obj)})"
+    if isinstance(obj, dict):
+        items = sorted((str(k), _stable_repr(v)) for k, v in obj.items())
+        return "{" + ",".join(f"{k}:{v}" for k, v in items) + "}"
+    return f"<{type(obj).__module__}.{type(obj).__qualname__}>"
+
+
+def _source_digest(function):
+    try:
+        with open(inspect.getsourcefile(function), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (OSError, TypeError):
+        return ""
+
+
+def _watertap_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # Python 3.7
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution("watertap").version
+        except pkg_resources.DistributionNotFound:
+            return "unknown"
+    try:
+        return version("watertap")
+    except PackageNotFoundError:
+        return "unknown"
@@ -17,12 +17,16 @@ This module contains utility functions for initialization of WaterTAP models.
 
 __author__ = "Adam Atia"
 
+from contextlib import contextmanager
+
 from pyomo.environ import check_optimal_termination, Var
 from idaes.core.util.model_statistics import degrees_of_freedom
 from idaes.core.util.scaling import get_scaling_factor, __none_left_mult
 from idaes.core.util import get_solver
 import idaes.logger as idaeslog
 
+from watertap.core.util.profiling import solver_profiler
+
 _log = idaeslog.getLogger(__name__)
 
 def check_solve(results, checkpoint=None, logger=_log, fail_flag=False):
@@ -30,7 +34,7 @@ def check_solve(results, checkpoint=None, logger=_log, fail_flag=False):
     Check that solver termination is optimal and OK in an initialization routine.
     If the check fails, proceed through initialization with only a logger warning by default,
     or set fail_flag=True to raise an error. This should also work for checking a solve outside
-    of an initialization routine.
+    of an initialization routine. The timings of a profiled solve are logged as well.
 
     Keyword Arguments:
             results : solver results
@@ -43,6 +47,13 @@ def check_solve(results, checkpoint=None, logger=_log, fail_flag=False):
         None
 
     """
+    # Report where the time of a profiled solve went (see watertap.core.util.profiling)
+    profile = getattr(getattr(results, "solver", None), "profile", None)
+    if profile is not None:
+        timings = ", ".join(f"{step} {seconds:.3g} s" for step, seconds in profile["python"].items()
+                            if seconds is not None)
+        logger.info(f"{'Solve' if checkpoint is None else checkpoint} timing: {timings}")
+
     if check_optimal_termination(results):
         if checkpoint is None:
             logger.info(f'Solve successful.')
@@ -62,6 +73,30 @@ def check_solve(results, checkpoint=None, logger=_log, fail_flag=False):
             logger.warning(msg)
 
 
+@contextmanager
+def label_initialization_solves(blk, checkpoint=None):
+    """
+    Label the profiles of the ipopt-watertap solves inside this context (see
+    ``watertap.core.util.profiling.solver_profiler``) with the name of ``blk``, so
+    that the time spent initializing each unit is aggregated on its own. Profiling
+    itself is turned on by the ``profile`` solver option or ``solver_profiler.profile``.
+
+    Keyword Arguments:
+            blk : block being initialized
+            checkpoint : Optional string argument to specify the step of initialization
+                        (e.g., checkpoint="Initialization Step 3")
+
+    Returns:
+        None
+
+    """
+    label = f"{blk.name}.initialize"
+    if checkpoint is not None:
+        label = f"{label}/{checkpoint}"
+    with solver_profiler.label_solves(label):
+        yield
+
+
 def check_dof(blk, fail_flag=False, logger=_log, expected_dof=0):
     """
     Check that degrees of freedom are 0, or the expected amount ``expected_dof``.
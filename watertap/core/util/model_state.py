@@ -0,0 +1,129 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains a utility to save and restore the state of the variables
+of a WaterTAP model, e.g., to undo a failed solve.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from pyomo.environ import Var, Suffix
+
+ModelSnapshot = namedtuple("ModelSnapshot", ["values", "fixed", "lb", "ub", "scaling_factors"])
+
+
+class ModelState:
+    """
+    Saves and restores the values, fixed flags and bounds of every Var of a model
+    (and the values in its IDAES ``scaling_factor`` suffixes) as NumPy arrays.
+
+    The variables and suffixes are collected once, when the ModelState is created,
+    so components added to the model afterwards are not part of any snapshot.
+
+    Args:
+        blk : Pyomo model or block whose state is saved
+        include_scaling : Whether to save and restore the ``scaling_factor`` suffixes
+                          (Default: True)
+    """
+
+    def __init__(self, blk, include_scaling=True):
+        self._vars = list(blk.component_data_objects(Var, descend_into=True))
+
+        if include_scaling:
+            self._suffixes = [s for s in blk.component_data_objects(Suffix, descend_into=True)
+                              if s.local_name == "scaling_factor"]
+        else:
+            self._suffixes = []
+
+        self._last_snapshot = None
+
+    def __len__(self):
+        return len(self._vars)
+
+    def save(self):
+        """
+        Capture the current state of the model. The snapshot is returned and
+        also kept as the default for :meth:`restore`.
+
+        Returns:
+            ModelSnapshot
+        """
+        num_vars = len(self._vars)
+
+        # None (e.g. an unset value or a missing bound) is stored as nan
+        values = np.fromiter((_to_float(v.value) for v in self._vars), dtype=np.float64, count=num_vars)
+        fixed = np.fromiter((v.fixed for v in self._vars), dtype=bool, count=num_vars)
+        lb = np.fromiter((_to_float(v.lb) for v in self._vars), dtype=np.float64, count=num_vars)
+        ub = np.fromiter((_to_float(v.ub) for v in self._vars), dtype=np.float64, count=num_vars)
+
+        # The keys of each suffix are shared by snapshots as long as they do not change
+        scaling_factors = []
+        for suffix in self._suffixes:
+            keys = list(suffix.keys())
+            scaling_factors.append((keys, np.fromiter((suffix[k] for k in keys), dtype=np.float64,
+                                                      count=len(keys))))
+
+        self._last_snapshot = ModelSnapshot(values, fixed, lb, ub, scaling_factors)
+        return self._last_snapshot
+
+    def restore(self, snapshot=None):
+        """
+        Load a snapshot back into the model.
+
+        Args:
+            snapshot : ModelSnapshot returned by :meth:`save`; if None the most
+                       recently saved snapshot is restored
+
+        Returns:
+            None
+        """
+        if snapshot is None:
+            snapshot = self._last_snapshot
+        if snapshot is None:
+            raise RuntimeError("No snapshot of the model state has been saved yet.")
+
+        if len(snapshot.values) != len(self._vars):
+            raise ValueError("The snapshot was not taken from the model of this ModelState.")
+
+        # Only fix/unfix and change bounds where they differ from the snapshot
+        for var, val, fix, lb, ub in zip(self._vars, snapshot.values, snapshot.fixed,
+                                         snapshot.lb, snapshot.ub):
+            if var.fixed != fix:
+                if fix:
+                    var.fix()
+                else:
+                    var.unfix()
+            lb = _from_float(lb)
+            if var.lb != lb:
+                var.setlb(lb)
+            ub = _from_float(ub)
+            if var.ub != ub:
+                var.setub(ub)
+            var.set_value(_from_float(val), skip_validation=True)
+
+        for suffix, (keys, factors) in zip(self._suffixes, snapshot.scaling_factors):
+            # Drop scaling factors set after the snapshot was taken
+            saved = set(id(k) for k in keys)
+            for k in [k for k in suffix.keys() if id(k) not in saved]:
+                suffix.clear_value(k)
+            for k, sf in zip(keys, factors):
+                suffix[k] = float(sf)
+
+
+def _to_float(value):
+    return np.nan if value is None else value
+
+
+def _from_float(value):
+    return None if np.isnan(value) else float(value)
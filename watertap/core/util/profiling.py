@@ -0,0 +1,163 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains a process-wide collector of the timing profiles recorded by
+the ipopt-watertap solver, which can be aggregated and written as JSON.
+"""
+
+import json
+import re
+from contextlib import contextmanager
+
+# A line of Ipopt's print_timing_statistics output, e.g.,
+# " Function Evaluations................:      0.001 (sys:      0.000 wall:      0.001)"
+_IPOPT_TIMING_REGEX = re.compile(
+        r"^\s*(\S[^\n]*?)\.{2,}:\s*[-+\d.eE]+\s*\(sys:\s*[-+\d.eE]+\s+wall:\s*([-+\d.eE]+)\)",
+        re.MULTILINE)
+
+
+def parse_ipopt_timing_statistics(log):
+    """
+    Return the wall times (in seconds) of Ipopt's ``print_timing_statistics``
+    output in ``log`` as a dictionary keyed by the names Ipopt uses, e.g.,
+    ``'OverallAlgorithm'`` or ``'Function Evaluations'``.
+    """
+    return {name.strip(): float(wall) for name, wall in _IPOPT_TIMING_REGEX.findall(log or "")}
+
+
+class SolverProfiler:
+    """
+    Collects the timing profile of every profiled solve, i.e., a dictionary of
+    timing groups (``'python'`` and ``'ipopt'``), each mapping the name of a step to
+    its time in seconds. The profiles are aggregated per label (see :meth:`profile`)
+    and the first ``max_records`` profiles are also kept as they are.
+
+    Args:
+        max_records : Number of individual profiles kept (Default: 10000)
+    """
+
+    def __init__(self, max_records=10000):
+        self.max_records = max_records
+        self.enabled = False
+        self._labels = []
+        self.clear()
+
+    @property
+    def label(self):
+        """The label given to the solves recorded now, or None"""
+        return "/".join(self._labels) if self._labels else None
+
+    @contextmanager
+    def profile(self, label):
+        """
+        Context manager which profiles every ipopt-watertap solve inside it (as if
+        its ``profile`` option were set) and labels their profiles with ``label``.
+        Nested labels are joined by ``/``.
+        """
+        enabled = self.enabled
+        self.enabled = True
+        try:
+            with self.label_solves(label):
+                yield self
+        finally:
+            self.enabled = enabled
+
+    @contextmanager
+    def label_solves(self, label):
+        """
+        Context manager which labels the profiles of the solves inside it with
+        ``label``, like :meth:`profile`, but without turning profiling on.
+        """
+        self._labels.append(str(label))
+        try:
+            yield self
+        finally:
+            self._labels.pop()
+
+    def record(self, profile):
+        """
+        Add the profile of a solve, e.g., ``results.solver.profile``.
+        """
+        label = self.label
+        if len(self.records) < self.max_records:
+            self.records.append({"label": label, **profile})
+
+        totals = self._totals.setdefault(label, {"solves": 0, "timings": {}})
+        totals["solves"] += 1
+        for group, timings in profile.items():
+            if not isinstance(timings, dict):
+                continue
+            for name, seconds in timings.items():
+                if seconds is None:
+                    continue
+                entry = totals["timings"].setdefault(f"{group}.{name}", {"count": 0, "total": 0., "max": 0.})
+                entry["count"] += 1
+                entry["total"] += seconds
+                entry["max"] = max(entry["max"], seconds)
+
+    def merge(self, summary):
+        """
+        Add a summary of another SolverProfiler (e.g., of a worker process) to
+        this one.
+        """
+        for label, totals in summary.items():
+            target = self._totals.setdefault(label, {"solves": 0, "timings": {}})
+            target["solves"] += totals["solves"]
+            for name, entry in totals["timings"].items():
+                t = target["timings"].setdefault(name, {"count": 0, "total": 0., "max": 0.})
+                t["count"] += entry["count"]
+                t["total"] += entry["total"]
+                t["max"] = max(t["max"], entry["max"])
+
+    def summary(self):
+        """
+        Return the number of solves and the count, total, mean and maximum of every
+        timing, per label (None for the solves recorded without one).
+        """
+        summary = dict()
+        for label, totals in self._totals.items():
+            timings = dict()
+            for name, entry in sorted(totals["timings"].items()):
+                timings[name] = {**entry, "mean": entry["total"]/entry["count"]}
+            summary[label] = {"solves": totals["solves"], "timings": timings}
+        return summary
+
+    def write_json(self, fname, include_records=False, summary=None):
+        """
+        Write the summary (or the given one, e.g., merged over MPI ranks with
+        :func:`merge_summaries`) and optionally the individual profiles to ``fname``.
+        """
+        data = {"summary": self.summary() if summary is None else summary}
+        if include_records:
+            data["records"] = self.records
+        with open(fname, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def clear(self):
+        """Remove all recorded profiles."""
+        self.records = []
+        self._totals = dict()
+
+
+def merge_summaries(summaries):
+    """
+    Combine the summaries of several SolverProfilers, e.g., of every MPI rank.
+    """
+    profiler = SolverProfiler(max_records=0)
+    for summary in summaries:
+        profiler.merge(summary)
+    return profiler.summary()
+
+
+# The process-wide collector used by the ipopt-watertap solver
+solver_profiler = SolverProfiler()
@@ -0,0 +1,151 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import pytest
+
+from pyomo.environ import (ConcreteModel, Var, Param, Constraint, Objective,
+        Suffix, value)
+from pyomo.core.expr.calculus.derivatives import differentiate
+
+from watertap.core.util import aggregation
+from watertap.core.util.aggregation import VariableAggregator
+
+
+class TestVariableAggregator:
+    @pytest.fixture
+    def m(self):
+        m = ConcreteModel()
+        m.x = Var([1, 2, 3, 4, 5], bounds=(0, 10), initialize=1.0)
+        m.x[3].setub(4)
+        m.p = Param(initialize=2, mutable=True)
+
+        m.l1 = Constraint(expr=m.x[1] == m.x[2])
+        m.l2 = Constraint(expr=2*m.x[2] - 2*m.x[3] == 0)
+        m.l3 = Constraint(expr=m.x[1] == m.x[3])
+        m.k = Constraint(expr=m.x[4] == m.p)
+        m.c = Constraint(expr=m.x[1]**2 + m.x[4] + m.x[5] >= 3)
+        m.o = Objective(expr=(m.x[2] - 5)**2 + m.x[5]**2 + m.x[4])
+        return m
+
+    @pytest.mark.unit
+    def test_apply_restore(self, m):
+        expressions = [str(c.expr) for c in (m.c, m.o)]
+
+        aggregator = VariableAggregator(m)
+        assert aggregator.apply() == 3
+        assert aggregator.num_links == 4
+
+        for c in (m.l1, m.l2, m.l3, m.k):
+            assert not c.active
+        assert m.x[4].fixed
+        assert value(m.x[4]) == 2
+        # x[2] and x[3] are replaced by x[1], which has the tightest bounds
+        assert str(m.o.expr) == str((m.x[1] - 5)**2 + m.x[5]**2 + m.x[4])
+        assert m.x[1].bounds == (0, 4)
+
+        with pytest.raises(RuntimeError, match="already aggregated"):
+            aggregator.apply()
+        with pytest.raises(RuntimeError, match="has to be restored"):
+            aggregator.load_solution()
+
+        aggregator.restore()
+        aggregator.restore()
+
+        for c in (m.l1, m.l2, m.l3, m.k):
+            assert c.active
+        assert not m.x[4].fixed
+        assert [str(c.expr) for c in (m.c, m.o)] == expressions
+        assert m.x[1].bounds == (0, 10)
+
+    @pytest.mark.unit
+    def test_apply_failure(self, m, monkeypatch):
+        expressions = [str(c.expr) for c in (m.c, m.o)]
+
+        def _failing_replace_expressions(*args, **kwargs):
+            raise RuntimeError("substitution failed")
+        monkeypatch.setattr(aggregation, 'replace_expressions', _failing_replace_expressions)
+
+        aggregator = VariableAggregator(m)
+        with pytest.raises(RuntimeError, match="substitution failed"):
+            aggregator.apply()
+
+        # The links deactivated before the failure are active again
+        for c in (m.l1, m.l2, m.l3, m.k):
+            assert c.active
+        assert not m.x[4].fixed
+        assert [str(c.expr) for c in (m.c, m.o)] == expressions
+        assert m.x[1].bounds == (0, 10)
+        assert aggregator.num_links == 0
+
+        monkeypatch.undo()
+        assert aggregator.apply() == 3
+        assert aggregator.num_links == 4
+        aggregator.restore()
+        for c in (m.l1, m.l2, m.l3, m.k):
+            assert c.active
+
+    @pytest.mark.unit
+    def test_load_solution(self, m):
+        m.dual = Suffix(direction=Suffix.IMPORT)
+        m.zL = Suffix(direction=Suffix.IMPORT)
+        m.zU = Suffix(direction=Suffix.IMPORT)
+
+        aggregator = VariableAggregator(m)
+        aggregator.apply()
+
+        # Solution of the reduced problem: min (x1 - 5)^2 + x5^2 + 2 with
+        # x1 <= 4, which has x1 at its upper bound and an inactive c
+        m.x[1].value = 4
+        m.x[5].value = 0
+        m.dual[m.c] = 0
+        m.zL[m.x[1]] = 0
+        m.zU[m.x[1]] = -2
+        m.zL[m.x[5]] = 2e-9
+        m.zU[m.x[5]] = 0
+
+        aggregator.restore()
+        aggregator.load_solution(dual=m.dual, zL=m.zL, zU=m.zU)
+
+        for i in (1, 2, 3):
+            assert value(m.x[i]) == pytest.approx(4)
+        # The upper bound multiplier belongs to the variable with the active bound
+        assert m.zU[m.x[3]] == -2
+        assert m.zU[m.x[1]] == 0
+
+        # The stationarity conditions of the full problem hold
+        for v in m.x.values():
+            if v is m.x[5]:
+                continue
+            residual = value(differentiate(m.o.expr, wrt=v))
+            for c in m.component_data_objects(Constraint, active=True):
+                residual -= m.dual[c]*value(differentiate(c.body, wrt=v))
+            residual -= m.zL[v] + m.zU[v]
+            assert residual == pytest.approx(0, abs=1e-12)
+        assert m.dual[m.k] == pytest.approx(1)
+
+    @pytest.mark.unit
+    def test_inconsistent_groups(self):
+        m = ConcreteModel()
+        m.x = Var(range(4), bounds=(0, 1))
+        m.x[3].fix(1)
+        m.k1 = Constraint(expr=m.x[0] == 0.5)
+        m.k2 = Constraint(expr=m.x[0] == m.x[3])
+        m.k3 = Constraint(expr=m.x[1] == 2)
+        m.l = Constraint(expr=m.x[2] == m.x[3] + 1)
+
+        aggregator = VariableAggregator(m)
+        assert aggregator.apply() == 0
+        for c in (m.k1, m.k2, m.k3, m.l):
+            assert c.active
+        for i in range(3):
+            assert not m.x[i].fixed
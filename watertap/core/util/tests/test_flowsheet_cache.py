@@ -0,0 +1,158 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import os
+import pytest
+import pyomo.environ as pyo
+
+from watertap.core.util.flowsheet_cache import (cached_flowsheet, flowsheet_cache_key,
+        CACHE_DIR_VARIABLE)
+
+
+def _build(num_units=2):
+    m = pyo.ConcreteModel()
+    m.fs = pyo.Block()
+    m.fs.units = pyo.RangeSet(num_units)
+    m.fs.flow = pyo.Var(m.fs.units, initialize=1, bounds=(0, None))
+    m.fs.recovery = pyo.Param(mutable=True, initialize=0.5)
+    m.fs.eq_flow = pyo.Constraint(m.fs.units, rule=lambda b, i: b.flow[i] == b.recovery*i)
+    m.fs.scaling_factor = pyo.Suffix(direction=pyo.Suffix.EXPORT)
+    return m
+
+
+# Models initialized by _initialize
+_initialized = []
+
+
+def _initialize(m, recovery=0.8):
+    _initialized.append(m)
+    m.fs.recovery = recovery
+    for i in m.fs.units:
+        m.fs.flow[i].value = recovery*i
+    m.fs.flow[1].fix()
+    m.fs.flow[2].setub(10)
+    m.fs.eq_flow[1].deactivate()
+    m.fs.scaling_factor[m.fs.flow[2]] = 1e-2
+
+
+def _check_initialized(m):
+    assert pyo.value(m.fs.recovery) == 0.8
+    assert pyo.value(m.fs.flow[1]) == pytest.approx(0.8)
+    assert pyo.value(m.fs.flow[2]) == pytest.approx(1.6)
+    assert m.fs.flow[1].fixed
+    assert not m.fs.flow[2].fixed
+    assert m.fs.flow[2].bounds == (0, 10)
+    assert not m.fs.eq_flow[1].active
+    assert m.fs.eq_flow[2].active
+    assert list(m.fs.scaling_factor.items()) == [(m.fs.flow[2], 1e-2)]
+
+
+class _RecordingComm:
+    # Stand-in for rank 0 of a two-rank MPI communicator
+    def __init__(self):
+        self.broadcasts = []
+
+    def Get_rank(self):
+        return 0
+
+    def Get_size(self):
+        return 2
+
+    def bcast(self, obj, root=0):
+        self.broadcasts.append(obj)
+        return obj
+
+
+@pytest.mark.unit
+def test_flowsheet_cache_key():
+    key = flowsheet_cache_key(_build, {'num_units': 2, 'names': ['a', 'b']}, _initialize, {'recovery': 0.8})
+    assert key == flowsheet_cache_key(_build, {'names': ['a', 'b'], 'num_units': 2}, _initialize, {'recovery': 0.8})
+    assert key != flowsheet_cache_key(_build, {'num_units': 3, 'names': ['a', 'b']}, _initialize, {'recovery': 0.8})
+    assert key != flowsheet_cache_key(_build, {'num_units': 2}, None, None)
+
+    # Only the type of other objects is part of the key
+    assert flowsheet_cache_key(_build, {'solver': object()}) == flowsheet_cache_key(_build, {'solver': object()})
+
+    assert key != flowsheet_cache_key(_build, {'num_units': 2, 'names': ['a', 'b']}, _initialize, {'recovery': 0.8},
+                                      cache_version=2)
+
+
+@pytest.mark.component
+def test_cached_flowsheet(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    calls = _initialized
+    calls.clear()
+    kwargs = dict(build_kwargs={'num_units': 2}, initialize_function=_initialize, cache_dir=cache_dir)
+
+    m = cached_flowsheet(_build, **kwargs)
+    _check_initialized(m)
+    assert calls == [m]
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A cache hit restores the state without initializing
+    m = cached_flowsheet(_build, **kwargs)
+    _check_initialized(m)
+    assert len(calls) == 1
+
+    # Different arguments are cached separately
+    m = cached_flowsheet(_build, **{**kwargs, 'build_kwargs': {'num_units': 3}})
+    assert len(calls) == 2
+    assert len(os.listdir(cache_dir)) == 2
+
+    m = cached_flowsheet(_build, **{**kwargs, 'refresh': True})
+    _check_initialized(m)
+    assert len(calls) == 3
+
+    # A cached state that does not fit the model is replaced
+    fname = os.path.join(cache_dir, f"_build_{flowsheet_cache_key(_build, {'num_units': 2}, _initialize)}.npz")
+    with open(fname, 'wb') as f:
+        f.write(b'not a cache file')
+    with pytest.warns(UserWarning, match="Could not load the cached flowsheet state"):
+        m = cached_flowsheet(_build, **kwargs)
+    assert len(calls) == 4
+
+    # So is a truncated file, which is not even a valid zip file
+    with open(fname, 'rb') as f:
+        data = f.read()
+    with open(fname, 'wb') as f:
+        f.write(data[:len(data)//2])
+    comm = _RecordingComm()
+    with pytest.warns(UserWarning, match="Could not load the cached flowsheet state"):
+        m = cached_flowsheet(_build, **kwargs, mpi_comm=comm)
+    _check_initialized(m)
+    assert len(calls) == 5
+    # The other ranks are told that the state is in the cache
+    assert comm.broadcasts == [True]
+
+    # A new cache_version is cached separately
+    m = cached_flowsheet(_build, **kwargs, cache_version='2')
+    assert len(calls) == 6
+    m = cached_flowsheet(_build, **kwargs, cache_version='2')
+    assert len(calls) == 6
+
+
+@pytest.mark.unit
+def test_cached_flowsheet_disabled(tmp_path, monkeypatch):
+    calls = _initialized
+    calls.clear()
+    monkeypatch.delenv(CACHE_DIR_VARIABLE, raising=False)
+    m = cached_flowsheet(_build, initialize_function=_initialize)
+    _check_initialized(m)
+    m = cached_flowsheet(_build, initialize_function=_initialize)
+    assert len(calls) == 2
+
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmp_path))
+    cached_flowsheet(_build, initialize_function=_initialize)
+    cached_flowsheet(_build, initialize_function=_initialize)
+    assert len(calls) == 3
+    assert len(os.listdir(tmp_path)) == 1
@@ -14,12 +14,15 @@
 import pytest
 
 from pyomo.environ import ConcreteModel, Var, Constraint, Block, SolverFactory
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
 
 from idaes.core.util import get_solver
+from watertap.core.util.profiling import solver_profiler
 from watertap.core.util.initialization import (check_dof,
                                                assert_degrees_of_freedom,
                                                assert_no_degrees_of_freedom,
                                                check_solve,
+                                               label_initialization_solves,
                                                generate_initialization_perturbation,
                                                print_initialization_perturbation,
                                                assert_no_initialization_perturbation)
@@ -127,6 +130,32 @@ class TestCheckSolve:
 
         m.acon.activate()
 
+    @pytest.mark.unit
+    def test_profile(self, caplog):
+        results = SolverResults()
+        results.solver.status = SolverStatus.ok
+        results.solver.termination_condition = TerminationCondition.optimal
+        results.solver.profile = {'python': {'nl_write': 0.25, 'total': 1.5, 'sol_read': None}, 'ipopt': {}}
+
+        with caplog.at_level(idaeslog.INFO):
+            check_solve(results, checkpoint='test', logger=_log)
+        assert "test timing: nl_write 0.25 s, total 1.5 s" in caplog.text
+
+
+class TestLabelInitializationSolves:
+    @pytest.mark.unit
+    def test_label(self):
+        m = ConcreteModel()
+        m.fs = Block()
+        assert solver_profiler.label is None
+        with label_initialization_solves(m.fs):
+            assert solver_profiler.label == 'fs.initialize'
+            assert not solver_profiler.enabled
+        with solver_profiler.profile('flowsheet'):
+            with label_initialization_solves(m.fs, 'Initialization Step 3'):
+                assert solver_profiler.label == 'flowsheet/fs.initialize/Initialization Step 3'
+        assert solver_profiler.label is None
+
 
 class TestPerturbationHelper:
     @pytest.fixture(scope="class")
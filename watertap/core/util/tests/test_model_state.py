@@ -0,0 +1,90 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import pytest
+
+from pyomo.environ import ConcreteModel, Var, Block, Suffix, value
+
+from watertap.core.util.model_state import ModelState
+
+
+class TestModelState:
+    @pytest.fixture
+    def m(self):
+        m = ConcreteModel()
+        m.x = Var(initialize=1.0, bounds=(0, 10))
+        m.b = Block()
+        m.b.y = Var(['a', 'b'], initialize=2.0)
+        m.b.y['b'].fix(3.0)
+        m.b.z = Var()
+        m.b.scaling_factor = Suffix(direction=Suffix.EXPORT)
+        m.b.scaling_factor[m.b.y['a']] = 1e-2
+        return m
+
+    @pytest.mark.unit
+    def test_save_restore(self, m):
+        state = ModelState(m)
+        assert len(state) == 4
+
+        snapshot = state.save()
+
+        # Make a mess of the model
+        m.x.value = 50.0
+        m.x.setlb(None)
+        m.x.setub(100)
+        m.b.y['a'].fix(7.0)
+        m.b.y['b'].unfix()
+        m.b.y['b'].value = -1.0
+        m.b.z.value = 4.0
+        m.b.scaling_factor[m.b.y['a']] = 1e3
+        m.b.scaling_factor[m.b.z] = 5.0
+
+        state.restore(snapshot)
+
+        assert value(m.x) == pytest.approx(1.0)
+        assert m.x.lb == 0
+        assert m.x.ub == 10
+        assert not m.b.y['a'].fixed
+        assert value(m.b.y['a']) == pytest.approx(2.0)
+        assert m.b.y['b'].fixed
+        assert value(m.b.y['b']) == pytest.approx(3.0)
+        assert m.b.z.value is None
+        assert m.b.scaling_factor[m.b.y['a']] == pytest.approx(1e-2)
+        assert m.b.z not in m.b.scaling_factor
+
+    @pytest.mark.unit
+    def test_restore_last_saved(self, m):
+        state = ModelState(m, include_scaling=False)
+
+        with pytest.raises(RuntimeError, match="No snapshot"):
+            state.restore()
+
+        state.save()
+        m.x.value = 5.0
+        state.save()
+        m.x.value = 9.0
+        m.b.scaling_factor[m.b.y['a']] = 1e3
+
+        state.restore()
+        assert value(m.x) == pytest.approx(5.0)
+        # Scaling factors are left alone
+        assert m.b.scaling_factor[m.b.y['a']] == pytest.approx(1e3)
+
+    @pytest.mark.unit
+    def test_restore_other_model(self, m):
+        other = ConcreteModel()
+        other.x = Var()
+
+        snapshot = ModelState(other).save()
+        with pytest.raises(ValueError, match="not taken from the model"):
+            ModelState(m).restore(snapshot)
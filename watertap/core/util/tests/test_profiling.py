@@ -0,0 +1,109 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import json
+import pytest
+
+from watertap.core.util.profiling import (SolverProfiler, merge_summaries,
+        parse_ipopt_timing_statistics)
+
+_IPOPT_LOG = """
+EXIT: Optimal Solution Found.
+
+Timing Statistics:
+
+OverallAlgorithm....................:      0.012 (sys:      0.001 wall:      0.013)
+ PrintProblemStatistics.............:      0.000 (sys:      0.000 wall:      0.000)
+ InitializeIterates.................:      0.001 (sys:      0.000 wall:      0.001)
+ LinearSystemFactorization..........:      0.004 (sys:      0.000 wall:      0.005)
+Function Evaluations................:      0.002 (sys:      0.000 wall:      0.002)
+ Objective function.................:      0.000 (sys:      0.000 wall:      0.000)
+ Equality constraint Jacobian.......:      0.001 (sys:      0.000 wall:      0.001)
+"""
+
+
+@pytest.mark.unit
+def test_parse_ipopt_timing_statistics():
+    timings = parse_ipopt_timing_statistics(_IPOPT_LOG)
+    assert timings['OverallAlgorithm'] == pytest.approx(0.013)
+    assert timings['LinearSystemFactorization'] == pytest.approx(0.005)
+    assert timings['Function Evaluations'] == pytest.approx(0.002)
+    assert timings['Equality constraint Jacobian'] == pytest.approx(0.001)
+    assert len(timings) == 7
+
+    assert parse_ipopt_timing_statistics(None) == {}
+    assert parse_ipopt_timing_statistics("EXIT: Optimal Solution Found.") == {}
+
+
+class TestSolverProfiler:
+    @pytest.mark.unit
+    def test_record_summary(self, tmp_path):
+        profiler = SolverProfiler(max_records=2)
+        assert not profiler.enabled
+
+        profiler.record({'python': {'nl_write': 1.0}, 'ipopt': {}})
+        with profiler.profile('initialize'):
+            assert profiler.enabled
+            with profiler.profile('RO'):
+                assert profiler.label == 'initialize/RO'
+                profiler.record({'python': {'nl_write': 2.0, 'total': 3.0}, 'ipopt': {'OverallAlgorithm': 0.5}})
+                profiler.record({'python': {'nl_write': 4.0, 'total': None}})
+        assert not profiler.enabled
+        assert profiler.label is None
+
+        assert len(profiler.records) == 2
+        assert profiler.records[1]['label'] == 'initialize/RO'
+
+        summary = profiler.summary()
+        assert summary[None]['solves'] == 1
+        ro = summary['initialize/RO']
+        assert ro['solves'] == 2
+        assert ro['timings']['python.nl_write'] == {'count': 2, 'total': 6.0, 'max': 4.0, 'mean': 3.0}
+        assert ro['timings']['python.total']['count'] == 1
+        assert ro['timings']['ipopt.OverallAlgorithm']['total'] == 0.5
+
+        merged = merge_summaries([summary, summary])
+        assert merged[None]['solves'] == 2
+        assert merged['initialize/RO']['solves'] == 4
+        assert merged['initialize/RO']['timings']['python.nl_write']['mean'] == 3.0
+        assert merged['initialize/RO']['timings']['python.nl_write']['max'] == 4.0
+
+        fname = str(tmp_path / 'profile.json')
+        profiler.write_json(fname, include_records=True)
+        with open(fname) as f:
+            data = json.load(f)
+        assert data['summary'] == json.loads(json.dumps(summary))
+        assert len(data['records']) == 2
+
+        # A merged summary of another profiler, e.g., of a worker process, keeps its labels
+        profiler.merge(summary)
+        assert set(profiler.summary()) == {None, 'initialize/RO'}
+        assert profiler.summary()[None]['solves'] == 2
+
+        profiler.clear()
+        assert profiler.summary() == {}
+        assert profiler.records == []
+
+    @pytest.mark.unit
+    def test_label_solves(self):
+        profiler = SolverProfiler()
+        with profiler.label_solves('fs.RO.initialize'):
+            # Labelling solves does not turn profiling on
+            assert not profiler.enabled
+            with profiler.profile('step'):
+                assert profiler.enabled
+                assert profiler.label == 'fs.RO.initialize/step'
+                profiler.record({'python': {'total': 1.0}})
+            assert not profiler.enabled
+        assert profiler.label is None
+        assert profiler.summary()['fs.RO.initialize/step']['solves'] == 1
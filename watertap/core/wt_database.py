@@ -14,10 +14,32 @@
 This module contains the base class for interacting with WaterTAP data files
 with zero-order model parameter data.
 """
+import hashlib
+import json
+import logging
 import os
+import time
 import yaml
+from collections.abc import Mapping
 from copy import deepcopy
 
+_log = logging.getLogger(__name__)
+
+# Use the C implementation of the YAML loader if PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CLoader", yaml.Loader)
+
+# Environment variable naming the directory of the compiled database cache
+CACHE_DIR_VARIABLE = "WATERTAP_DATABASE_CACHE"
+
+# Version of the layout of the compiled cache files
+_CACHE_FORMAT = 2
+
+# Files modified less than this many nanoseconds ago are hashed on every check
+_RECENT_NS = 2*10**9
+
+# Compiled contents of the database folders read by this process, by path
+_compiled_files = {}
+
 
 class Database:
     """
@@ -26,15 +48,33 @@ class Database:
     Used to instantiate an instance of a database for loading parameters
     associated with zero-order models in WaterTap.
 
+    Optionally, the parsed contents of the yaml files are kept (as JSON) in a
+    compiled cache file, one per database folder, so that they are only parsed
+    again when a file changes (by modification time, size and content hash).
+    The compiled files are also shared between all Database objects of a
+    process. A cache directory that is not owned by the current user is not
+    used.
+
     Args:
         dbpath - (optional) path to database folder containing yaml files
+        cache_dir - (optional) directory of the compiled cache files. If None,
+                    the directory named by the WATERTAP_DATABASE_CACHE
+                    environment variable is used, if it is set. If None and
+                    the variable is not set, or if False, no compiled cache
+                    is used and the yaml files are parsed as they are needed.
 
     Returns:
         an instance of a Database object linked to the provided database
     """
 
-    def __init__(self, dbpath=None):
+    def __init__(self, dbpath=None, cache_dir=None):
         self._cached_files = {}
+        self._compiled = None
+        self._parameter_views = {}
+
+        if cache_dir is None:
+            cache_dir = os.environ.get(CACHE_DIR_VARIABLE, None)
+        self._cache_dir = cache_dir if cache_dir else None
 
         if dbpath is None:
             self._dbpath = os.path.join(
@@ -66,23 +106,7 @@ class Database:
         Raises:
             KeyError if database has not defined water sources
         """
-        if "water_sources" in self._cached_files:
-            # If data is already in cached files use this
-            source_data = self._cached_files["water_sources"]
-        else:
-            # Else load data from required file
-            try:
-                with open(os.path.join(self._dbpath, "water_sources.yaml"),
-                          "r") as f:
-                    lines = f.read()
-                    f.close()
-            except OSError:
-                raise KeyError("Could not find water_sources.yaml in database.")
-
-            source_data = yaml.load(lines, yaml.Loader)
-
-            # Store data in cache and return
-            self._cached_files["water_sources"] = source_data
+        source_data = self._get_water_sources_data()
 
         # Check that water source is defined
         if water_source is None:
@@ -95,6 +119,21 @@ class Database:
 
         return source_data[water_source]
 
+    def get_water_sources(self):
+        """
+        Method to retrieve the names of all water sources defined in the
+        database.
+
+        Returns:
+            list of names of water sources (excluding the default entry)
+
+        Raises:
+            KeyError if database has not defined water sources
+        """
+        source_data = self._get_water_sources_data()
+
+        return [k for k in source_data.keys() if k != "default"]
+
     def get_solute_set(self, water_source=None):
         """
         Method to retrieve solute set for a given water source.
@@ -120,6 +159,12 @@ class Database:
         """
         Method to retrieve parameters for a given technology by subtype.
 
+        The parameters are returned as a read-only ParameterView, which
+        overlays the parameters of the subtype(s) on the default parameters
+        without copying them. Views are memoized, so repeated calls with the
+        same arguments return the same object. Use the to_dict method of the
+        view to get a mutable copy.
+
         Args:
             technology - unit operation technology to look up and retrieve
                          parameters for.
@@ -128,7 +173,7 @@ class Database:
                       provided, the default parameters are used instead.
 
         Returns:
-            dict of parameters for technology and subtype
+            ParameterView of parameters for technology and subtype
 
         Raises:
             KeyError if technology or subtype could not be found in database
@@ -136,44 +181,67 @@ class Database:
         """
         params = self._get_technology(technology)
 
-        # Get default parameter set
-        sparams = deepcopy(params["default"])
-
         if subtype is None:
             # Return default values
-            pass
+            subtypes = ()
         elif isinstance(subtype, str):
-            try:
-                sparams.update(params[subtype])
-            except KeyError:
-                raise KeyError(
-                    f"Received unrecognised subtype {subtype} for technology "
-                    f"{technology}.")
+            subtypes = (subtype,)
         else:
             # Assume subtype is list-like and raise an exception if not
             try:
-                for s in subtype:
-                    # Iterate throguh provided subtypes and update parameters
-                    # Note that this will overwrite previous parameters if
-                    # there is overlap, so we might need to be careful in use.
-                    try:
-                        sparams.update(deepcopy(params[s]))
-                    except KeyError:
-                        raise KeyError(
-                            f"Received unrecognised subtype {s} for "
-                            f"technology {technology}.")
+                subtypes = tuple(subtype)
             except TypeError:
                 raise TypeError(
                     f"Unexpected type for subtype {subtype}: must be string "
                     f"or list like.")
 
-        return sparams
+        key = (technology, subtypes)
+        try:
+            return self._parameter_views[key]
+        except KeyError:
+            pass
+
+        # Note that later subtypes overwrite the parameters of previous ones
+        # if there is overlap, so we might need to be careful in use.
+        layers = []
+        for s in subtypes:
+            try:
+                layers.append(params[s])
+            except (KeyError, TypeError):
+                raise KeyError(
+                    f"Received unrecognised subtype {s} for technology "
+                    f"{technology}.")
+        layers.append(params["default"])
+
+        view = ParameterView(*reversed(layers[:-1]), layers[-1])
+        self._parameter_views[key] = view
+        return view
+
+    def preload(self):
+        """
+        Method to load all yaml files of the database at once (from the
+        compiled cache, if it is used and up to date).
+
+        Returns:
+            None
+        """
+        names = list(self._get_compiled_files())
+        if self._cache_dir is None:
+            names = [e.name[:-len(".yaml")] for e in self._scan_files()]
+        for name in names:
+            if name == "component_list":
+                self._return_component_list()
+            elif name not in self._cached_files:
+                self._cached_files[name] = self._load_file(name)
 
     def flush_cache(self):
         """
-        Method to flush cached files in database object.
+        Method to flush cached files in database object. Changes to the yaml
+        files are picked up when they are next loaded.
         """
         self._cached_files = {}
+        self._compiled = None
+        self._parameter_views = {}
 
     @property
     def component_list(self):
@@ -184,6 +252,21 @@ class Database:
             self._load_component_list()
         return self._component_list
 
+    def _get_water_sources_data(self):
+        if "water_sources" in self._cached_files:
+            # If data is already in cached files use this
+            return self._cached_files["water_sources"]
+        else:
+            # Else load data from required file
+            try:
+                source_data = self._load_file("water_sources")
+            except OSError:
+                raise KeyError("Could not find water_sources.yaml in database.")
+
+            # Store data in cache and return
+            self._cached_files["water_sources"] = source_data
+            return source_data
+
     def _get_technology(self, technology):
         if technology in self._cached_files:
             # If data is already in cached files, return
@@ -191,16 +274,11 @@ class Database:
         else:
             # Else load data from required file
             try:
-                with open(os.path.join(self._dbpath, technology+".yaml"),
-                          "r") as f:
-                    lines = f.read()
-                    f.close()
+                fdata = self._load_file(technology)
             except OSError:
                 raise KeyError(
                     f"Could not find entry for {technology} in database.")
 
-            fdata = yaml.load(lines, yaml.Loader)
-
             # Store data in cache and return
             self._cached_files[technology] = fdata
             return fdata
@@ -214,11 +292,240 @@ class Database:
             None
         """
         try:
-            with open(os.path.join(self._dbpath, "component_list.yaml"),
-                      "r") as f:
-                lines = f.read()
-                f.close()
+            self._component_list = self._load_file("component_list")
         except OSError:
             raise KeyError("Could not find component_list.yaml in database.")
 
-        self._component_list = yaml.load(lines, yaml.Loader)
+    def _load_file(self, name):
+        """
+        Return the parsed contents of the yaml file name.yaml, from the
+        compiled cache if possible. Each call returns a new object.
+
+        Raises:
+            OSError if the file does not exist
+        """
+        compiled = self._get_compiled_files()
+        if name in compiled:
+            return json.loads(compiled[name]["data"])
+
+        with open(os.path.join(self._dbpath, name+".yaml"), "r") as f:
+            lines = f.read()
+        return yaml.load(lines, _YAML_LOADER)
+
+    def _get_compiled_files(self):
+        """
+        Return the compiled contents of all yaml files in the database folder,
+        by file name (without extension), bringing them up to date first.
+        This is done once per Database object (and after flushing its cache).
+        """
+        if self._compiled is not None:
+            return self._compiled
+        if self._cache_dir is None or not self._check_cache_dir():
+            # Files are parsed as they are needed
+            self._cache_dir = None
+            self._compiled = {}
+            return self._compiled
+
+        key = os.path.normcase(os.path.realpath(self._dbpath))
+        compiled = _compiled_files.get(key, None)
+        if compiled is None:
+            compiled = self._read_cache_file(key)
+
+        changed = False
+        names = set()
+        for e in self._scan_files():
+            name = e.name[:-len(".yaml")]
+            names.add(name)
+            stat = e.stat()
+            entry = compiled.get(name, None)
+            if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns \
+                    and entry["size"] == stat.st_size:
+                continue
+
+            with open(e.path, "rb") as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if entry is None or entry["sha256"] != digest:
+                try:
+                    fdata = yaml.load(content.decode("utf-8"), _YAML_LOADER)
+                except (yaml.YAMLError, UnicodeDecodeError):
+                    # Left to fail when the file itself is loaded
+                    compiled.pop(name, None)
+                    continue
+                if not _is_json_data(fdata):
+                    # Data JSON cannot represent exactly is parsed when loaded
+                    compiled.pop(name, None)
+                    continue
+                entry = {"sha256": digest, "data": json.dumps(fdata)}
+            # A file modified just now may be modified again without changing
+            # its modification time, so its content is checked again next time
+            recent = stat.st_mtime_ns > time.time_ns() - _RECENT_NS
+            compiled[name] = {**entry,
+                              "mtime_ns": None if recent else stat.st_mtime_ns,
+                              "size": stat.st_size}
+            changed = True
+
+        for name in [n for n in compiled if n not in names]:
+            del compiled[name]
+            changed = True
+
+        _compiled_files[key] = compiled
+        if changed:
+            self._write_cache_file(key, compiled)
+
+        self._compiled = compiled
+        return compiled
+
+    def _scan_files(self):
+        try:
+            return [e for e in os.scandir(self._dbpath)
+                    if e.name.endswith(".yaml") and e.is_file()]
+        except OSError:
+            return []
+
+    def _check_cache_dir(self):
+        """
+        Return whether the cache directory can be used: it must not exist yet
+        or be owned by the current user, so that no other user can plant
+        cache files in it.
+        """
+        try:
+            owner = os.stat(self._cache_dir).st_uid
+        except FileNotFoundError:
+            return True
+        except OSError as err:
+            _log.debug(f"Could not use compiled database cache directory "
+                       f"{self._cache_dir}: {err}")
+            return False
+        if hasattr(os, "getuid") and owner != os.getuid():
+            _log.warning(f"Not using compiled database cache directory "
+                         f"{self._cache_dir}, which is not owned by the "
+                         f"current user.")
+            return False
+        return True
+
+    def _cache_file_name(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._cache_dir, f"database_{digest}.json")
+
+    def _read_cache_file(self, key):
+        fname = self._cache_file_name(key)
+        try:
+            with open(fname, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache["format"] == _CACHE_FORMAT and cache["path"] == key:
+                return cache["files"]
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            _log.debug(f"Could not read compiled database cache {fname}: "
+                       f"{err}")
+        return {}
+
+    def _write_cache_file(self, key, compiled):
+        fname = self._cache_file_name(key)
+        # Write atomically, so that no other process reads a partial file
+        tmp_fname = f"{fname}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+            with open(tmp_fname, "w", encoding="utf-8") as f:
+                json.dump({"format": _CACHE_FORMAT,
+                           "path": key,
+                           "files": compiled}, f)
+            os.replace(tmp_fname, fname)
+        except OSError as err:
+            _log.debug(f"Could not write compiled database cache {fname}: "
+                       f"{err}")
+
+
+def _is_json_data(data):
+    """
+    Return whether data (parsed from yaml) is made of types which JSON
+    represents exactly: dicts with string keys, lists, strings, numbers,
+    booleans and None.
+    """
+    if isinstance(data, dict):
+        return all(isinstance(k, str) and _is_json_data(v)
+                   for k, v in data.items())
+    if isinstance(data, list):
+        return all(_is_json_data(v) for v in data)
+    return data is None or isinstance(data, (str, int, float, bool))
+
+
+class ParameterView(Mapping):
+    """
+    Read-only view of a set of parameters from the database, formed by layers
+    of parameter dicts. A key is looked up in the first layer which contains
+    it, so earlier layers override later ones. Nested dicts and lists are
+    returned as read-only views (ParameterViews and tuples respectively),
+    which are created on first access and then reused.
+
+    Args:
+        layers - dicts of parameters, in order of precedence
+
+    Returns:
+        an instance of a ParameterView object
+    """
+
+    __slots__ = ("_layers", "_frozen")
+
+    def __init__(self, *layers):
+        self._layers = layers
+        self._frozen = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._frozen[key]
+        except KeyError:
+            pass
+        for layer in self._layers:
+            if key in layer:
+                value = _freeze(layer[key])
+                self._frozen[key] = value
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        # Keys of the lowest layer first, as when updating a dict with the
+        # higher layers
+        seen = set()
+        for layer in reversed(self._layers):
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return len(set().union(*self._layers))
+
+    def __contains__(self, key):
+        return any(key in layer for layer in self._layers)
+
+    def __repr__(self):
+        return f"ParameterView({self.to_dict()!r})"
+
+    def to_dict(self):
+        """
+        Method to return a mutable (deep) copy of the parameters.
+
+        Returns:
+            dict of parameters
+        """
+        return {k: _thaw(v) for k, v in self.items()}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return ParameterView(value)
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, ParameterView):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return deepcopy(value)
+
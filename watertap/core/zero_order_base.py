@@ -16,12 +16,15 @@ This module contains the base class for all zero order unit models.
 from idaes.core import UnitModelBlockData, useDefault
 from idaes.core.util.config import is_physical_parameter_block
 import idaes.logger as idaeslog
-from idaes.core.util.exceptions import ConfigurationError
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
 from idaes.core.util.tables import create_stream_table_dataframe
 
+from pyomo.common.collections import ComponentSet
 from pyomo.common.config import ConfigBlock, ConfigValue, In
 from pyomo.environ import units as pyunits
 
+from watertap.core.zero_order_evaluation import evaluate_constraints
+
 
 # Some more inforation about this module
 __author__ = "Andrew Lee"
@@ -85,6 +88,8 @@ class ZeroOrderBaseData(UnitModelBlockData):
         # Place holders for assigning methods
         self._initialize = None  # used to link to initization routine
         self._scaling = None  # used to link to scaling routine
+        self._evaluate = None  # used to link to direct evaluation routine
+        self._evaluate_electricity = None  # used to link to electricity evaluation
         self._get_Q = None  # used to provide inlet volumetric flow
 
         # Attributed for storing contents of reporting output
@@ -126,6 +131,56 @@ class ZeroOrderBaseData(UnitModelBlockData):
             self._initialize(self, state_args=None, outlvl=idaeslog.NOTSET,
                              solver=None, optarg=None)
 
+    def evaluate(self, known=None, outlvl=idaeslog.NOTSET):
+        '''
+        Evaluate the unit directly (i.e. without calling a solver) from the
+        values of its inlet and its fixed variables. The material balances and
+        electricity demand are calculated in closed form, and the remaining
+        constraints of the unit are evaluated one at a time (see
+        watertap.core.zero_order_evaluation.evaluate_constraints).
+
+        Keyword Arguments:
+            known : ComponentSet of unfixed variables whose values are known
+                    (e.g. inlet variables set by an upstream unit); the
+                    variables calculated here are added to it
+                    (default = None)
+            outlvl : sets output level of logging
+
+        Returns:
+            None
+
+        Raises:
+            InitializationError if some constraints have more than one unknown
+            variable
+        '''
+        if self._evaluate is None or not callable(self._evaluate):
+            raise NotImplementedError()
+
+        init_log = idaeslog.getInitLogger(self.name, outlvl, tag="unit")
+
+        if known is None:
+            known = ComponentSet()
+
+        self._evaluate(self, known)
+
+        # The electricity demand may depend on the other unit constraints
+        # (e.g. the chemical flow of a chemical addition)
+        exclude = []
+        if self._evaluate_electricity is not None:
+            exclude.append(self.electricity_consumption)
+        evaluate_constraints(self, known, exclude=exclude)
+        if self._evaluate_electricity is not None:
+            self._evaluate_electricity(self, known)
+
+        unresolved = evaluate_constraints(self, known)
+        if unresolved:
+            raise InitializationError(
+                f"{self.name} could not be evaluated directly, as the "
+                f"constraints {[c.name for c in unresolved]} have more than "
+                f"one unknown variable.")
+
+        init_log.info("Direct evaluation complete.")
+
     def calculate_scaling_factors(self):
         '''
         Placeholder scaling routine, should be overloaded by derived classes
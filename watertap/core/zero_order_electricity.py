@@ -15,9 +15,14 @@ This module contains common methods for determining the electricity intensity
 and demand for zero-order unit models.
 """
 
+from functools import partial
+
 import idaes.logger as idaeslog
 
-from pyomo.environ import Param, Var, units as pyunits
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.environ import Param, Var, units as pyunits, value
+
+from watertap.core.zero_order_evaluation import is_known, set_known_value
 
 # Some more inforation about this module
 __author__ = "Andrew Lee"
@@ -68,6 +73,8 @@ def constant_intensity(self):
     self._perf_var_dict["Electricity Intensity"] = \
         self.energy_electric_flow_vol_inlet
 
+    self._evaluate_electricity = _evaluate_constant_intensity
+
 
 def pump_electricity(self, flow_rate):
     """
@@ -106,3 +113,41 @@ def pump_electricity(self, flow_rate):
         return b.electricity[t] == pyunits.convert(
             flow_rate[t]*self.lift_height/(A*self.eta_pump*self.eta_motor),
             to_units=pyunits.kW)
+
+    self._evaluate_electricity = partial(
+        _evaluate_pump_electricity, flow_rate=flow_rate)
+
+
+def _evaluate_constant_intensity(self, known):
+    # E[t] = Q[t] * intensity, with Q[t] in m^3/hour
+    for t in self.flowsheet().time:
+        Q = self.get_inlet_flow(t)
+        if not (is_known(self.energy_electric_flow_vol_inlet, known) and
+                all(is_known(v, known) for v in identify_variables(Q))):
+            continue
+        Q_m3_hr = pyunits.convert_value(
+            value(Q),
+            from_units=pyunits.get_units(Q),
+            to_units=pyunits.m**3/pyunits.hour)
+        set_known_value(self.electricity[t],
+                        value(self.energy_electric_flow_vol_inlet)*Q_m3_hr,
+                        known)
+
+
+def _evaluate_pump_electricity(self, known, flow_rate):
+    # E[t] = 0.746 * Q[t] * H / (3960 * eta_pump * eta_motor), with Q[t] in
+    # gallon/minute and H in feet
+    for t in self.flowsheet().time:
+        if not all(is_known(v, known) for v in identify_variables(flow_rate[t])):
+            continue
+        Q_gpm = pyunits.convert_value(
+            value(flow_rate[t]),
+            from_units=pyunits.get_units(flow_rate[t]),
+            to_units=pyunits.gallon/pyunits.minute)
+        hp = (Q_gpm*value(self.lift_height) /
+              (3960*value(self.eta_pump)*value(self.eta_motor)))
+        set_known_value(
+            self.electricity[t],
+            pyunits.convert_value(hp, from_units=pyunits.horsepower,
+                                  to_units=pyunits.kW),
+            known)
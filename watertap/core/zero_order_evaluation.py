@@ -0,0 +1,193 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains methods for evaluating zero-order unit models and trains
+of them directly (i.e. by propagating the inlet flows through the units in
+closed form) instead of solving them with an NLP solver.
+"""
+
+import idaes.logger as idaeslog
+from idaes.core import UnitModelBlockData
+from idaes.core.util.exceptions import ConfigurationError, InitializationError
+
+from pyomo.common.collections import ComponentSet
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.environ import Block, Constraint, value
+from pyomo.network import Arc
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+
+# Some more inforation about this module
+__author__ = "Andrew Lee"
+
+# Set up logger
+_log = idaeslog.getLogger(__name__)
+
+
+def evaluate_zero_order_train(blk, outlvl=idaeslog.NOTSET):
+    """
+    Evaluate a flowsheet of zero-order units directly, i.e. without calling a
+    solver. The units are evaluated in the order given by the Arcs connecting
+    them, and the values of the outlet Ports of each unit are copied to the
+    inlet Ports they are connected to.
+
+    Zero-order units and feeds are evaluated with their ``evaluate`` method.
+    The constraints of other units (e.g. Mixers or Products) are evaluated one
+    at a time, as long as each has only one unknown variable.
+
+    The values of fixed variables are not changed, so the result is the
+    solution of the flowsheet if all degrees of freedom are fixed and it can
+    also be used as an (exact) initialization.
+
+    Args:
+        blk : flowsheet (or other block) containing the units and Arcs
+        outlvl : sets output level of logging
+
+    Returns:
+        None
+
+    Raises:
+        ConfigurationError if the units contain a recycle
+        InitializationError if a unit cannot be evaluated directly
+    """
+    init_log = idaeslog.getInitLogger(blk.name, outlvl, tag="flowsheet")
+
+    known = ComponentSet()
+    for unit, arcs in _evaluation_order(blk):
+        evaluate = getattr(unit, "evaluate", None)
+        if callable(evaluate):
+            evaluate(known=known)
+        else:
+            unresolved = evaluate_constraints(unit, known)
+            if unresolved:
+                raise InitializationError(
+                    f"{unit.name} could not be evaluated directly, as the "
+                    f"constraints {[c.name for c in unresolved]} have more "
+                    f"than one unknown variable.")
+
+        for arc in arcs:
+            _propagate_arc(arc, known)
+        init_log.info_high(f"{unit.name} evaluated.")
+
+    init_log.info("Direct evaluation complete.")
+
+
+def evaluate_constraints(blk, known, exclude=None):
+    """
+    Evaluate the active constraints of a block, calculating the unknown
+    variable of every constraint with a single unknown variable until no
+    such constraint is left. Fixed variables and the variables in ``known``
+    are known, and every calculated variable is added to ``known``.
+
+    Args:
+        blk : block whose constraints are evaluated
+        known : ComponentSet of the variables with known values
+        exclude : (optional) list of Constraints to skip
+
+    Returns:
+        list of the constraints which still have unknown variables
+    """
+    exclude = ComponentSet(exclude or [])
+    constraints = [c for c in blk.component_data_objects(
+                       Constraint, active=True, descend_into=True)
+                   if c.parent_component() not in exclude]
+
+    progress = True
+    while constraints and progress:
+        progress = False
+        remaining = []
+        for c in constraints:
+            unknown = [v for v in identify_variables(c.body, include_fixed=False)
+                       if v not in known]
+            if len(unknown) == 1:
+                calculate_variable_from_constraint(unknown[0], c)
+                known.add(unknown[0])
+                progress = True
+            elif len(unknown) > 1:
+                remaining.append(c)
+        constraints = remaining
+
+    return constraints
+
+
+def is_known(var, known):
+    """
+    Return True if the variable is fixed or in the ComponentSet ``known``.
+    """
+    return var.fixed or var in known
+
+
+def set_known_value(var, val, known):
+    """
+    Set the value of an unfixed variable and add it to ``known``. The values
+    of fixed variables are not changed.
+    """
+    if var.fixed:
+        return
+    var.set_value(val)
+    known.add(var)
+
+
+def _evaluation_order(blk):
+    # Return the units of blk in the order they can be evaluated in, together
+    # with the Arcs leaving them
+    units = [b for b in blk.component_data_objects(Block, descend_into=True)
+             if isinstance(b, UnitModelBlockData)]
+    unit_set = ComponentSet(units)
+
+    outgoing = {id(u): [] for u in units}
+    upstream = {id(u): ComponentSet() for u in units}
+    for arc in blk.component_data_objects(Arc, active=None, descend_into=True):
+        source = _parent_unit(arc.source, unit_set)
+        destination = _parent_unit(arc.destination, unit_set)
+        if source is None or destination is None:
+            raise ConfigurationError(
+                f"{arc.name} does not connect two unit models, which is not "
+                f"supported by direct evaluation.")
+        outgoing[id(source)].append(arc)
+        upstream[id(destination)].add(source)
+
+    order = []
+    done = ComponentSet()
+    while len(order) < len(units):
+        ready = [u for u in units
+                 if u not in done and all(s in done for s in upstream[id(u)])]
+        if not ready:
+            raise ConfigurationError(
+                f"{blk.name} contains a recycle between the units "
+                f"{[u.name for u in units if u not in done]}, which is not "
+                f"supported by direct evaluation.")
+        for u in ready:
+            done.add(u)
+            order.append((u, outgoing[id(u)]))
+
+    return order
+
+
+def _parent_unit(port, unit_set):
+    b = port.parent_block()
+    while b is not None and b not in unit_set:
+        b = b.parent_block()
+    return b
+
+
+def _propagate_arc(arc, known):
+    # Copy the values of the source Port of arc to its destination Port
+    for name, source in arc.source.vars.items():
+        destination = arc.destination.vars[name]
+        if source.is_indexed():
+            pairs = [(source[i], destination[i]) for i in source]
+        else:
+            pairs = [(source, destination)]
+        for s, d in pairs:
+            if d.is_variable_type():
+                set_known_value(d, value(s), known)
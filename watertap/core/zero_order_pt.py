@@ -38,11 +38,12 @@ def build_pt(self):
     No additional variables and constraints are created.
 
     This method also sets private attributes on the unit model with references
-    to the appropriate initialization and scaling methods to use and to return
-    the inlet volumetric flow rate.
+    to the appropriate initialization, evaluation and scaling methods to use and
+    to return the inlet volumetric flow rate.
     """
     self._has_recovery_removal = False
     self._initialize = initialize_pt
+    self._evaluate = evaluate_pt
     self._scaling = calculate_scaling_factors_pt
 
     # Create state blocks for inlet and outlet
@@ -133,6 +134,14 @@ def initialize_pt(blk, state_args=None, outlvl=idaeslog.NOTSET,
                   .format(idaeslog.condition(results)))
 
 
+def evaluate_pt(blk, known):
+    '''
+    Direct evaluation routine for pass-through unit models. The inlet and
+    outlet share a single StateBlock, so there is nothing to calculate.
+    '''
+    pass
+
+
 def calculate_scaling_factors_pt(self):
     pass
 
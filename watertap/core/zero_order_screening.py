@@ -0,0 +1,286 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+This module contains a vectorized evaluator for screening a train of zero-order
+units over many water sources and process subtypes at once, without building a
+Pyomo model for each combination.
+"""
+
+import numpy as np
+
+from pyomo.environ import units as pyunits
+
+import idaes.logger as idaeslog
+
+from watertap.core.wt_database import Database
+
+# Some more inforation about this module
+__author__ = "Andrew Lee"
+
+# Set up logger
+_log = idaeslog.getLogger(__name__)
+
+# Mass density of the solution, as assumed by the zero-order property package
+_DENS_MASS = 1000  # kg/m^3
+
+# Form of the material balances of the zero-order unit model of each
+# technology, i.e. single inlet-double outlet (build_sido) or pass-through
+# (build_pt)
+MODEL_FORMS = {
+    "chemical_addition": "pt",
+    "clarifier": "sido",
+    "coag_and_floc": "pt",
+    "nanofiltration": "sido",
+    "pump": "pt",
+    "sedimentation": "sido",
+    }
+
+
+def screen_zero_order_train(technologies, subtypes=None, water_sources=None,
+                            database=None, use_default_removal=False,
+                            flow_vol=None, model_forms=None):
+    """
+    Evaluate a train of zero-order units for every combination of water source
+    and process subtypes. The treated stream of each unit is the inlet of the
+    next unit.
+
+    The database is read once, and the recovery, removal and electricity
+    intensity of every unit are laid out as arrays with one row per scenario,
+    so that all scenarios are evaluated together. The units follow the model
+    forms of the zero-order library: the material balances are those of the
+    unit model of each technology, either single inlet-double outlet
+    (build_sido) or pass-through (build_pt), as given by MODEL_FORMS, and the
+    electricity demand is based on a constant intensity (constant_intensity)
+    if the database defines one (and is zero otherwise). Other performance
+    equations of a unit model (e.g. chemical flows or mixing power) are not
+    included.
+
+    Args:
+        technologies : list of names of the technologies (as in the database)
+                       of the units in the train, in order
+        subtypes : (optional) list with one entry per unit, each a list of the
+                   process subtypes to screen for that unit; each subtype is
+                   None (default parameters), a string or a list of strings
+                   (Default: None, default parameters for all units)
+        water_sources : (optional) list of names of water sources (Default:
+                        None, all water sources in the database)
+        database : (optional) WaterTAP Database (Default: None, a new instance
+                   of the default database)
+        use_default_removal : (optional) indicate whether to use the default
+                              removal fraction of a technology for solutes
+                              without a specific value (Default: False)
+        flow_vol : (optional) inlet volumetric flowrate in m^3/s (Default:
+                   None, the default flow of each water source)
+        model_forms : (optional) dict of the model forms ("sido" or "pt") of
+                      technologies, which extends or overrides MODEL_FORMS
+                      (Default: None)
+
+    Returns:
+        dict of results with the following entries (S is the number of
+        scenarios, U the number of units and C the number of components,
+        i.e. H2O followed by the solutes of all water sources):
+
+        * ``scenarios``: list of (water source, subtype of each unit) tuples
+        * ``components``: list of component names
+        * ``recovery_frac_mass_H2O``: array (S, U)
+        * ``removal_frac_mass_solute``: array (S, U, C-1), NaN for solutes
+          which are not present in the water source
+        * ``flow_mass_comp_inlet``, ``flow_mass_comp_treated``,
+          ``flow_mass_comp_byproduct``: arrays (S, U, C) in kg/s
+        * ``conc_mass_comp_treated``, ``conc_mass_comp_byproduct``: arrays
+          (S, U, C) in kg/m^3
+        * ``flow_vol_inlet``: array (S, U) in m^3/s
+        * ``electricity``: array (S, U) in kW
+
+    Raises:
+        ValueError if the model form of a technology is not known
+        KeyError if the database does not contain a water recovery for a
+        single inlet-double outlet unit, a removal fraction for a solute in a
+        water source (and use_default_removal is False) or a flow for a water
+        source (and flow_vol is None)
+    """
+    if database is None:
+        database = Database()
+    if water_sources is None:
+        water_sources = database.get_water_sources()
+    if subtypes is None:
+        subtypes = [[None] for _ in technologies]
+    if len(subtypes) != len(technologies):
+        raise ValueError(
+            f"Received {len(subtypes)} lists of subtypes for "
+            f"{len(technologies)} technologies.")
+
+    forms = dict(MODEL_FORMS)
+    if model_forms is not None:
+        forms.update(model_forms)
+    for tech in technologies:
+        if forms.get(tech) not in ("sido", "pt"):
+            raise ValueError(
+                f"Model form of technology {tech} is not known: it must be "
+                f"provided as \"sido\" or \"pt\" in model_forms.")
+
+    # -------------------------------------------------------------------------
+    # Feed of each water source
+    solutes = []
+    for w in water_sources:
+        for j in database.get_solute_set(w):
+            if j not in solutes:
+                solutes.append(j)
+    components = ["H2O"] + solutes
+
+    feed_conc = np.zeros((len(water_sources), len(solutes)))
+    present = np.zeros((len(water_sources), len(solutes)), dtype=bool)
+    feed_flow_vol = np.zeros(len(water_sources))
+    for i, w in enumerate(water_sources):
+        data = database.get_source_data(w)
+        for j, sdata in data["solutes"].items():
+            k = solutes.index(j)
+            feed_conc[i, k] = _get_value(sdata, pyunits.kg/pyunits.m**3)
+            present[i, k] = True
+        if flow_vol is not None:
+            feed_flow_vol[i] = flow_vol
+        else:
+            try:
+                feed_flow_vol[i] = _get_value(
+                    data["default_flow"], pyunits.m**3/pyunits.s)
+            except KeyError:
+                raise KeyError(
+                    f"Water source {w} does not define a default flowrate and "
+                    f"no flow_vol was provided.")
+
+    # -------------------------------------------------------------------------
+    # Parameters of each unit and subtype, looked up once
+    recovery = []
+    removal = []
+    intensity = []
+    for tech, options in zip(technologies, subtypes):
+        r = np.ones(len(options))
+        x = np.zeros((len(options), len(solutes)))
+        e = np.zeros(len(options))
+        for k, subtype in enumerate(options):
+            pdata = database.get_unit_operation_parameters(
+                tech, subtype=subtype)
+            if forms[tech] == "sido":
+                try:
+                    r[k] = _get_value(pdata["recovery_frac_mass_H2O"],
+                                      pyunits.dimensionless)
+                except KeyError:
+                    raise KeyError(
+                        f"Database provided does not contain an entry for "
+                        f"recovery_frac_mass_H2O for technology {tech} "
+                        f"(subtype {subtype}).")
+                x[k, :] = _removal_fractions(
+                    pdata, solutes, use_default_removal)
+            if "energy_electric_flow_vol_inlet" in pdata:
+                e[k] = _get_value(pdata["energy_electric_flow_vol_inlet"],
+                                  pyunits.kWh/pyunits.m**3)
+        recovery.append(r)
+        removal.append(x)
+        intensity.append(e)
+
+    # -------------------------------------------------------------------------
+    # Scenarios: all combinations of water source and subtypes
+    grid = np.meshgrid(np.arange(len(water_sources)),
+                       *[np.arange(len(o)) for o in subtypes],
+                       indexing="ij")
+    grid = [g.ravel() for g in grid]
+    source_index = grid[0]
+    n_scenarios = len(source_index)
+    n_units = len(technologies)
+
+    R = np.empty((n_scenarios, n_units))
+    X = np.empty((n_scenarios, n_units, len(solutes)))
+    E = np.empty((n_scenarios, n_units))
+    for u in range(n_units):
+        R[:, u] = recovery[u][grid[u+1]]
+        X[:, u, :] = removal[u][grid[u+1]]
+        E[:, u] = intensity[u][grid[u+1]]
+
+    # Solutes of the water source need a removal fraction in every unit
+    missing = np.isnan(X) & present[source_index][:, None, :]
+    if missing.any():
+        s, u, j = np.argwhere(missing)[0]
+        raise KeyError(
+            f"Database provided does not contain an entry for "
+            f"removal_frac_mass_solute with index {solutes[j]} for technology "
+            f"{technologies[u]} (subtype "
+            f"{subtypes[u][grid[u+1][s]]}) and no default removal was "
+            f"specified.")
+
+    # -------------------------------------------------------------------------
+    # Material balances along the train
+    feed = np.empty((n_scenarios, len(components)))
+    fc = feed_conc[source_index]
+    fq = feed_flow_vol[source_index]
+    feed[:, 1:] = fc*fq[:, None]
+    feed[:, 0] = fq*_DENS_MASS - feed[:, 1:].sum(axis=1)
+
+    # Fraction of each component going to the treated stream
+    split = np.empty((n_scenarios, n_units, len(components)))
+    split[:, :, 0] = R
+    split[:, :, 1:] = 1 - np.nan_to_num(X)
+
+    treated = feed[:, None, :]*np.cumprod(split, axis=1)
+    inlet = np.concatenate([feed[:, None, :], treated[:, :-1, :]], axis=1)
+    byproduct = inlet - treated
+
+    flow_vol_inlet = inlet.sum(axis=2)/_DENS_MASS
+
+    results = {
+        "scenarios": [
+            (water_sources[source_index[s]],
+             *[subtypes[u][grid[u+1][s]] for u in range(n_units)])
+            for s in range(n_scenarios)],
+        "components": components,
+        "recovery_frac_mass_H2O": R,
+        "removal_frac_mass_solute": np.where(
+            present[source_index][:, None, :], X, np.nan),
+        "flow_mass_comp_inlet": inlet,
+        "flow_mass_comp_treated": treated,
+        "flow_mass_comp_byproduct": byproduct,
+        "conc_mass_comp_treated": _concentrations(treated),
+        "conc_mass_comp_byproduct": _concentrations(byproduct),
+        "flow_vol_inlet": flow_vol_inlet,
+        "electricity": E*flow_vol_inlet*3600,
+        }
+
+    _log.info(f"Screened {n_scenarios} scenarios of {n_units} units.")
+
+    return results
+
+
+def _get_value(data, units):
+    # Value of a database entry in the given units
+    return pyunits.convert_value(data["value"],
+                                 from_units=getattr(pyunits, data["units"]),
+                                 to_units=units)
+
+
+def _removal_fractions(pdata, solutes, use_default_removal):
+    # Removal fraction of each solute, NaN where the database defines none
+    x = np.full(len(solutes), np.nan)
+    removal = pdata.get("removal_frac_mass_solute", {})
+    default = pdata.get("default_removal_frac_mass_solute", None)
+    for k, j in enumerate(solutes):
+        if j in removal:
+            x[k] = _get_value(removal[j], pyunits.dimensionless)
+        elif use_default_removal and default is not None:
+            x[k] = _get_value(default, pyunits.dimensionless)
+    return x
+
+
+def _concentrations(flow_mass_comp):
+    # conc_mass_comp of the zero-order property package
+    total = flow_mass_comp.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, flow_mass_comp/total*_DENS_MASS, 0.)
@@ -19,7 +19,9 @@ import idaes.logger as idaeslog
 from idaes.core.util import get_solver
 import idaes.core.util.scaling as iscale
 
-from pyomo.environ import NonNegativeReals, Var, units as pyunits
+from pyomo.environ import NonNegativeReals, Var, units as pyunits, value
+
+from watertap.core.zero_order_evaluation import is_known, set_known_value
 
 # Some more inforation about this module
 __author__ = "Andrew Lee"
@@ -49,11 +51,12 @@ def build_sido(self):
         * solute_treated_equation (indexed by time and solute)
 
     This method also sets private attributes on the unit model with references
-    to the appropriate initialization and scaling methods to use and to return
-    the inlet volumetric flow rate.
+    to the appropriate initialization, evaluation and scaling methods to use and
+    to return the inlet volumetric flow rate.
     """
     self._has_recovery_removal = True
     self._initialize = initialize_sido
+    self._evaluate = evaluate_sido
     self._scaling = calculate_scaling_factors_sido
 
     # Create state blocks for inlet and outlets
@@ -236,6 +239,46 @@ def initialize_sido(blk, state_args=None, outlvl=idaeslog.NOTSET,
                   .format(idaeslog.condition(results)))
 
 
+def evaluate_sido(blk, known):
+    '''
+    Direct evaluation routine for single inlet-double outlet unit models, which
+    calculates the outlet flows from the inlet flows and the recovery and
+    removal fractions. Time points where any of these are unknown are left to
+    the evaluation of the remaining constraints of the unit.
+
+    Args:
+        known : ComponentSet of unfixed variables whose values are known; the
+                outlet flows are added to it
+
+    Returns:
+        None
+    '''
+    for t in blk.flowsheet().time:
+        flow_in = blk.properties_in[t].flow_mass_comp
+        flow_treated = blk.properties_treated[t].flow_mass_comp
+        flow_byproduct = blk.properties_byproduct[t].flow_mass_comp
+        solute_set = blk.config.property_package.solute_set
+
+        inputs = ([blk.recovery_frac_mass_H2O[t]] +
+                  [flow_in[j] for j in flow_in] +
+                  [blk.removal_frac_mass_solute[t, j] for j in solute_set])
+        if not all(is_known(v, known) for v in inputs):
+            continue
+
+        recovery = value(blk.recovery_frac_mass_H2O[t])
+        set_known_value(
+            flow_treated["H2O"], recovery*value(flow_in["H2O"]), known)
+        set_known_value(
+            flow_byproduct["H2O"], (1 - recovery)*value(flow_in["H2O"]), known)
+
+        for j in solute_set:
+            removal = value(blk.removal_frac_mass_solute[t, j])
+            set_known_value(
+                flow_treated[j], (1 - removal)*value(flow_in[j]), known)
+            set_known_value(
+                flow_byproduct[j], removal*value(flow_in[j]), known)
+
+
 def calculate_scaling_factors_sido(self):
     # Get default scale factors and do calculations from base classes
     for t, v in self.water_recovery_equation.items():
@@ -38,17 +38,19 @@ from watertap.unit_models.reverse_osmosis_0D import (ReverseOsmosis0D,
 from watertap.unit_models.pressure_exchanger import PressureExchanger
 from watertap.unit_models.pump_isothermal import Pump
 from watertap.core.util.initialization import assert_degrees_of_freedom
+from watertap.core.util.flowsheet_cache import cached_flowsheet
 import watertap.examples.flowsheets.RO_with_energy_recovery.financials as financials
 
 
-def main():
+def main(cache_dir=None):
     # set up solver
     solver = get_solver()
 
-    # build, set, and initialize
-    m = build()
-    set_operating_conditions(m, water_recovery=0.5, over_pressure=0.3, solver=solver)
-    initialize_system(m, solver=solver)
+    # build, set, and initialize; the initialized flowsheet is loaded from
+    # cache_dir (or the WATERTAP_FLOWSHEET_CACHE directory) if it was cached before
+    m = cached_flowsheet(build, initialize_function=set_operating_conditions_and_initialize,
+                         initialize_kwargs={'water_recovery': 0.5, 'over_pressure': 0.3, 'solver': solver},
+                         cache_dir=cache_dir)
 
     # simulate and display
     solve(m, solver=solver)
@@ -260,6 +262,11 @@ def solve(blk, solver=None, tee=False):
     assert_optimal_termination(results)
 
 
+def set_operating_conditions_and_initialize(m, water_recovery=0.5, over_pressure=0.3, solver=None):
+    set_operating_conditions(m, water_recovery=water_recovery, over_pressure=over_pressure, solver=solver)
+    initialize_system(m, solver=solver)
+
+
 def initialize_system(m, solver=None):
     if solver is None:
         solver = get_solver()
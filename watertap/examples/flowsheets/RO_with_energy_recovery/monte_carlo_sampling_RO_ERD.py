@@ -37,7 +37,7 @@ def get_sweep_params(m, use_LHS=False):
 
     return sweep_params
 
-def run_parameter_sweep(results_file, seed=None, use_LHS=False):
+def build_system():
 
     # Set up the solver
     solver = get_solver()
@@ -50,6 +50,15 @@ def run_parameter_sweep(results_file, seed=None, use_LHS=False):
     # Simulate once outside the parameter sweep to ensure everything is appropriately initialized 
     solve(m, solver=solver)
 
+    return m
+
+def run_parameter_sweep(results_file, seed=None, use_LHS=False, num_workers=None):
+
+    # Set up the solver
+    solver = get_solver()
+
+    m = build_system()
+
     # Define the sampling type and ranges for three different variables
     sweep_params = get_sweep_params(m, use_LHS=use_LHS)
 
@@ -62,8 +71,14 @@ def run_parameter_sweep(results_file, seed=None, use_LHS=False):
     num_samples = 10
 
     # Run the parameter sweep
-    global_results = parameter_sweep(m, sweep_params, outputs, results_file=results_file, 
-        optimize_function=optimize, optimize_kwargs={'solver':solver}, num_samples=num_samples, seed=seed)
+    if num_workers is None:
+        global_results = parameter_sweep(m, sweep_params, outputs, results_file=results_file,
+            optimize_function=optimize, optimize_kwargs={'solver':solver}, num_samples=num_samples, seed=seed)
+    else:
+        # Every worker process builds its own system and uses the default solver
+        global_results = parameter_sweep(m, sweep_params, outputs, results_file=results_file,
+            optimize_function=optimize, num_samples=num_samples, seed=seed,
+            num_workers=num_workers, build_model=build_system)
 
     return global_results
 
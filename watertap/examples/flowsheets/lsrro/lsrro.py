@@ -31,15 +31,18 @@ from watertap.unit_models.reverse_osmosis_0D import (ReverseOsmosis0D,
                                                        PressureChangeType)
 from watertap.unit_models.pump_isothermal import Pump
 from watertap.core.util.initialization import assert_degrees_of_freedom, assert_no_degrees_of_freedom
+from watertap.core.util.flowsheet_cache import cached_flowsheet
 import watertap.examples.flowsheets.lsrro.financials as financials
 import watertap.property_models.NaCl_prop_pack as props
 
 
 
-def main(number_of_stages, water_recovery=None):
-    m = build(number_of_stages)
-    set_operating_conditions(m)
-    initialize(m)
+def main(number_of_stages, water_recovery=None, cache_dir=None):
+    # the initialized flowsheet is loaded from cache_dir (or the
+    # WATERTAP_FLOWSHEET_CACHE directory) if it was cached before
+    m = cached_flowsheet(build, build_kwargs={'number_of_stages': number_of_stages},
+                         initialize_function=set_operating_conditions_and_initialize,
+                         cache_dir=cache_dir)
     solve(m)
     print('\n***---Simulation results---***')
     display_system(m)
@@ -335,6 +338,11 @@ def do_backwards_initialization_pass(m, optarg):
             propagate_state(m.fs.eq_pump_to_mixer[stage])
 
 
+def set_operating_conditions_and_initialize(m, verbose=False, solver=None):
+    set_operating_conditions(m)
+    initialize(m, verbose=verbose, solver=solver)
+
+
 def initialize(m, verbose=False, solver=None):
 
     # ---initializing---
@@ -16,13 +16,57 @@ import sys
 import os
 import itertools
 import warnings
+import glob
+import multiprocessing
+import time
+import contextlib
+import threading
 
 from scipy.interpolate import griddata
-from enum import Enum, auto
+from scipy.spatial import cKDTree
+from enum import Enum, IntEnum, auto
 from abc import abstractmethod, ABC 
+from pyomo.common.tempfiles import TempfileManager
 from idaes.core.util import get_solver
 
 from idaes.surrogate.pysmo import sampling
+from watertap.core.util.model_state import ModelState
+from watertap.core.util.profiling import solver_profiler, merge_summaries
+from watertap.tools.sweep_results import is_binary_results_file, write_sweep_results, write_sweep_results_parallel
+
+# Largest sweeps (number of parameters and cases) whose failed cases are
+# interpolated linearly; larger sweeps use inverse distance weighting
+_MAX_LINEAR_INTERP_DIMENSIONS = 3
+_MAX_LINEAR_INTERP_POINTS = 100000
+
+# Number of converged neighbours per sweep parameter used by inverse distance weighting
+_IDW_NEIGHBORS_PER_DIMENSION = 2
+
+# Quasi-random points are kept this far away from 0 and 1 before the inverse CDF is applied
+_QMC_EPS = 1e-12
+
+# Number of rows of a random sample drawn from each stream
+_RANDOM_BLOCK_SIZE = 1024
+
+# Number of times the coarse grid spacing of an ADAPTIVE sweep may be halved
+_MAX_REFINEMENT_LEVELS = 6
+
+# Maximum number of converged solutions kept in memory for warm starting
+_MAX_WARMSTART_SNAPSHOTS = 1000
+
+# MPI message tags used by the dynamic (manager/worker) scheduler
+_WORK_TAG = 1
+_RESULTS_TAG = 2
+
+# State of a process pool worker, set up once per process by _init_pool_worker
+_pool_worker = dict()
+
+# Columns appended to the outputs when parameter_sweep records diagnostics
+_DIAGNOSTIC_COLUMNS = ('wall_time', 'iterations', 'termination_condition', 'reinitialized',
+                       'nl_write_time', 'solver_time')
+
+# Termination conditions are reported by their position in this list
+_TERMINATION_CONDITIONS = list(pyo.TerminationCondition)
 
 # ================================================================
 
@@ -30,6 +74,26 @@ class SamplingType(Enum):
     FIXED = auto()
     RANDOM = auto()
     RANDOM_LHS = auto()
+    ADAPTIVE = auto()
+    SOBOL = auto()
+    HALTON = auto()
+
+# ================================================================
+
+class SweepStatus(IntEnum):
+    FAILED = 0
+    CONVERGED = 1
+    # The solve was stopped by its time or iteration limit
+    LIMIT_EXCEEDED = 2
+
+# ================================================================
+
+class SolverLimitExceeded(RuntimeError):
+    """
+    Raised by an optimize function when the solver was stopped by its time or
+    iteration limit; parameter_sweep records such cases as
+    ``SweepStatus.LIMIT_EXCEEDED`` and does not retry them.
+    """
 
 # ================================================================
 
@@ -58,6 +122,12 @@ class _Sample(ABC):
 # ================================================================
 
 class RandomSample(_Sample):
+    """
+    Base class of the random samples. ``sample(num_samples, rng=None)`` draws from the
+    ``numpy.random.Generator`` passed as ``rng``, or from the global ``np.random`` state
+    (seeded by the parameter sweep) by default. Subclasses that set ``marginal`` to a frozen
+    ``scipy.stats`` distribution can also be drawn with ``random_streams``.
+    """
     sampling_type = SamplingType.RANDOM
 
 class FixedSample(_Sample):
@@ -79,23 +149,27 @@ class LinearSample(FixedSample):
 
 class UniformSample(RandomSample):
 
-    def sample(self, num_samples): 
-        return np.random.uniform(self.lower_limit, self.upper_limit, num_samples)
+    def sample(self, num_samples, rng=None): 
+        rng = np.random if rng is None else rng
+        return rng.uniform(self.lower_limit, self.upper_limit, num_samples)
 
     def setup(self, lower_limit, upper_limit):
         self.lower_limit = lower_limit
         self.upper_limit = upper_limit
+        self.marginal = _marginal_distribution('uniform', lower_limit, upper_limit)
 
 # ================================================================
 
 class NormalSample(RandomSample):
 
-    def sample(self, num_samples): 
-        return np.random.normal(self.mean, self.sd, num_samples)
+    def sample(self, num_samples, rng=None): 
+        rng = np.random if rng is None else rng
+        return rng.normal(self.mean, self.sd, num_samples)
 
     def setup(self, mean, sd):
         self.mean = mean
         self.sd = sd
+        self.marginal = _marginal_distribution('normal', mean, sd)
 
 # ================================================================
 
@@ -111,6 +185,67 @@ class LatinHypercubeSample(_Sample):
 
 # ================================================================
 
+class AdaptiveSample(_Sample):
+    sampling_type = SamplingType.ADAPTIVE
+
+    def sample(self, num_samples):
+        return np.linspace(self.lower_limit, self.upper_limit, self.num_samples)
+
+    def setup(self, lower_limit, upper_limit, num_samples):
+        self.lower_limit = lower_limit
+        self.upper_limit = upper_limit
+        # Number of points of the coarse grid the refinement starts from
+        self.num_samples = num_samples
+
+# ================================================================
+
+class _QuasiRandomSample(_Sample):
+    """
+    Base class of the quasi-random samples, which are drawn jointly for all sweep parameters
+    from one low-discrepancy sequence and mapped onto the distribution of each parameter
+    through its inverse CDF. The distribution is one of
+
+    * ``'uniform'``, with arguments ``lower_limit, upper_limit``
+    * ``'normal'``, with arguments ``mean, sd``
+    * ``'lognormal'``, with the arguments ``mean, sd`` of the logarithm of the parameter
+    * ``'triangular'``, with arguments ``lower_limit, mode, upper_limit``
+    """
+
+    def sample(self, num_samples):
+        return _QuasiRandomCombinations(self.sampling_type, [self.marginal], num_samples, None)[:, 0]
+
+    def setup(self, distribution, *args):
+        self.distribution = distribution
+        self.args = args
+        self.marginal = _marginal_distribution(distribution, *args)
+
+class SobolSample(_QuasiRandomSample):
+    sampling_type = SamplingType.SOBOL
+
+class HaltonSample(_QuasiRandomSample):
+    sampling_type = SamplingType.HALTON
+
+def _marginal_distribution(distribution, *args):
+    from scipy import stats
+
+    if distribution == 'uniform':
+        lower_limit, upper_limit = args
+        return stats.uniform(loc=lower_limit, scale=upper_limit - lower_limit)
+    elif distribution == 'normal':
+        mean, sd = args
+        return stats.norm(loc=mean, scale=sd)
+    elif distribution == 'lognormal':
+        mean, sd = args
+        return stats.lognorm(s=sd, scale=np.exp(mean))
+    elif distribution == 'triangular':
+        lower_limit, mode, upper_limit = args
+        return stats.triang(c=(mode - lower_limit)/(upper_limit - lower_limit), loc=lower_limit,
+                            scale=upper_limit - lower_limit)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+# ================================================================
+
 def _init_mpi(mpi_comm=None):
 
     if mpi_comm is None:
@@ -127,9 +262,247 @@ def _init_mpi(mpi_comm=None):
 
 # ================================================================
 
-def _build_combinations(d, sampling_type, num_samples, comm, rank, num_procs):
+class _GridCombinations:
+    """
+    Stand-in for the array holding every combination of the values of FIXED sweep
+    parameters. Rows are decoded on demand from their flat (row-major) index, so the
+    memory needed on each rank does not grow with the number of combinations. Supports
+    the subset of the numpy array interface used by the parameter sweep (``shape``,
+    row indexing, ``min``/``max`` over rows); any other use converts it to a full array.
+    """
+
+    def __init__(self, param_values):
+        self._param_values = [np.asarray(p, dtype=np.float64).reshape(-1) for p in param_values]
+        self._grid_shape = tuple(len(p) for p in self._param_values)
+        self.shape = (int(np.prod(self._grid_shape, dtype=np.int64)), len(self._param_values))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+        else:
+            rows, cols = key, slice(None)
+
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(self.shape[0]))
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.where(rows < 0, rows + self.shape[0], rows)
+
+        # Mixed-radix decoding of the flat index into one index per parameter
+        multi_index = np.unravel_index(rows, self._grid_shape)
+        values = np.stack([p[i] for p, i in zip(self._param_values, multi_index)], axis=-1)
+
+        return values[..., cols][()]
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:, :].astype(dtype) if dtype is not None else self[:, :]
+
+    def min(self, axis=0):
+        return np.array([np.min(p) for p in self._param_values])
+
+    def max(self, axis=0):
+        return np.array([np.max(p) for p in self._param_values])
+
+# ================================================================
+
+class _QuasiRandomCombinations:
+    """
+    Stand-in for the array holding a quasi-random (SOBOL or HALTON) sample of the sweep
+    parameters. Every rank generates the rows it needs on demand from the same scrambled,
+    seeded sequence, so the sample never has to be broadcast. Supports the same subset of the
+    numpy array interface as _GridCombinations, except that ``min``/``max`` return the range
+    the sample covers, taken from the marginal distributions without generating it.
+    """
+
+    def __init__(self, sampling_type, marginals, num_samples, seed):
+        self._sampling_type = sampling_type
+        self._marginals = marginals
+        self._seed = seed
+        self.shape = (int(num_samples), len(marginals))
+
+        # The scrambled engine is built once and rewound only when a block does not
+        # continue from where the last one stopped
+        self._engine = None
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # The engine and the lock cannot be pickled (e.g., into the initargs of a process
+        # pool); they are rebuilt on first use
+        state = self.__dict__.copy()
+        del state['_engine'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._engine = None
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+        else:
+            rows, cols = key, slice(None)
+
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(self.shape[0]))
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.where(rows < 0, rows + self.shape[0], rows)
+
+        # Generate the block of consecutive points spanning the requested rows
+        if rows.size > 0:
+            start = int(np.min(rows))
+            block = self._generate(start, int(np.max(rows)) + 1)
+            values = block[rows - start, :]
+        else:
+            values = np.zeros(rows.shape + (self.shape[1],))
+
+        return values[..., cols][()]
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:, :].astype(dtype) if dtype is not None else self[:, :]
+
+    def min(self, axis=0):
+        # Taken from the marginals rather than the sample: the quantile 1/(2n) of each
+        # distribution, below which a stratified sample of n points has about one point
+        return np.array([m.ppf(self._tail_probability()) for m in self._marginals])
+
+    def max(self, axis=0):
+        return np.array([m.ppf(1. - self._tail_probability()) for m in self._marginals])
+
+    def _tail_probability(self):
+        return max(_QMC_EPS, 0.5/max(1, self.shape[0]))
+
+    def _generate(self, start, stop):
+        from scipy.stats import qmc
+
+        num_params = self.shape[1]
+        with self._lock:
+            if self._engine is None:
+                if self._sampling_type == SamplingType.SOBOL:
+                    self._engine = qmc.Sobol(num_params, scramble=True, seed=self._seed)
+                else:
+                    self._engine = qmc.Halton(num_params, scramble=True, seed=self._seed)
+
+            if start != self._position:
+                self._engine.reset()
+                if start > 0:
+                    self._engine.fast_forward(start)
+            with warnings.catch_warnings():
+                # Blocks of a Sobol' sequence need not hold a power of 2 points
+                warnings.simplefilter('ignore', UserWarning)
+                unit_values = self._engine.random(stop - start)
+            self._position = stop
+
+        unit_values = np.clip(unit_values, _QMC_EPS, 1. - _QMC_EPS)
+        return np.column_stack([m.ppf(unit_values[:, k]) for k, m in enumerate(self._marginals)]) \
+                if num_params > 0 else unit_values
+
+# ================================================================
+
+class _RandomCombinations:
+    """
+    Stand-in for the array holding a random sample of the sweep parameters drawn from
+    ``numpy.random.Generator`` streams. The rows are split into fixed blocks of
+    ``_RANDOM_BLOCK_SIZE``, and each block of each parameter has its own stream derived from
+    the seed, so every rank draws only the blocks holding its own rows and the sample does
+    not depend on the number of ranks. Supports the same subset of the numpy array interface
+    as _QuasiRandomCombinations.
+    """
+
+    def __init__(self, marginals, num_samples, seed):
+        self._marginals = marginals
+        self._seed = seed
+        self.shape = (int(num_samples), len(marginals))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+        else:
+            rows, cols = key, slice(None)
+
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(self.shape[0]))
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.where(rows < 0, rows + self.shape[0], rows)
+
+        values = np.zeros(rows.shape + (self.shape[1],))
+        blocks = rows // _RANDOM_BLOCK_SIZE
+        for block in np.unique(blocks):
+            in_block = blocks == block
+            values[in_block, :] = self._generate(int(block))[rows[in_block] - block*_RANDOM_BLOCK_SIZE, :]
+
+        return values[..., cols][()]
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:, :].astype(dtype) if dtype is not None else self[:, :]
+
+    def min(self, axis=0):
+        # Taken from the marginals, like those of a quasi-random sample
+        return np.array([m.ppf(self._tail_probability()) for m in self._marginals])
+
+    def max(self, axis=0):
+        return np.array([m.ppf(1. - self._tail_probability()) for m in self._marginals])
+
+    def _tail_probability(self):
+        return max(_QMC_EPS, 0.5/max(1, self.shape[0]))
+
+    def _generate(self, block):
+        start = block*_RANDOM_BLOCK_SIZE
+        num_rows = min(_RANDOM_BLOCK_SIZE, self.shape[0] - start)
+        if self.shape[1] == 0:
+            return np.zeros((num_rows, 0))
+
+        return np.column_stack([m.rvs(size=num_rows, random_state=np.random.default_rng(
+                                    np.random.SeedSequence(self._seed, spawn_key=(k, block))))
+                                for k, m in enumerate(self._marginals)])
+
+# ================================================================
+
+def _build_combinations(d, sampling_type, num_samples, comm, rank, num_procs, seed=None, random_streams=False):
     num_var_params = len(d)
 
+    if sampling_type == SamplingType.SOBOL or sampling_type == SamplingType.HALTON:
+        if num_samples is None:
+            raise ValueError("Quasi-random sampling requires num_samples.")
+        if sampling_type == SamplingType.SOBOL and not _is_power_of_two(num_samples):
+            warnings.warn("The balance properties of a Sobol' sample require num_samples to be a power of 2.")
+
+        # All ranks scramble the sequence with the same seed
+        seed = _shared_seed(seed, comm, rank, num_procs)
+
+        return _QuasiRandomCombinations(sampling_type, [v.marginal for v in d.values()], num_samples, seed)
+
+    if sampling_type == SamplingType.RANDOM and random_streams:
+        if num_samples is None:
+            raise ValueError("Random sampling requires num_samples.")
+
+        if any(getattr(v, 'marginal', None) is None for v in d.values()):
+            raise ValueError("Random streams require every sweep parameter to define its marginal distribution.")
+
+        # Every rank draws only its own rows from streams derived from the shared seed
+        seed = _shared_seed(seed, comm, rank, num_procs)
+
+        return _RandomCombinations([v.marginal for v in d.values()], num_samples, seed)
+
+    if sampling_type == SamplingType.FIXED or sampling_type == SamplingType.ADAPTIVE:
+        # Only the (short) vector of values of each parameter is shared;
+        # the combinations themselves are decoded on demand
+        param_values = [v.sample(num_samples) for v in d.values()] if rank == 0 else None
+        if num_procs > 1:
+            param_values = comm.bcast(param_values, root=0)
+
+        return _GridCombinations(param_values)
+
     if rank == 0:
         param_values = []
 
@@ -138,12 +511,7 @@ def _build_combinations(d, sampling_type, num_samples, comm, rank, num_procs):
             p = v.sample(num_samples)
             param_values.append(p)
 
-        if sampling_type == SamplingType.FIXED:
-            # Form an array with every possible combination of parameter values
-            global_combo_array = np.array(np.meshgrid(*param_values, indexing="ij"))
-            global_combo_array = global_combo_array.reshape(num_var_params, -1).T
-
-        elif sampling_type == SamplingType.RANDOM:
+        if sampling_type == SamplingType.RANDOM:
             sorting = np.argsort(param_values[0])
             global_combo_array = np.vstack(param_values).T
             global_combo_array = global_combo_array[sorting, :]
@@ -165,11 +533,7 @@ def _build_combinations(d, sampling_type, num_samples, comm, rank, num_procs):
             global_combo_array = np.ascontiguousarray(global_combo_array)
 
     else:
-        if sampling_type == SamplingType.FIXED:
-            nx = 1
-            for k, v in d.items():
-                nx *= v.num_samples
-        elif sampling_type == SamplingType.RANDOM or sampling_type == SamplingType.RANDOM_LHS:
+        if sampling_type == SamplingType.RANDOM or sampling_type == SamplingType.RANDOM_LHS:
             nx = num_samples
         else:
             raise ValueError(f"Unknown sampling type: {sampling_type}")
@@ -187,22 +551,307 @@ def _build_combinations(d, sampling_type, num_samples, comm, rank, num_procs):
 
     return global_combo_array
 
+def _shared_seed(seed, comm, rank, num_procs):
+
+    # Return the seed all ranks derive their streams from; only a missing seed,
+    # drawn from fresh entropy on rank 0, has to be shared
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0]) if rank == 0 else None
+        if num_procs > 1:
+            seed = comm.bcast(seed, root=0)
+
+    return seed
+
+def _is_power_of_two(n):
+    n = int(n)
+    return n > 0 and (n & (n - 1)) == 0
+
 # ================================================================
 
 def _divide_combinations(global_combo_array, rank, num_procs):
 
     # Split the total list of combinations into NUM_PROCS chunks,
-    # one per each of the MPI ranks
-    # divided_combo_array = np.array_split(global_combo_array, num_procs, axis=0)
-    divided_combo_array = np.array_split(global_combo_array, num_procs)
-
-    # Return only this rank's portion of the total workload
-    local_combo_array = divided_combo_array[rank]
+    # one per each of the MPI ranks, and return only this rank's
+    # portion of the total workload
+    local_indices = _divide_indices(np.shape(global_combo_array)[0], rank, num_procs)
+    local_combo_array = global_combo_array[local_indices, :]
 
     return local_combo_array
 
 # ================================================================
 
+def _generate_chunks(case_indices, chunk_size):
+
+    # Yield consecutive chunks of at most chunk_size row indices
+    for start in range(0, len(case_indices), chunk_size):
+        yield case_indices[start:start + chunk_size]
+
+# ================================================================
+
+def _divide_indices(num_cases, rank, num_procs):
+
+    # Return the global row indices of this rank's portion of the total
+    # workload, consistent with the split done in _divide_combinations
+    return np.array_split(np.arange(num_cases), num_procs)[rank]
+
+# ================================================================
+
+class _SweepJournal:
+    """
+    Append-only record of every finished case on this rank. Each line holds the
+    global row index, the SweepStatus, the parameter values and the outputs of
+    a single case, written at full precision and flushed to disk immediately,
+    so that an interrupted parameter sweep can be resumed.
+    """
+
+    def __init__(self, checkpoint_dir, rank, header, append=False):
+        fname = os.path.join(checkpoint_dir, f'journal_{rank:03}.csv')
+
+        if append and os.path.isfile(fname):
+            # Discard a trailing line left incomplete by an interrupted write
+            with open(fname, 'rb+') as f:
+                contents = f.read()
+                f.truncate(contents.rfind(b'\n') + 1)
+
+        self._file = open(fname, 'a' if append else 'w')
+
+        if self._file.tell() == 0:
+            self._file.write(f'# {header}\n')
+            self._flush()
+
+    def append(self, index, values, status, results):
+        fields = itertools.chain((str(int(index)), str(int(status))),
+                (repr(float(v)) for v in values), (repr(float(r)) for r in results))
+        self._file.write(','.join(fields) + '\n')
+        self._flush()
+
+    def close(self):
+        self._file.close()
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+# ================================================================
+
+def _read_checkpoint_journals(checkpoint_dir, header, global_values):
+
+    num_fields = 2 + len(header.split(','))
+    completed = dict()
+
+    for fname in sorted(glob.glob(os.path.join(checkpoint_dir, 'journal_*.csv'))):
+        with open(fname, 'r') as f:
+            first_line = f.readline()
+            if first_line == '':
+                continue
+            if first_line.rstrip('\n') != f'# index,status,{header}':
+                raise ValueError(f"The checkpoint journal {fname} was written for a different set of "
+                                 f"sweep parameters or outputs and cannot be used to resume this sweep.")
+
+            for line in f:
+                fields = line.rstrip('\n').split(',')
+
+                # Skip a trailing line left incomplete by an interrupted write
+                if not line.endswith('\n') or len(fields) != num_fields:
+                    continue
+                try:
+                    index = int(fields[0])
+                    status = SweepStatus(int(fields[1]))
+                    row = np.array(fields[2:], dtype=np.float64)
+                except ValueError:
+                    continue
+
+                completed[index] = (status, row)
+
+    # Make sure the journals match the (deterministically rebuilt) parameter space
+    num_cases, num_values = np.shape(global_values)
+    indices = np.array(list(completed), dtype=np.int64)
+    if len(indices) > 0:
+        if np.any(indices < 0) or np.any(indices >= num_cases):
+            matches = False
+        else:
+            # Look up all the cases at once, which is much cheaper for lazily generated parameter spaces
+            rows = np.array([completed[index][1][:num_values] for index in indices])
+            matches = np.allclose(rows, global_values[indices, :], rtol=1e-12, atol=0.)
+        if not matches:
+            raise ValueError(f"The checkpoint journals in {checkpoint_dir} do not match the parameter space "
+                             f"of this sweep and cannot be used to resume it.")
+
+    return completed
+
+# ================================================================
+
+def _hilbert_order(scaled_values, num_bits=16):
+
+    # Order of the (scaled) points along a Hilbert curve through their bounding box,
+    # so that consecutive cases are close to each other. Unlike a nearest-neighbour
+    # tour, this only takes a sort, i.e., O(N log N) for N points.
+    num_cases, num_dims = np.shape(scaled_values)
+    if num_cases < 2 or num_dims == 0:
+        return np.arange(num_cases, dtype=np.int64)
+
+    # Integer coordinates on a grid of 2**num_bits cells per dimension
+    lower = np.min(scaled_values, axis=0)
+    span = np.max(scaled_values, axis=0) - lower
+    span = np.where(span > 0, span, 1.)
+    X = np.floor((scaled_values - lower)/span*(2**num_bits - 1)).astype(np.int64)
+
+    # Transpose the coordinates into the Hilbert index, vectorized over all
+    # points (J. Skilling, "Programming the Hilbert curve", AIP Conf. Proc. 707, 2004)
+    Q = 1 << (num_bits - 1)
+    while Q > 1:
+        P = Q - 1
+        for i in range(num_dims):
+            invert = (X[:, i] & Q) != 0
+            X[invert, 0] ^= P
+            t = np.where(invert, 0, (X[:, 0] ^ X[:, i]) & P)
+            X[:, 0] ^= t
+            X[:, i] ^= t
+        Q >>= 1
+
+    for i in range(1, num_dims):
+        X[:, i] ^= X[:, i - 1]
+    t = np.zeros(num_cases, dtype=np.int64)
+    Q = 1 << (num_bits - 1)
+    while Q > 1:
+        t ^= np.where((X[:, -1] & Q) != 0, Q - 1, 0)
+        Q >>= 1
+    X ^= t[:, None]
+
+    # The index holds the bits of all dimensions from the most significant
+    # down; sort by it one bit plane (and at most 62 dimensions) at a time
+    keys = []
+    for b in range(num_bits - 1, -1, -1):
+        for start in range(0, num_dims, 62):
+            bits = (X[:, start:start + 62] >> b) & 1
+            weights = np.left_shift(1, np.arange(np.shape(bits)[1] - 1, -1, -1, dtype=np.int64))
+            keys.append(bits @ weights)
+
+    # np.lexsort sorts by its last key first
+    return np.lexsort(keys[::-1]).astype(np.int64)
+
+# ================================================================
+
+class _WarmStartStore:
+    """
+    In-memory store of the values of all unfixed variables of converged cases.
+    Before each solve, the model is loaded with the solution of the nearest
+    (in scaled parameter space) case that has already converged.
+    """
+
+    def __init__(self, global_values, max_snapshots=_MAX_WARMSTART_SNAPSHOTS):
+        # Scale every parameter by its range so all dimensions count equally
+        if np.shape(global_values)[0] > 0:
+            self._lower = np.asarray(global_values.min(axis=0))
+            span = np.asarray(global_values.max(axis=0)) - self._lower
+        else:
+            self._lower, span = 0., 1.
+        self._span = np.where(np.asarray(span) > 0, span, 1.)
+
+        self._max_snapshots = max_snapshots
+        self._variables = None
+        self._points = np.zeros((0, np.shape(global_values)[1]))
+        self._snapshots = []
+
+    def scale(self, values):
+        return (values - self._lower)/self._span
+
+    def save(self, model, values):
+        if self._variables is None:
+            self._variables = [var for var in model.component_data_objects(pyo.Var) if not var.fixed]
+
+        # Drop the oldest snapshot once the store is full
+        if len(self._snapshots) >= self._max_snapshots:
+            self._points = self._points[1:, :]
+            self._snapshots.pop(0)
+
+        self._points = np.vstack((self._points, self.scale(values)))
+        self._snapshots.append([var.value for var in self._variables])
+
+    def restore(self, model, values):
+        if len(self._snapshots) == 0:
+            return
+
+        dist = np.sum((self._points - self.scale(values))**2, axis=1)
+        snapshot = self._snapshots[int(np.argmin(dist))]
+
+        for var, val in zip(self._variables, snapshot):
+            if not var.fixed:
+                var.set_value(val, skip_validation=True)
+
+# ================================================================
+
+class _Continuation:
+    """
+    Fallback for a failed case: starting from the solution of the last converged
+    case, the sweep parameters are moved towards the values of the failed case in
+    steps that are halved after every failed solve and doubled after every
+    converged one. With ``predictor``, each step starts from the secant
+    extrapolation of the two previous converged steps.
+    """
+
+    def __init__(self, model, initial_step=0.5, min_step=1./64, max_steps=20, predictor=True):
+        if not 0 < min_step <= initial_step <= 1:
+            raise ValueError("The continuation steps must satisfy 0 < min_step <= initial_step <= 1.")
+
+        self._state = ModelState(model, include_scaling=False)
+        self._initial_step = initial_step
+        self._min_step = min_step
+        self._max_steps = max_steps
+        self._predictor = predictor
+
+        self._values = None
+        self._snapshot = None
+
+    def save(self, values):
+        # The last converged case is the starting point of the next continuation
+        self._values = np.array(values, dtype=np.float64)
+        self._snapshot = self._state.save()
+
+    def solve(self, model, sweep_params, values, optimize_function, optimize_kwargs, diagnostics=None):
+        if self._snapshot is None:
+            return False
+
+        start_values = self._values
+        path = [(0., self._snapshot)]
+        step = self._initial_step
+
+        for _ in range(self._max_steps):
+            fraction = min(1., path[-1][0] + step)
+
+            self._state.restore(self._predict(path, fraction))
+            _update_model_values(model, sweep_params, start_values + fraction*(values - start_values))
+
+            try:
+                _optimize(model, optimize_function, optimize_kwargs, diagnostics)
+            except:
+                step /= 2
+                if step < self._min_step:
+                    break
+            else:
+                if fraction == 1.:
+                    return True
+                path.append((fraction, self._state.save()))
+                step *= 2
+
+        # Leave the model at the last point reached, which did converge
+        self._state.restore(path[-1][1])
+        return False
+
+    def _predict(self, path, fraction):
+        (fraction_1, snapshot_1) = path[-1]
+        if not self._predictor or len(path) < 2:
+            return snapshot_1
+        (fraction_0, snapshot_0) = path[-2]
+
+        # Linear extrapolation of every variable, kept within its bounds
+        slope = (fraction - fraction_1)/(fraction_1 - fraction_0)
+        values = snapshot_1.values + slope*(snapshot_1.values - snapshot_0.values)
+        values = np.where(np.isnan(values), values, np.fmin(np.fmax(values, snapshot_1.lb), snapshot_1.ub))
+        return snapshot_1._replace(values=values)
+
+# ================================================================
+
 def _update_model_values(m, param_dict, values):
 
     for k, item in enumerate(param_dict.values()):
@@ -222,22 +871,28 @@ def _update_model_values(m, param_dict, values):
 
 # ================================================================
 
-def _aggregate_results(local_results, global_values, comm, num_procs):
+def _aggregate_results(local_results, global_values, comm, num_procs, broadcast_results=True):
 
     if num_procs > 1:
         local_results = local_results.astype(np.float64)
+        rank = comm.Get_rank()
 
-        global_results = np.zeros((np.shape(global_values)[0], np.shape(local_results)[1]), dtype=np.float64)
+        # Only rank 0 needs room for every result unless they are broadcast
+        if rank == 0 or broadcast_results:
+            global_results = np.zeros((np.shape(global_values)[0], np.shape(local_results)[1]), dtype=np.float64)
+        else:
+            global_results = None
 
         # Collect the number of result values to be sent from each process
         send_counts = np.zeros(num_procs, dtype=np.int64)
         comm.Gather(np.int64(np.size(local_results)), send_counts, root=0)
 
         # Collect the global results results onto rank 0
-        comm.Gatherv(local_results, (global_results, send_counts), root=0)
+        comm.Gatherv(local_results, (global_results, send_counts) if rank == 0 else None, root=0)
 
         # Broadcast the results to all ranks
-        comm.Bcast(global_results, root=0)
+        if broadcast_results:
+            comm.Bcast(global_results, root=0)
 
     else:
         global_results = np.copy(local_results)
@@ -246,11 +901,15 @@ def _aggregate_results(local_results, global_values, comm, num_procs):
 
 # ================================================================
 
-def _default_optimize(model, options=None, tee=False):
+def _default_optimize(model, options=None, tee=False, solver=None):
     '''
     Default optimization function used in parameter_sweep.
     Optimizes ``model`` using the IDAES default solver.
-    Raises a RuntimeError if the TerminationCondition is not optimal
+    Raises a RuntimeError if the TerminationCondition is not optimal, or a
+    SolverLimitExceeded error if the solver was stopped by its time or
+    iteration limit (see Ipopt's ``max_wall_time`` option and the
+    ``wall_time_limit`` and ``adaptive_max_iter`` options of the
+    ipopt-watertap solver)
 
     Arguments:
 
@@ -260,15 +919,27 @@ def _default_optimize(model, options=None, tee=False):
                              Default is None
         tee (options) : To display the solver log. Default it False
 
+        solver (optional) : A solver object to use instead of a new one from
+                            get_solver, e.g., to reuse a solver between cases.
+                            Default is None
+
     '''
-    solver = get_solver(options=options)
-    results = solver.solve(m, tee=tee)
+    if solver is None:
+        solver = get_solver(options=options)
+    results = solver.solve(model, tee=tee)
+
+    if results.solver.termination_condition in (pyo.TerminationCondition.maxTimeLimit,
+            pyo.TerminationCondition.maxIterations):
+        raise SolverLimitExceeded("The solver was stopped by its time or iteration limit "
+                                  f"({results.solver.termination_condition}).")
 
     if results.solver.termination_condition != pyo.TerminationCondition.optimal:
         raise RuntimeError("The solver failed to converge to an optimal solution. "
                            "This suggests that the user provided infeasible inputs "
                            "or that the model is poorly scaled.")
 
+    return results
+
 # ================================================================
 
 def _process_sweep_params(sweep_params):
@@ -293,9 +964,21 @@ def _process_sweep_params(sweep_params):
 
     return sweep_params, sampling_type
 
+def _grid_spacing(sweep_params, sampling_type):
+
+    # Distance between neighbouring points of each LinearSample
+    # of a FIXED sweep, or None for sampled sweeps
+    if sampling_type != SamplingType.FIXED:
+        return None
+    if not all(isinstance(param, LinearSample) for param in sweep_params.values()):
+        return None
+
+    return np.array([(param.upper_limit - param.lower_limit)/max(1, param.num_samples - 1)
+                     for param in sweep_params.values()])
+
 # ================================================================
 
-def _interp_nan_values(global_values, global_results):
+def _interp_nan_values(global_values, global_results, method=True, grid_spacing=None):
 
     global_results_clean = np.copy(global_results)
 
@@ -306,22 +989,1007 @@ def _interp_nan_values(global_values, global_results):
     # i.e., where the optimzation succeeded
     mask = np.isfinite(global_results[:, 0])
 
+    # Only the failed cases are interpolated, and only from the converged ones
+    if np.all(mask) or not np.any(mask):
+        return global_results_clean
+
+    if method is True:
+        # The Delaunay triangulation behind linear interpolation becomes too
+        # expensive for many parameters or points
+        if n_vals <= _MAX_LINEAR_INTERP_DIMENSIONS and np.shape(global_values)[0] <= _MAX_LINEAR_INTERP_POINTS:
+            method = 'linear'
+        else:
+            method = 'idw'
+
     # Create a list of points where good data is available
     x0 = global_values[mask, :]
+    y0 = global_results[mask, :]
+    xi = global_values[~mask, :]
+
+    if method == 'linear':
+        # A single triangulation interpolates all the outputs at once
+        yi = griddata(x0, y0, xi, method='linear', rescale=True).reshape(-1, n_outs)
+    elif method == 'idw':
+        yi = _idw_interpolation(x0, y0, xi, grid_spacing)
+    else:
+        raise ValueError(f"Unknown interpolation method: {method}")
 
-    # Interpolate to get a value for nan points where possible
-    for k in range(n_outs):
-        y0 = global_results[mask, k]
-        yi = griddata(x0, y0, global_values, method='linear', rescale=True).reshape(-1)
-        global_results_clean[~mask, k] = yi[~mask]
+    global_results_clean[~mask, :] = yi
 
     return global_results_clean
 
+def _idw_interpolation(x0, y0, xi, grid_spacing=None):
+
+    n_vals = np.shape(x0)[1]
+
+    # Scale the parameters so that neighbouring grid points (or, for sampled
+    # sweeps, the extremes of each parameter) are one unit apart
+    lower = np.min(x0, axis=0)
+    if grid_spacing is None:
+        grid_spacing = np.max(x0, axis=0) - lower
+    grid_spacing = np.where(np.asarray(grid_spacing) > 0, grid_spacing, 1.)
+
+    tree = cKDTree((x0 - lower)/grid_spacing)
+    scaled_xi = (xi - lower)/grid_spacing
+
+    num_neighbors = min(_IDW_NEIGHBORS_PER_DIMENSION*n_vals, np.shape(x0)[0])
+    dist, idx = tree.query(scaled_xi, k=num_neighbors)
+    dist = dist.reshape(len(xi), num_neighbors)
+    idx = idx.reshape(len(xi), num_neighbors)
+
+    # Inverse distance weights; a point that coincides with a converged case takes its value
+    with np.errstate(divide='ignore'):
+        weights = 1./dist**2
+    exact = dist[:, 0] == 0
+    weights[exact, :] = 0.
+    weights[exact, 0] = 1.
+    weights /= np.sum(weights, axis=1, keepdims=True)
+
+    yi = np.einsum('ij,ijk->ik', weights, y0[idx, :])
+
+    # Do not extrapolate: a point is only filled if, in every parameter, its
+    # neighbours lie on both sides of it (or all share its value)
+    offset = x0[idx, :] - xi[:, np.newaxis, :]
+    surrounded = (np.any(offset < 0, axis=1) & np.any(offset > 0, axis=1)) | np.all(offset == 0, axis=1)
+    interior = np.all(surrounded, axis=1) | exact
+    yi[~interior, :] = np.nan
+
+    return yi
+
+# ================================================================
+
+class _SolveDiagnostics:
+    """
+    Timing and solver statistics of a single case, reported in the
+    _DIAGNOSTIC_COLUMNS when parameter_sweep records diagnostics.
+    """
+
+    def __init__(self):
+        self._start_time = time.time()
+        self.iterations = np.nan
+        self.termination_condition = np.nan
+        self.reinitialized = False
+        self.nl_write_time = np.nan
+        self.solver_time = np.nan
+
+    def record(self, solve_results):
+        # Use whatever the results object returned by optimize_function
+        # provides; statistics of repeated solves are summed up
+        solver = getattr(solve_results, 'solver', None)
+        if solver is None:
+            return
+
+        termination_condition = getattr(solver, 'termination_condition', None)
+        if termination_condition in _TERMINATION_CONDITIONS:
+            self.termination_condition = _TERMINATION_CONDITIONS.index(termination_condition)
+
+        self.iterations = _accumulate(self.iterations, getattr(solver, 'iterations', None))
+        self.nl_write_time = _accumulate(self.nl_write_time, getattr(solver, 'nl_write_time', None))
+        self.solver_time = _accumulate(self.solver_time, getattr(solver, 'time', None))
+
+    def values(self):
+        return np.array([time.time() - self._start_time, self.iterations, self.termination_condition,
+                         float(self.reinitialized), self.nl_write_time, self.solver_time])
+
+def _accumulate(total, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return total
+    return value if np.isnan(total) else total + value
+
+# ================================================================
+
+def _optimize(model, optimize_function, optimize_kwargs, diagnostics):
+
+    solve_results = optimize_function(model, **optimize_kwargs)
+    if diagnostics is not None:
+        diagnostics.record(solve_results)
+
+# ================================================================
+
+def _num_result_columns(outputs, record_diagnostics):
+    return len(outputs) + (len(_DIAGNOSTIC_COLUMNS) if record_diagnostics else 0)
+
+# ================================================================
+
+def _print_diagnostics_summary(rank, diagnostics, status, num_bins=10):
+
+    # diagnostics holds the _DIAGNOSTIC_COLUMNS of the cases solved on this rank
+    wall_time = diagnostics[:, 0]
+    num_cases = len(wall_time)
+
+    print(f"Parameter sweep diagnostics (rank {rank}): {num_cases} cases, "
+          f"{np.sum(status == SweepStatus.FAILED)} failed, "
+          f"{np.sum(status == SweepStatus.LIMIT_EXCEEDED)} stopped by limits, "
+          f"{int(np.nansum(diagnostics[:, 3]))} reinitialized, "
+          f"{np.sum(wall_time):.2f} s in total")
+    if num_cases == 0:
+        return
+
+    iterations = diagnostics[np.isfinite(diagnostics[:, 1]), 1]
+    mean_iterations = np.mean(iterations) if len(iterations) > 0 else np.nan
+    print(f"    {mean_iterations:.1f} iterations per case, {np.nansum(diagnostics[:, 4]):.2f} s writing "
+          f"NL files, {np.nansum(diagnostics[:, 5]):.2f} s in the solver")
+
+    # Histogram of the wall time per case
+    counts, edges = np.histogram(wall_time, bins=num_bins)
+    scale = 50./max(1, np.max(counts))
+    for count, lower, upper in zip(counts, edges[:-1], edges[1:]):
+        print(f"    {lower:10.3e} - {upper:10.3e} s | {'#'*int(np.ceil(count*scale)):<50} {count}")
+
+# ================================================================
+
+def _run_sample(model, sweep_params, outputs, values, optimize_function, optimize_kwargs,
+        reinitialize_function, reinitialize_kwargs, warmstart_store=None, model_state=None,
+        snapshot_converged=False, record_diagnostics=False, continuation=None):
+
+    diagnostics = _SolveDiagnostics() if record_diagnostics else None
+
+    # Update the model values with a single combination from the parameter space
+    _update_model_values(model, sweep_params, values)
+
+    # Start from the nearest converged solution
+    if warmstart_store is not None:
+        warmstart_store.restore(model, values)
+
+    try:
+        # Simulate/optimize with this set of parameters
+        _optimize(model, optimize_function, optimize_kwargs, diagnostics)
+
+    except SolverLimitExceeded:
+        # A runaway solve is not retried, so that it does not stall the sweep
+        results = np.full(len(outputs), np.nan)
+        status = SweepStatus.LIMIT_EXCEEDED
+
+    except:
+        # If the run is infeasible, report nan
+        results = np.full(len(outputs), np.nan)
+        status = SweepStatus.FAILED
+
+    else:
+        # If the simulation suceeds, report stats
+        results = np.array([pyo.value(outcome) for outcome in outputs.values()])
+        status = SweepStatus.CONVERGED
+
+    if status == SweepStatus.FAILED and (model_state is not None):
+        # Discard the diverged values and retry from the last saved (converged) state
+        model_state.restore()
+        _update_model_values(model, sweep_params, values)
+        try:
+            _optimize(model, optimize_function, optimize_kwargs, diagnostics)
+        except:
+            pass
+        else:
+            results = np.array([pyo.value(outcome) for outcome in outputs.values()])
+            status = SweepStatus.CONVERGED
+
+    if status == SweepStatus.FAILED and (continuation is not None):
+        # Step from the last converged case towards this one
+        if continuation.solve(model, sweep_params, values, optimize_function, optimize_kwargs, diagnostics):
+            results = np.array([pyo.value(outcome) for outcome in outputs.values()])
+            status = SweepStatus.CONVERGED
+        else:
+            _update_model_values(model, sweep_params, values)
+
+    if status == SweepStatus.FAILED and (reinitialize_function is not None):
+        # We choose to re-initialize the model at this point
+        if diagnostics is not None:
+            diagnostics.reinitialized = True
+        try:
+            reinitialize_function(model, **reinitialize_kwargs)
+            _optimize(model, optimize_function, optimize_kwargs, diagnostics)
+        except:
+            # do we raise an error here?
+            # nothing to do
+            pass
+        else:
+            results = np.array([pyo.value(outcome) for outcome in outputs.values()])
+            status = SweepStatus.CONVERGED
+
+    if warmstart_store is not None and status == SweepStatus.CONVERGED:
+        warmstart_store.save(model, values)
+
+    if continuation is not None and status == SweepStatus.CONVERGED:
+        continuation.save(values)
+
+    if model_state is not None:
+        if status == SweepStatus.CONVERGED and snapshot_converged:
+            model_state.save()
+        elif status != SweepStatus.CONVERGED:
+            # Make sure the next case does not start from the diverged values
+            model_state.restore()
+
+    if diagnostics is not None:
+        results = np.concatenate((results, diagnostics.values()))
+
+    return results, status
+
+# ================================================================
+
+def _do_param_sweep(model, sweep_params, outputs, local_values, local_indices, optimize_function, optimize_kwargs,
+        reinitialize_function, reinitialize_kwargs, journal=None, completed=None, warmstart_store=None,
+        model_state=None, snapshot_converged=False, record_diagnostics=False, continuation=None):
+
+    # Initialize space to hold results
+    local_num_cases = np.shape(local_values)[0]
+    local_results = np.zeros((local_num_cases, _num_result_columns(outputs, record_diagnostics)))
+    local_status = np.zeros(local_num_cases, dtype=np.int64)
+
+    num_values = np.shape(local_values)[1]
+
+    # Visit the cases along a path through neighbouring points;
+    # the results are still stored in the original order
+    if warmstart_store is not None:
+        order = _hilbert_order(warmstart_store.scale(local_values))
+    else:
+        order = range(local_num_cases)
+
+    for k in order:
+        if completed is not None and local_indices[k] in completed:
+            # This case was already solved by an earlier (interrupted) run
+            local_status[k], row = completed[local_indices[k]]
+            local_results[k, :] = row[num_values:]
+            continue
+
+        local_results[k, :], local_status[k] = _run_sample(model, sweep_params, outputs, local_values[k, :],
+                optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs,
+                warmstart_store=warmstart_store, model_state=model_state, snapshot_converged=snapshot_converged,
+                record_diagnostics=record_diagnostics, continuation=continuation)
+
+        if journal is not None:
+            journal.append(local_indices[k], local_values[k, :], local_status[k], local_results[k, :])
+
+    return local_results, local_status
+
+# ================================================================
+
+def _do_param_sweep_dynamic(model, sweep_params, outputs, global_values, optimize_function, optimize_kwargs,
+        reinitialize_function, reinitialize_kwargs, comm, rank, num_procs, chunk_size, journal=None, completed=None,
+        warmstart_store=None, broadcast_results=True, model_state=None, snapshot_converged=False,
+        record_diagnostics=False, continuation=None):
+
+    from mpi4py import MPI
+
+    num_cases, num_values = np.shape(global_values)
+    num_outputs = _num_result_columns(outputs, record_diagnostics)
+
+    if rank == 0 or broadcast_results:
+        global_results = np.zeros((num_cases, num_outputs), dtype=np.float64)
+        global_status = np.zeros(num_cases, dtype=np.int64)
+    else:
+        global_results = None
+        global_status = None
+
+    if rank == 0:
+        # Cases solved by an earlier (interrupted) run are not handed out again
+        if completed:
+            for index, (status, row) in completed.items():
+                global_results[index, :] = row[num_values:]
+                global_status[index] = status
+            pending_indices = np.array([k for k in range(num_cases) if k not in completed], dtype=np.int64)
+        else:
+            pending_indices = np.arange(num_cases)
+
+        # Rank 0 acts as a dedicated manager, handing out a new chunk of
+        # cases to whichever worker reports back first
+        chunks = _generate_chunks(pending_indices, chunk_size)
+        num_active_workers = num_procs - 1
+        status = MPI.Status()
+
+        while num_active_workers > 0:
+            msg = comm.recv(source=MPI.ANY_SOURCE, tag=_RESULTS_TAG, status=status)
+            if msg is not None:
+                chunk_indices, chunk_results, chunk_status = msg
+                global_results[chunk_indices, :] = chunk_results
+                global_status[chunk_indices] = chunk_status
+
+            # A chunk of None tells the worker there is nothing left to do
+            chunk_indices = next(chunks, None)
+            comm.send(chunk_indices, dest=status.Get_source(), tag=_WORK_TAG)
+            if chunk_indices is None:
+                num_active_workers -= 1
+
+        local_indices = np.zeros(0, dtype=np.int64)
+        local_results = np.zeros((0, num_outputs), dtype=np.float64)
+        local_status = np.zeros(0, dtype=np.int64)
+
+    else:
+        local_indices = []
+        local_results = []
+        local_status = []
+
+        # Ask for the first chunk of work
+        comm.send(None, dest=0, tag=_RESULTS_TAG)
+
+        while True:
+            chunk_indices = comm.recv(source=0, tag=_WORK_TAG)
+            if chunk_indices is None:
+                break
+
+            chunk_results, chunk_status = _do_param_sweep(model, sweep_params, outputs, global_values[chunk_indices, :],
+                    chunk_indices, optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs,
+                    journal=journal, warmstart_store=warmstart_store, model_state=model_state,
+                    snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics,
+                    continuation=continuation)
+            local_indices.append(chunk_indices)
+            local_results.append(chunk_results)
+            local_status.append(chunk_status)
+
+            comm.send((chunk_indices, chunk_results, chunk_status), dest=0, tag=_RESULTS_TAG)
+
+        if local_indices:
+            local_indices = np.concatenate(local_indices)
+            local_results = np.vstack(local_results)
+            local_status = np.concatenate(local_status)
+        else:
+            local_indices = np.zeros(0, dtype=np.int64)
+            local_results = np.zeros((0, num_outputs), dtype=np.float64)
+            local_status = np.zeros(0, dtype=np.int64)
+
+    # Broadcast the results to all ranks
+    if broadcast_results:
+        comm.Bcast(global_results, root=0)
+        comm.Bcast(global_status, root=0)
+
+    return local_indices, local_results, local_status, global_results, global_status
+
+# ================================================================
+
+class _ChunkJournal:
+    """
+    Collects the status of every case solved by a process pool worker, so
+    that the parent process can write them to its checkpoint journal.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def append(self, index, values, status, results):
+        self.entries.append((int(index), int(status)))
+
+# ================================================================
+
+def _init_pool_worker(settings, shared_results, results_shape):
+
+    # Every worker builds (and initializes) its own copy of the flowsheet once
+    model = settings['build_model'](**settings['build_model_kwargs'])
+    if settings['initialize_function'] is not None:
+        settings['initialize_function'](model, **settings['initialize_kwargs'])
+
+    # Locate the sweep parameters and outputs on this copy by name; only the
+    # pyomo_object of each sample is needed to update the model values
+    sweep_params = dict()
+    for k, name in settings['sweep_param_names'].items():
+        sweep_params[k] = LinearSample(_find_component(model, name), None, None, None)
+
+    outputs = dict()
+    for k, name in settings['output_names'].items():
+        outputs[k] = _find_component(model, name)
+
+    _pool_worker['model'] = model
+    _pool_worker['sweep_params'] = sweep_params
+    _pool_worker['outputs'] = outputs
+    _pool_worker['settings'] = settings
+    _pool_worker['results'] = np.frombuffer(shared_results, dtype=np.float64).reshape(results_shape)
+
+    if settings['warmstart']:
+        _pool_worker['warmstart_store'] = _WarmStartStore(settings['global_values'])
+    else:
+        _pool_worker['warmstart_store'] = None
+
+    if settings['restore_on_failure']:
+        _pool_worker['model_state'] = ModelState(model)
+        _pool_worker['model_state'].save()
+    else:
+        _pool_worker['model_state'] = None
+
+    if settings['continuation_kwargs'] is not None:
+        _pool_worker['continuation'] = _Continuation(model, **settings['continuation_kwargs'])
+    else:
+        _pool_worker['continuation'] = None
+
+# ================================================================
+
+def _find_component(model, name):
+
+    component = model.find_component(name)
+    if component is None:
+        raise ValueError(f"The model returned by build_model has no component named {name}.")
+    return component
+
+# ================================================================
+
+def _run_pool_chunk(chunk_indices):
+
+    settings = _pool_worker['settings']
+    chunk_journal = _ChunkJournal()
+
+    with _profile_sweep(settings['profile']):
+        # Write the results straight into the array shared with the parent process
+        _pool_worker['results'][chunk_indices, :], _ = _do_param_sweep(_pool_worker['model'],
+                _pool_worker['sweep_params'], _pool_worker['outputs'], settings['global_values'][chunk_indices, :],
+                chunk_indices, settings['optimize_function'], settings['optimize_kwargs'],
+                settings['reinitialize_function'], settings['reinitialize_kwargs'], journal=chunk_journal,
+                warmstart_store=_pool_worker['warmstart_store'], model_state=_pool_worker['model_state'],
+                snapshot_converged=settings['snapshot_converged'], record_diagnostics=settings['record_diagnostics'],
+                continuation=_pool_worker['continuation'])
+
+    # The solver profiles of the chunk are sent back to the parent process
+    if settings['profile']:
+        profile_summary = solver_profiler.summary()
+        solver_profiler.clear()
+    else:
+        profile_summary = None
+
+    return chunk_journal.entries, profile_summary
+
+# ================================================================
+
+def _do_param_sweep_pool(sweep_params, outputs, global_values, optimize_function, optimize_kwargs,
+        reinitialize_function, reinitialize_kwargs, num_workers, chunk_size, build_model, build_model_kwargs,
+        initialize_function, initialize_kwargs, journal=None, completed=None, warmstart=False,
+        restore_on_failure=False, snapshot_converged=False, record_diagnostics=False, continuation_kwargs=None,
+        profile=False):
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    num_cases, num_values = np.shape(global_values)
+    num_outputs = _num_result_columns(outputs, record_diagnostics)
+
+    # The workers write their results directly into this shared memory block
+    shared_results = multiprocessing.RawArray('d', num_cases*num_outputs)
+    global_results = np.frombuffer(shared_results, dtype=np.float64).reshape(num_cases, num_outputs)
+    global_status = np.zeros(num_cases, dtype=np.int64)
+
+    # Cases solved by an earlier (interrupted) run are not handed out again
+    if completed:
+        for index, (status, row) in completed.items():
+            global_results[index, :] = row[num_values:]
+            global_status[index] = status
+        pending_indices = np.array([k for k in range(num_cases) if k not in completed], dtype=np.int64)
+    else:
+        pending_indices = np.arange(num_cases)
+
+    # Everything a worker needs to set up its own model; this is sent to each worker once
+    settings = {'build_model': build_model,
+                'build_model_kwargs': build_model_kwargs,
+                'initialize_function': initialize_function,
+                'initialize_kwargs': initialize_kwargs,
+                'sweep_param_names': {k: v.pyomo_object.name for k, v in sweep_params.items()},
+                'output_names': {k: v.name for k, v in outputs.items()},
+                'global_values': global_values,
+                'optimize_function': optimize_function,
+                'optimize_kwargs': optimize_kwargs,
+                'reinitialize_function': reinitialize_function,
+                'reinitialize_kwargs': reinitialize_kwargs,
+                'warmstart': warmstart,
+                'restore_on_failure': restore_on_failure,
+                'snapshot_converged': snapshot_converged,
+                'record_diagnostics': record_diagnostics,
+                'continuation_kwargs': continuation_kwargs,
+                'profile': profile}
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_pool_worker,
+            initargs=(settings, shared_results, (num_cases, num_outputs))) as executor:
+
+        futures = [executor.submit(_run_pool_chunk, chunk_indices)
+                   for chunk_indices in _generate_chunks(pending_indices, chunk_size)]
+
+        for future in as_completed(futures):
+            entries, profile_summary = future.result()
+            if profile_summary is not None:
+                solver_profiler.merge(profile_summary)
+
+            for index, status in entries:
+                global_status[index] = status
+
+                if journal is not None:
+                    journal.append(index, global_values[index, :], status, global_results[index, :])
+
+    return np.copy(global_results), global_status
+
+# ================================================================
+
+def _pipeline_supported():
+
+    # The lanes of a pipelined sweep each write their own NL, solution and log
+    # files, which requires the thread-local TempfileManager of newer Pyomo versions
+    try:
+        from pyomo.common.multithread import MultiThreadWrapper
+    except ImportError:
+        return False
+    return isinstance(TempfileManager, MultiThreadWrapper)
+
+# ================================================================
+
+def _pipeline_kwargs(kwargs):
+
+    # A solver object keeps the state of the solve it is running,
+    # so every lane of the pipeline needs its own
+    kwargs = dict(kwargs)
+    solver = kwargs.get('solver', None)
+    if solver is not None:
+        kwargs['solver'] = pyo.SolverFactory(solver.name, options=dict(solver.options))
+    return kwargs
+
+# ================================================================
+
+def _do_param_sweep_pipelined(model, sweep_params, outputs, local_values, local_indices, optimize_function,
+        optimize_kwargs, reinitialize_function, reinitialize_kwargs, journal=None, completed=None,
+        model_state=None, snapshot_converged=False, record_diagnostics=False, num_lanes=2):
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    # Initialize space to hold results
+    local_num_cases = np.shape(local_values)[0]
+    local_results = np.zeros((local_num_cases, _num_result_columns(outputs, record_diagnostics)))
+    local_status = np.zeros(local_num_cases, dtype=np.int64)
+
+    num_values = np.shape(local_values)[1]
+
+    # Every lane solves its cases on its own copy of the model in a separate thread. The
+    # solver runs as a subprocess, during which the thread does not hold the GIL, so one
+    # lane writes the NL file of its next case while the solver of the other one runs
+    lanes = [(model, sweep_params, outputs, model_state, optimize_kwargs, reinitialize_kwargs)]
+    for _ in range(1, num_lanes):
+        clone = model.clone()
+        lane_sweep_params = {k: LinearSample(pyo.ComponentUID(v.pyomo_object, context=model).find_component_on(clone),
+                             None, None, None) for k, v in sweep_params.items()}
+        lane_outputs = {k: pyo.ComponentUID(v, context=model).find_component_on(clone) for k, v in outputs.items()}
+        if model_state is not None:
+            # The clone starts from the state the model was saved in
+            lane_model_state = ModelState(clone)
+            lane_model_state.save()
+        else:
+            lane_model_state = None
+        lanes.append((clone, lane_sweep_params, lane_outputs, lane_model_state,
+                      _pipeline_kwargs(optimize_kwargs), _pipeline_kwargs(reinitialize_kwargs)))
+
+    def run_case(lane, k):
+        lane_model, lane_sweep_params, lane_outputs, lane_model_state, lane_optimize_kwargs, \
+                lane_reinitialize_kwargs = lanes[lane]
+        return _run_sample(lane_model, lane_sweep_params, lane_outputs, local_values[k, :],
+                optimize_function, lane_optimize_kwargs, reinitialize_function, lane_reinitialize_kwargs,
+                model_state=lane_model_state, snapshot_converged=snapshot_converged,
+                record_diagnostics=record_diagnostics)
+
+    free_lanes = list(range(num_lanes))
+    running = dict()
+
+    def collect(futures):
+        for future in futures:
+            lane, k = running.pop(future)
+            local_results[k, :], local_status[k] = future.result()
+            free_lanes.append(lane)
+
+            if journal is not None:
+                journal.append(local_indices[k], local_values[k, :], local_status[k], local_results[k, :])
+
+    with ThreadPoolExecutor(max_workers=num_lanes) as executor:
+        for k in range(local_num_cases):
+            if completed is not None and local_indices[k] in completed:
+                # This case was already solved by an earlier (interrupted) run
+                local_status[k], row = completed[local_indices[k]]
+                local_results[k, :] = row[num_values:]
+                continue
+
+            if not free_lanes:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            lane = free_lanes.pop(0)
+            running[executor.submit(run_case, lane, k)] = (lane, k)
+
+        collect(list(running))
+
+    return local_results, local_status
+
+# ================================================================
+
+def _refinement_candidates(scaled_values, refine_values, converged, tolerance, min_spacing, max_candidates):
+
+    # Midpoints of the edges between neighbouring cases that straddle the
+    # feasibility boundary or across which the refined output changes by more
+    # than tolerance (relative to its range), most important first
+    num_cases, num_params = np.shape(scaled_values)
+    if num_cases < 2 or max_candidates < 1:
+        return np.zeros((0, num_params))
+
+    tree = cKDTree(scaled_values)
+    num_neighbors = min(2*num_params, num_cases - 1)
+    dist, idx = tree.query(scaled_values, k=num_neighbors + 1)
+
+    # Every edge from a case to its neighbours (the first neighbour is the case itself)
+    first = np.repeat(np.arange(num_cases), num_neighbors)
+    second = idx[:, 1:].reshape(-1)
+    length = dist[:, 1:].reshape(-1)
+
+    # Both halves of a refined edge must stay above the finest spacing
+    keep = length >= 2*min_spacing
+    first, second, length = first[keep], second[keep], length[keep]
+
+    boundary = converged[first] != converged[second]
+    both_converged = converged[first] & converged[second]
+
+    finite = np.isfinite(refine_values) & converged
+    if np.any(finite):
+        output_range = np.ptp(refine_values[finite])
+    else:
+        output_range = 0.
+    change = np.zeros(len(first))
+    if output_range > 0:
+        change[both_converged] = np.abs(refine_values[first[both_converged]] -
+                                        refine_values[second[both_converged]])/output_range
+    change[boundary] = np.inf
+
+    selected = change > tolerance
+    if not np.any(selected):
+        return np.zeros((0, num_params))
+
+    # Rank by the change and then by the length of the edge
+    order = np.lexsort((-length[selected], -change[selected]))
+    first, second = first[selected][order], second[selected][order]
+    midpoints = 0.5*(scaled_values[first, :] + scaled_values[second, :])
+
+    # Drop midpoints shared by several edges and those already solved
+    _, unique = np.unique(np.round(midpoints/min_spacing).astype(np.int64), axis=0, return_index=True)
+    midpoints = midpoints[np.sort(unique), :]
+    dist, _ = tree.query(midpoints, k=1)
+    midpoints = midpoints[dist >= 0.5*min_spacing, :]
+
+    return midpoints[:max_candidates, :]
+
+# ================================================================
+
+def _do_param_sweep_adaptive(model, sweep_params, outputs, initial_values, refine_output, refine_tolerance,
+        num_samples, optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs, comm, rank,
+        num_procs, warmstart_store=None, model_state=None, snapshot_converged=False, record_diagnostics=False,
+        continuation=None):
+
+    # The parameters are refined in [0, 1], scaled by the limits of each AdaptiveSample
+    lower = np.array([param.lower_limit for param in sweep_params.values()], dtype=np.float64)
+    span = np.array([param.upper_limit - param.lower_limit for param in sweep_params.values()], dtype=np.float64)
+    span = np.where(span > 0, span, 1.)
+
+    # No edge is split more than _MAX_REFINEMENT_LEVELS times
+    coarse_spacing = min(1./max(1, param.num_samples - 1) for param in sweep_params.values())
+    min_spacing = coarse_spacing/2**_MAX_REFINEMENT_LEVELS
+
+    # Every round adds at most as many cases as the coarse grid holds
+    round_size = max(num_procs, np.shape(initial_values)[0])
+
+    num_values = len(sweep_params)
+    num_columns = _num_result_columns(outputs, record_diagnostics)
+
+    global_values = np.zeros((0, num_values))
+    global_results = np.zeros((0, num_columns))
+    global_status = np.zeros(0, dtype=np.int64)
+    local_values = np.zeros((0, num_values))
+    local_results = np.zeros((0, num_columns))
+    local_status = np.zeros(0, dtype=np.int64)
+
+    round_values = np.asarray(initial_values)[:num_samples, :]
+
+    while np.shape(round_values)[0] > 0:
+        # Every rank solves its share of the cases of this round ...
+        local_indices = _divide_indices(np.shape(round_values)[0], rank, num_procs)
+        round_local_values = round_values[local_indices, :]
+
+        round_local_results, round_local_status = _do_param_sweep(model, sweep_params, outputs,
+                round_local_values, local_indices, optimize_function, optimize_kwargs, reinitialize_function,
+                reinitialize_kwargs, warmstart_store=warmstart_store, model_state=model_state,
+                snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics,
+                continuation=continuation)
+
+        # ... and all of them are shared, so every rank can take part in the next round
+        round_results = _aggregate_results(round_local_results, round_values, comm, num_procs)
+        round_status = _aggregate_results(round_local_status.reshape(-1, 1), round_values, comm, num_procs)
+
+        local_values = np.vstack((local_values, round_local_values))
+        local_results = np.vstack((local_results, round_local_results))
+        local_status = np.concatenate((local_status, round_local_status))
+
+        global_values = np.vstack((global_values, round_values))
+        global_results = np.vstack((global_results, round_results))
+        global_status = np.concatenate((global_status, round_status.reshape(-1).astype(np.int64)))
+
+        # Rank 0 picks the cases of the next round
+        if rank == 0:
+            round_values = _refinement_candidates((global_values - lower)/span, global_results[:, refine_output],
+                    global_status == SweepStatus.CONVERGED, refine_tolerance, min_spacing,
+                    min(round_size, num_samples - np.shape(global_values)[0]))
+            round_values = lower + round_values*span
+        if num_procs > 1:
+            round_values = comm.bcast(round_values, root=0)
+
+    return local_values, local_results, local_status, global_values, global_results, global_status
+
+# ================================================================
+
+class _P2Quantile:
+    """
+    Streaming estimate of the ``p``-quantile of a sequence of values with the P-square
+    algorithm of Jain and Chlamtac, which keeps five markers instead of the values.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self._initial = []
+        self._heights = None
+
+    def update(self, x):
+        if self._heights is None:
+            self._initial.append(float(x))
+            if len(self._initial) == 5:
+                p = self.p
+                self._heights = sorted(self._initial)
+                self._positions = [0., 1., 2., 3., 4.]
+                self._desired = [0., 2*p, 4*p, 2 + 2*p, 4.]
+                self._increments = [0., p/2, p, (1 + p)/2, 1.]
+            return
+
+        q, n = self._heights, self._positions
+
+        # Find the cell of x, extending the extreme markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = max(i for i in range(4) if q[i] <= x)
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1. if d > 0 else -1.
+                height = q[i] + d/(n[i + 1] - n[i - 1])*((n[i] - n[i - 1] + d)*(q[i + 1] - q[i])/(n[i + 1] - n[i]) +
+                                                        (n[i + 1] - n[i] - d)*(q[i] - q[i - 1])/(n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    j = i + int(d)
+                    height = q[i] + d*(q[j] - q[i])/(n[j] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        if self._heights is not None:
+            return self._heights[2]
+        if self._initial:
+            return float(np.quantile(self._initial, self.p))
+        return np.nan
+
+# ================================================================
+
+class _RunningStatistics:
+    """
+    Running mean, variance and quantiles of the converged outputs of a sequential Monte
+    Carlo sweep, updated batch by batch without keeping the values.
+    """
+
+    def __init__(self, num_outputs, quantiles):
+        self.count = np.zeros(num_outputs)
+        self.mean = np.zeros(num_outputs)
+        self._m2 = np.zeros(num_outputs)
+        self._quantiles = [[_P2Quantile(p) for p in quantiles] for _ in range(num_outputs)]
+
+    def update(self, values):
+        for k in range(np.shape(values)[1]):
+            column = values[np.isfinite(values[:, k]), k]
+            if len(column) == 0:
+                continue
+
+            # Merge the mean and the sum of squared deviations of the batch (Chan et al.)
+            count = self.count[k] + len(column)
+            delta = np.mean(column) - self.mean[k]
+            self._m2[k] += np.sum((column - np.mean(column))**2) + delta**2*self.count[k]*len(column)/count
+            self.mean[k] += delta*len(column)/count
+            self.count[k] = count
+
+            for estimator in self._quantiles[k]:
+                for x in column:
+                    estimator.update(x)
+
+    def variance(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 1, self._m2/(self.count - 1), np.nan)
+
+    def half_width(self, z):
+        # Half-width of the confidence interval of the mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return z*np.sqrt(self.variance()/self.count)
+
+    def quantiles(self):
+        return np.array([[estimator.value() for estimator in column] for column in self._quantiles])
+
+# ================================================================
+
+def _do_param_sweep_sequential(model, sweep_params, outputs, global_values, case_order, target_outputs,
+        tolerance, atol, batch_size, quantiles, confidence, optimize_function, optimize_kwargs, reinitialize_function,
+        reinitialize_kwargs, comm, rank, num_procs, broadcast_results=True, warmstart_store=None,
+        model_state=None, snapshot_converged=False, record_diagnostics=False, continuation=None):
+
+    from scipy.stats import norm
+
+    z = norm.ppf(0.5 + confidence/2)
+
+    statistics = _RunningStatistics(len(target_outputs), quantiles) if rank == 0 else None
+    trace = []
+
+    solved_indices = []
+    local_values, local_results, local_status = [], [], []
+    global_results, global_status = [], []
+
+    num_solved = 0
+    converged = False
+
+    while not converged and num_solved < len(case_order):
+        batch_indices = case_order[num_solved:num_solved + batch_size]
+        batch_values = global_values[batch_indices, :]
+        num_solved += len(batch_indices)
+
+        # Every rank solves its share of the batch ...
+        local_indices = _divide_indices(len(batch_indices), rank, num_procs)
+        batch_local_values = batch_values[local_indices, :]
+
+        batch_local_results, batch_local_status = _do_param_sweep(model, sweep_params, outputs,
+                batch_local_values, local_indices, optimize_function, optimize_kwargs, reinitialize_function,
+                reinitialize_kwargs, warmstart_store=warmstart_store, model_state=model_state,
+                snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics,
+                continuation=continuation)
+
+        local_values.append(batch_local_values)
+        local_results.append(batch_local_results)
+        local_status.append(batch_local_status)
+
+        # ... and rank 0 updates the statistics with the whole batch
+        batch_results = _aggregate_results(batch_local_results, batch_values, comm, num_procs,
+                broadcast_results=broadcast_results)
+        batch_status = _aggregate_results(batch_local_status.reshape(-1, 1), batch_values, comm, num_procs,
+                broadcast_results=broadcast_results)
+
+        solved_indices.append(batch_indices)
+        if batch_results is not None:
+            global_results.append(batch_results)
+            global_status.append(batch_status.reshape(-1).astype(np.int64))
+
+        if rank == 0:
+            statistics.update(batch_results[batch_status.reshape(-1) == SweepStatus.CONVERGED, :][:, target_outputs])
+            half_width = statistics.half_width(z)
+
+            # The number of cases, the number of converged values of the least
+            # covered output, and the statistics of every target output
+            trace.append(np.concatenate(([num_solved, np.min(statistics.count)],
+                    np.column_stack((statistics.mean, half_width, statistics.quantiles())).reshape(-1))))
+
+            # The absolute tolerance lets outputs with a mean near zero converge
+            with np.errstate(invalid='ignore'):
+                converged = bool(np.all(half_width <= atol + tolerance*np.abs(statistics.mean)))
+
+        if num_procs > 1:
+            converged = comm.bcast(converged, root=0)
+
+    # At least one batch is always solved
+    global_values = global_values[np.concatenate(solved_indices), :]
+
+    local_values = np.vstack(local_values)
+    local_results = np.vstack(local_results)
+    local_status = np.concatenate(local_status)
+    if rank == 0 or broadcast_results:
+        global_results = np.vstack(global_results)
+        global_status = np.concatenate(global_status)
+    else:
+        global_results, global_status = None, None
+
+    trace = np.array(trace) if rank == 0 else None
+
+    return local_values, local_results, local_status, global_values, global_results, global_status, trace
+
+# ================================================================
+
+def _init_checkpoint(checkpoint_dir, resume, data_header, global_values, comm, rank, num_procs):
+
+    if checkpoint_dir is None:
+        if resume:
+            raise ValueError("A checkpoint_dir is required to resume a parameter sweep.")
+        return None, None
+
+    if rank == 0:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        if not resume:
+            # Start from a clean slate so stale journals are never mixed into a later resume
+            for fname in glob.glob(os.path.join(checkpoint_dir, 'journal_*.csv')):
+                os.remove(fname)
+
+    if num_procs > 1:
+        comm.Barrier()
+
+    if resume:
+        completed = _read_checkpoint_journals(checkpoint_dir, data_header, global_values)
+    else:
+        completed = None
+
+    # Make sure every rank is done reading before any journal is appended to
+    if num_procs > 1:
+        comm.Barrier()
+
+    journal = _SweepJournal(checkpoint_dir, rank, f'index,status,{data_header}', append=resume)
+
+    return journal, completed
+
+# ================================================================
+
+def _profile_sweep(profile):
+
+    # Profile the solves of the sweep in the process-wide collector
+    if profile:
+        return solver_profiler.profile('parameter_sweep')
+    return contextlib.nullcontext()
+
+# ================================================================
+
+def _write_profile(fname, comm, rank, num_procs):
+
+    if num_procs > 1:
+        summaries = comm.gather(solver_profiler.summary(), root=0)
+    else:
+        summaries = [solver_profiler.summary()]
+
+    if rank == 0:
+        dirname = os.path.dirname(fname)
+        if dirname != '':
+            os.makedirs(dirname, exist_ok=True)
+        solver_profiler.write_json(fname, summary=merge_summaries(summaries))
+
+# ================================================================
+
+def _save_results(fname, values, status, results, data_header, metadata, delimiter=','):
+
+    if is_binary_results_file(fname):
+        # Full precision columns, including the status of every case
+        write_sweep_results(fname, values, status, results, metadata)
+    else:
+        np.savetxt(fname, np.hstack((values, results)), header=data_header, delimiter=delimiter, fmt='%.6e')
+
 # ================================================================
 
 def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_function=_default_optimize,
         optimize_kwargs=None, reinitialize_function=None, reinitialize_kwargs=None,
-        mpi_comm=None, debugging_data_dir=None, interpolate_nan_outputs=False, num_samples=None, seed=None):
+        mpi_comm=None, debugging_data_dir=None, interpolate_nan_outputs=False, num_samples=None, seed=None,
+        dynamic_scheduling=False, chunk_size=1, checkpoint_dir=None, resume=False,
+        warmstart=False, broadcast_results=False, num_workers=None, build_model=None, build_model_kwargs=None,
+        initialize_function=None, initialize_kwargs=None, restore_on_failure=False, snapshot_converged=False,
+        record_diagnostics=False, refine_output=None, refine_tolerance=0.05, continuation=False,
+        continuation_kwargs=None, mc_tolerance=None, mc_kwargs=None, profile_file=None, pipeline=False,
+        random_streams=False):
 
     '''
     This function offers a general way to perform repeated optimizations
@@ -346,7 +2014,15 @@ def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_fu
                   ``outputs['Short/Pretty-print Name'] = model.fs.variable_or_expression_to_report``.
 
         results_file (optional) : The path and file name where the results are to be saved;
-                                   subdirectories will be created as needed.
+                                   subdirectories will be created as needed. If the extension is
+                                   ``.h5``/``.hdf5`` (requires h5py) or ``.npz``, the parameter
+                                   values, outputs and status of every case are saved at full
+                                   precision along with the sweep metadata, and can be read back
+                                   with ``watertap.tools.sweep_results.SweepResults``; the files
+                                   in ``debugging_data_dir`` then use the same format. With MPI,
+                                   every rank writes its own cases into the file in turn (except
+                                   for adaptive and ``mc_tolerance`` sweeps, which rank 0 writes).
+                                   Otherwise a CSV file is written.
 
         optimize_function (optional) : A user-defined function to perform the optimization of flowsheet
                                        ``model`` and loads the results back into ``model``. The first
@@ -382,38 +2058,256 @@ def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_fu
                                              of np.nan will be replaced with a value obtained via
                                              a linear interpolation of their surrounding valid neighbors.
                                              If true, a second output file with the extension "_clean"
-                                             will be saved alongside the raw (un-interpolated) values. 
+                                             will be saved alongside the raw (un-interpolated) values.
+                                             Sweeps of more than three parameters or 100,000 cases
+                                             use inverse distance weighting of the nearest valid
+                                             neighbors instead; pass 'linear' or 'idw' to choose the
+                                             method explicitly.
 
         num_samples (optional) : If the user is using sampling techniques rather than a linear grid
                                  of values, they need to set the number of samples
 
         seed (optional) : If the user is using a random sampling technique, this sets the seed
 
+        dynamic_scheduling (optional) : If True and more than one MPI rank is available, rank 0 acts
+                                        as a manager that hands out chunks of ``chunk_size`` cases to
+                                        the remaining ranks on demand, rather than splitting the
+                                        parameter space into one fixed slice per rank. This balances
+                                        the load when solve times vary strongly across the parameter
+                                        space. The default is False.
+
+        chunk_size (optional) : The number of cases handed to a worker at a time when
+                                ``dynamic_scheduling`` is True. The default is 1.
+
+        checkpoint_dir (optional) : Directory in which every rank appends each finished case
+                                    (row index, status, parameter values and outputs) to its own
+                                    journal file as soon as it is solved. If None no journal
+                                    is written.
+
+        resume (optional) : If True, read the journals in ``checkpoint_dir`` left by an earlier,
+                            interrupted run of the same sweep and only solve the cases that are
+                            not recorded there. Requires ``checkpoint_dir``. The default is False.
+
+        warmstart (optional) : If True, each rank solves its cases in the order of a Hilbert
+                               curve through the parameter space (scaled by the range of each
+                               parameter) and, before every solve, loads the model with the values
+                               of the unfixed variables of the nearest case that already converged.
+                               The default is False.
+
+        broadcast_results (optional) : If True, the combined results are sent back to every MPI
+                                       rank and returned there. Otherwise they are only collected
+                                       on rank 0, so that the memory needed on the other ranks
+                                       does not grow with the size of the parameter space. The
+                                       default is False.
+
+        num_workers (optional) : If not None, the sweep is run by a pool of ``num_workers`` local
+                                 processes instead of MPI ranks, handing out chunks of
+                                 ``chunk_size`` cases to whichever worker is idle. Requires
+                                 ``build_model``; cannot be combined with ``mpi_comm``. The default
+                                 is None.
+
+        build_model (optional) : A picklable (i.e., module-level) function that returns a new
+                                 flowsheet equivalent to ``model``, called once by every process
+                                 pool worker. The sweep parameters and outputs are located on the
+                                 new flowsheet by their names on ``model``.
+
+        build_model_kwargs (optional) : Dictionary of kwargs to pass into every call to
+                                        ``build_model``. The default uses no kwargs.
+
+        initialize_function (optional) : A picklable function called by every process pool worker
+                                         on its new flowsheet, e.g., to initialize it, before any
+                                         case is solved, as ``initialize_function(model,
+                                         **initialize_kwargs)``. The default is None.
+
+        initialize_kwargs (optional) : Dictionary of kwargs to pass into ``initialize_function``.
+                                       The default uses no kwargs.
+
+        restore_on_failure (optional) : If True, the state of every variable of ``model`` (values,
+                                        fixed flags, bounds and scaling factors) is saved before
+                                        the sweep starts. Whenever a case fails, that state is
+                                        restored and the case is solved once more before calling
+                                        ``reinitialize_function``, and it is restored again if the
+                                        case still fails, so the next case never starts from
+                                        diverged values. The default is False.
+
+        snapshot_converged (optional) : If True (and ``restore_on_failure`` is True), the saved state
+                                        is replaced by the state of every case that converges, so
+                                        failures are undone back to the most recent converged case
+                                        rather than to the initial state. The default is False.
+
+        record_diagnostics (optional) : If True, six columns are appended to the outputs of every
+                                        case: the wall time, the number of solver iterations, the
+                                        termination condition (as its position in
+                                        ``pyomo.environ.TerminationCondition``), whether
+                                        ``reinitialize_function`` was called (0 or 1), the time
+                                        spent writing the NL file and the time spent in the solver.
+                                        The solver statistics are taken from the results object
+                                        returned by ``optimize_function`` (nan if it returns none),
+                                        and every rank prints a summary including a histogram of
+                                        the wall time per case. The default is False.
+
+        refine_output (optional) : The name (a key of ``outputs``) of the output that guides the
+                                   refinement of a sweep of ``AdaptiveSample`` parameters. The
+                                   default is the first output.
+
+        refine_tolerance (optional) : A sweep of ``AdaptiveSample`` parameters starts from the grid
+                                      of their ``num_samples`` values and, in synchronized rounds,
+                                      adds the midpoint between neighbouring cases whenever one of
+                                      them fails and the other converges, or ``refine_output``
+                                      changes between them by more than ``refine_tolerance`` times
+                                      its range. This stops when ``num_samples`` cases (the
+                                      ``num_samples`` argument of ``parameter_sweep``) have been
+                                      solved or no pair of neighbours needs refining. The default
+                                      is 0.05.
+
+        continuation (optional) : If True, a failed case is retried (before calling
+                                  ``reinitialize_function``) by continuation from the last converged
+                                  case: starting from its solution, the sweep parameters are moved
+                                  towards the values of the failed case in steps that are halved
+                                  after every failed solve and doubled after every converged one.
+                                  The default is False.
+
+        continuation_kwargs (optional) : Dictionary of settings of the continuation: ``initial_step``
+                                         (the first step as a fraction of the distance to the failed
+                                         case, default 0.5), ``min_step`` (the continuation gives up
+                                         once the step falls below this fraction, default 1/64),
+                                         ``max_steps`` (the maximum number of solves, default 20)
+                                         and ``predictor`` (whether each step starts from the secant
+                                         extrapolation of the two previous steps, default True).
+
+        mc_tolerance (optional) : If not None, a sweep of random (``UniformSample``, ``NormalSample``)
+                                  or quasi-random (``SobolSample``, ``HaltonSample``) parameters is
+                                  solved in batches, updating running estimates of the mean, the
+                                  variance and a few quantiles of the converged outputs after each
+                                  batch. It stops as soon as the half-width of the confidence
+                                  interval of the mean of every target output is at most
+                                  ``atol + mc_tolerance*abs(mean)`` (with ``atol`` from
+                                  ``mc_kwargs``, default 0), or after ``num_samples`` cases. The statistics after every batch are written
+                                  to the CSV file ``convergence_`` + ``results_file``. The default is
+                                  None.
+
+        mc_kwargs (optional) : Dictionary of settings of the convergence-driven Monte Carlo sweep:
+                               ``outputs`` (the names of the target outputs, default all outputs),
+                               ``batch_size`` (the number of cases per batch, default 64 or the
+                               number of MPI ranks if larger), ``quantiles`` (default
+                               ``(0.05, 0.5, 0.95)``), ``confidence`` (the confidence level of
+                               the interval, default 0.95) and ``atol`` (the absolute tolerance of
+                               the half-width, in the units of the outputs, either one number or
+                               a dictionary by output name, default 0; needed for outputs whose
+                               mean may be close to zero, e.g., slacks or net costs).
+
+        profile_file (optional) : If not None, every ipopt-watertap solve of the sweep records the
+                                  time of each of its steps and Ipopt's timing statistics in
+                                  ``watertap.core.util.profiling.solver_profiler``, and the
+                                  aggregated profiles of all ranks (or workers), including any
+                                  solves profiled before the sweep, are written as JSON to
+                                  ``profile_file``. The default is None.
+
+        pipeline (optional) : If True, the cases of each rank are solved alternately on ``model``
+                              and on a clone of it, each in its own thread, so that the NL file
+                              of the next case is written while the solver runs as a subprocess
+                              for the previous one. Every case starts from the solution of the
+                              case before the previous one. ``optimize_function`` and
+                              ``reinitialize_function`` must not share state between calls; a
+                              ``solver`` object in ``optimize_kwargs`` or ``reinitialize_kwargs``
+                              is copied for the clone. Requires Pyomo 6.4.2 or later (with a
+                              thread-local ``TempfileManager``); with older versions, a warning
+                              is issued and the cases are solved one at a time. Cannot be
+                              combined with ``num_workers``, ``dynamic_scheduling``,
+                              ``warmstart``, ``continuation``, ``mc_tolerance``,
+                              ``profile_file`` or adaptive sampling. The default is False.
+
+        random_streams (optional) : If True, ``UniformSample``/``NormalSample`` parameters are
+                                    drawn from ``numpy.random.Generator`` streams derived from
+                                    ``seed`` (one per parameter and block of rows), and each rank
+                                    draws only its own cases without a broadcast. The cases are
+                                    not sorted and differ from those drawn with the same seed by
+                                    default, which come from the global ``np.random`` state on
+                                    rank 0 as in earlier versions. The default is False.
+
     Returns:
 
         save_data : A list were the first N columns are the values of the parameters passed
                     by ``sweep_params`` and the remaining columns are the values of the 
-                    simulation identified by the ``outputs`` argument.
+                    simulation identified by the ``outputs`` argument. On ranks other than
+                    rank 0, None is returned unless ``broadcast_results`` is True.
     '''
 
-    # Get an MPI communicator
-    comm, rank, num_procs = _init_mpi(mpi_comm)
+    if num_workers is None:
+        # Get an MPI communicator
+        comm, rank, num_procs = _init_mpi(mpi_comm)
+
+    else:
+        # The sweep is run by a pool of local processes instead
+        if build_model is None:
+            raise ValueError("A build_model function is required to run a parameter sweep with num_workers.")
+        if mpi_comm is not None:
+            raise ValueError("num_workers cannot be combined with an MPI communicator.")
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be a positive integer but {num_workers} was provided.")
+
+        comm, rank, num_procs = None, 0, 1
 
     # Convert sweep_params to LinearSamples
     sweep_params, sampling_type = _process_sweep_params(sweep_params)
 
+    if sampling_type == SamplingType.ADAPTIVE:
+        # The cases of each refinement round depend on the results of the previous one
+        if num_samples is None:
+            raise ValueError("An adaptive parameter sweep requires num_samples, the maximum number of cases.")
+        if num_workers is not None or dynamic_scheduling or checkpoint_dir is not None:
+            raise ValueError("An adaptive parameter sweep cannot be combined with num_workers, "
+                             "dynamic_scheduling or checkpoint_dir.")
+        if refine_output is None:
+            refine_output = next(iter(outputs))
+        if refine_output not in outputs:
+            raise ValueError(f"refine_output {refine_output} is not one of the outputs.")
+
+    if mc_tolerance is not None:
+        # The number of cases depends on the statistics of the earlier batches
+        if sampling_type not in (SamplingType.RANDOM, SamplingType.SOBOL, SamplingType.HALTON):
+            raise ValueError("A Monte Carlo sweep with mc_tolerance requires random or quasi-random samples.")
+        if num_samples is None or num_samples < 1:
+            raise ValueError("A Monte Carlo sweep with mc_tolerance requires num_samples, the maximum number of cases.")
+        if num_workers is not None or dynamic_scheduling or checkpoint_dir is not None:
+            raise ValueError("A Monte Carlo sweep with mc_tolerance cannot be combined with num_workers, "
+                             "dynamic_scheduling or checkpoint_dir.")
+
+        mc_settings = {'outputs': list(outputs),
+                       'batch_size': max(64, num_procs),
+                       'quantiles': (0.05, 0.5, 0.95),
+                       'confidence': 0.95,
+                       'atol': 0.}
+        if mc_kwargs is not None:
+            mc_settings.update(mc_kwargs)
+        for name in mc_settings['outputs']:
+            if name not in outputs:
+                raise ValueError(f"The Monte Carlo target output {name} is not one of the outputs.")
+
+        # The absolute tolerance of every target output
+        if isinstance(mc_settings['atol'], dict):
+            mc_atol = np.array([mc_settings['atol'].get(name, 0.) for name in mc_settings['outputs']], dtype=float)
+        else:
+            mc_atol = np.full(len(mc_settings['outputs']), mc_settings['atol'], dtype=float)
+
+    if pipeline:
+        # The cases are solved in the plain (static) order, two at a time
+        if num_workers is not None or dynamic_scheduling or warmstart or continuation \
+                or mc_tolerance is not None or sampling_type == SamplingType.ADAPTIVE \
+                or profile_file is not None:
+            raise ValueError("pipeline cannot be combined with num_workers, dynamic_scheduling, warmstart, "
+                             "continuation, mc_tolerance, profile_file or adaptive sampling.")
+        if not _pipeline_supported():
+            warnings.warn("A pipelined parameter sweep requires Pyomo 6.4.2 or later (with a "
+                          "thread-local TempfileManager), solving the cases one at a time instead.")
+            pipeline = False
+
     # Set the seed before sampling 
     np.random.seed(seed)
 
     # Enumerate/Sample the parameter space
-    global_values = _build_combinations(sweep_params, sampling_type, num_samples, comm, rank, num_procs)
-
-    # divide the workload between processors
-    local_values = _divide_combinations(global_values, rank, num_procs)
-
-    # Initialize space to hold results
-    local_num_cases = np.shape(local_values)[0]
-    local_results = np.zeros((local_num_cases, len(outputs)))
+    global_values = _build_combinations(sweep_params, sampling_type, num_samples, comm, rank, num_procs, seed=seed,
+                                        random_streams=random_streams)
 
     # Set up optimize_kwargs
     if optimize_kwargs is None:
@@ -421,48 +2315,155 @@ def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_fu
     # Set up reinitialize_kwargs
     if reinitialize_kwargs is None:
         reinitialize_kwargs = dict()
+    # Set up the kwargs of the process pool workers
+    if build_model_kwargs is None:
+        build_model_kwargs = dict()
+    if initialize_kwargs is None:
+        initialize_kwargs = dict()
+
+    # Write a header string for all data files
+    output_names = list(outputs) + (list(_DIAGNOSTIC_COLUMNS) if record_diagnostics else [])
+    data_header = ','.join(itertools.chain(sweep_params,output_names))
+
+    # Describe the sweep in binary results files
+    metadata = {'parameters': list(sweep_params),
+                'outputs': output_names,
+                'parameter_components': [v.pyomo_object.name for v in sweep_params.values()],
+                'output_components': [v.name for v in outputs.values()],
+                'sampling_type': sampling_type.name,
+                'num_samples': None if num_samples is None else int(num_samples),
+                'seed': None if seed is None else int(seed),
+                'model': model.name}
+
+    # Set up the checkpoint journals
+    journal, completed = _init_checkpoint(checkpoint_dir, resume, data_header, global_values, comm, rank, num_procs)
+
+    # Set up the store of converged solutions used for warm starting
+    warmstart_store = _WarmStartStore(global_values) if warmstart else None
+
+    # Save the (initialized) state of the model to fall back to after a failure
+    if restore_on_failure:
+        model_state = ModelState(model)
+        model_state.save()
+    else:
+        model_state = None
+
+    # Set up the continuation from the last converged case
+    if continuation and continuation_kwargs is None:
+        continuation_kwargs = dict()
+    if continuation and num_workers is None:
+        continuation_store = _Continuation(model, **continuation_kwargs)
+    else:
+        continuation_store = None
 
     # ================================================================
     # Run all optimization cases
     # ================================================================
 
-    for k in range(local_num_cases):
-        # Update the model values with a single combination from the parameter space
-        _update_model_values(model, sweep_params, local_values[k, :])
-
-        try:
-            # Simulate/optimize with this set of parameters
-            optimize_function(model, **optimize_kwargs)
-
-        except:
-            # If the run is infeasible, report nan
-            local_results[k, :] = np.nan
-            previous_run_failed = True
+    # The global rows of the cases solved by this rank, where each rank solves its own
+    local_indices = None
+
+    profile_stack = contextlib.ExitStack()
+    try:
+        profile_stack.enter_context(_profile_sweep(profile_file is not None))
+
+        if (dynamic_scheduling and num_procs > 1) or num_workers is not None:
+            if chunk_size < 1:
+                raise ValueError(f"chunk_size must be a positive integer but {chunk_size} was provided.")
+
+        if mc_tolerance is not None:
+            # Quasi-random sequences and unsorted random streams are solved in order, sorted random
+            # samples in a random order so that every batch is an unbiased sample of its own
+            num_cases = np.shape(global_values)[0]
+            if sampling_type == SamplingType.RANDOM and not random_streams:
+                case_order = np.random.permutation(num_cases) if rank == 0 else None
+                if num_procs > 1:
+                    case_order = comm.bcast(case_order, root=0)
+            else:
+                case_order = np.arange(num_cases)
+
+            local_values, local_results, local_status, global_values, global_results, global_status, \
+                    mc_trace = _do_param_sweep_sequential(model, sweep_params, outputs, global_values, case_order,
+                    [list(outputs).index(name) for name in mc_settings['outputs']], mc_tolerance, mc_atol,
+                    int(mc_settings['batch_size']), mc_settings['quantiles'], mc_settings['confidence'],
+                    optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs, comm, rank,
+                    num_procs, broadcast_results=broadcast_results, warmstart_store=warmstart_store,
+                    model_state=model_state, snapshot_converged=snapshot_converged,
+                    record_diagnostics=record_diagnostics, continuation=continuation_store)
+
+        elif sampling_type == SamplingType.ADAPTIVE:
+            local_values, local_results, local_status, global_values, global_results, global_status = \
+                    _do_param_sweep_adaptive(model, sweep_params, outputs, global_values,
+                    list(outputs).index(refine_output), refine_tolerance, int(num_samples), optimize_function,
+                    optimize_kwargs, reinitialize_function, reinitialize_kwargs, comm, rank, num_procs,
+                    warmstart_store=warmstart_store, model_state=model_state,
+                    snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics,
+                    continuation=continuation_store)
+
+        elif num_workers is not None:
+            global_results, global_status = _do_param_sweep_pool(sweep_params, outputs, global_values,
+                    optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs,
+                    int(num_workers), int(chunk_size), build_model, build_model_kwargs,
+                    initialize_function, initialize_kwargs, journal=journal, completed=completed,
+                    warmstart=warmstart, restore_on_failure=restore_on_failure,
+                    snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics,
+                    continuation_kwargs=continuation_kwargs if continuation else None,
+                    profile=profile_file is not None)
+
+            local_values = global_values
+            local_results = global_results
+            local_status = global_status
+
+        elif dynamic_scheduling and num_procs > 1:
+
+            local_indices, local_results, local_status, global_results, global_status = _do_param_sweep_dynamic(model, sweep_params, outputs,
+                    global_values, optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs,
+                    comm, rank, num_procs, int(chunk_size), journal=journal, completed=completed,
+                    warmstart_store=warmstart_store, broadcast_results=broadcast_results,
+                    model_state=model_state, snapshot_converged=snapshot_converged,
+                    record_diagnostics=record_diagnostics, continuation=continuation_store)
+
+            local_values = global_values[local_indices, :]
 
         else:
-            # If the simulation suceeds, report stats
-            local_results[k, :] = [pyo.value(outcome) for outcome in outputs.values()]
-            previous_run_failed = False
-
-        if previous_run_failed and (reinitialize_function is not None):
-            # We choose to re-initialize the model at this point
-            try:
-                reinitialize_function(model, **reinitialize_kwargs)
-                optimize_function(model, **optimize_kwargs)
-            except:
-                # do we raise an error here?
-                # nothing to do
-                pass
+            # divide the workload between processors
+            local_indices = _divide_indices(np.shape(global_values)[0], rank, num_procs)
+            local_values = global_values[local_indices, :]
+
+            if pipeline:
+                local_results, local_status = _do_param_sweep_pipelined(model, sweep_params, outputs, local_values,
+                        local_indices, optimize_function, optimize_kwargs, reinitialize_function, reinitialize_kwargs,
+                        journal=journal, completed=completed, model_state=model_state,
+                        snapshot_converged=snapshot_converged, record_diagnostics=record_diagnostics)
             else:
-                local_results[k, :] = [pyo.value(outcome) for outcome in outputs.values()]
-
+                local_results, local_status = _do_param_sweep(model, sweep_params, outputs, local_values,
+                        local_indices, optimize_function, optimize_kwargs, reinitialize_function,
+                        reinitialize_kwargs, journal=journal, completed=completed, warmstart_store=warmstart_store,
+                        model_state=model_state, snapshot_converged=snapshot_converged,
+                        record_diagnostics=record_diagnostics, continuation=continuation_store)
+
+            global_results = _aggregate_results(local_results, global_values, comm, num_procs,
+                    broadcast_results=broadcast_results)
+            global_status = _aggregate_results(local_status.reshape(-1, 1), global_values, comm, num_procs,
+                    broadcast_results=broadcast_results)
+            if global_status is not None:
+                global_status = global_status.reshape(-1).astype(np.int64)
+
+    finally:
+        profile_stack.close()
+        if journal is not None:
+            journal.close()
+
+    if record_diagnostics:
+        _print_diagnostics_summary(rank, local_results[:, len(outputs):], local_status)
+
+    if profile_file is not None:
+        _write_profile(profile_file, comm, rank, num_procs)
 
     # ================================================================
     # Save results
     # ================================================================
 
-    global_results = _aggregate_results(local_results, global_values, comm, num_procs)
-
     # Make a directory for saved outputs
     if rank == 0:
         if results_file is not None:
@@ -476,27 +2477,43 @@ def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_fu
     if num_procs > 1:
         comm.Barrier()
 
-    # Write a header string for all data files
-    data_header = ','.join(itertools.chain(sweep_params,outputs))
-
     if debugging_data_dir is not None:
-        # Create the local filename and data
-        fname = os.path.join(debugging_data_dir, f'local_results_{rank:03}.csv')
-        local_save_data = np.hstack((local_values, local_results))
+        # Create the local filename, in the same format as the results file
+        if results_file is not None and is_binary_results_file(results_file):
+            ext = os.path.splitext(results_file)[1]
+        else:
+            ext = '.csv'
+        fname = os.path.join(debugging_data_dir, f'local_results_{rank:03}{ext}')
 
         # Save the local data
-        np.savetxt(fname, local_save_data, header=data_header, delimiter=', ', fmt='%.6e')
+        _save_results(fname, np.asarray(local_values), local_status, local_results, data_header, metadata,
+                delimiter=', ')
+
+    # With a binary results file, every rank writes its own cases, rather than rank 0 all of them
+    write_local_results = results_file is not None and is_binary_results_file(results_file) \
+            and num_procs > 1 and local_indices is not None
+    if write_local_results:
+        write_sweep_results_parallel(results_file, local_indices, np.asarray(local_values), local_status,
+                local_results, metadata, np.shape(global_values)[0], comm, rank, num_procs)
+
+    # Only rank 0 holds the combined results unless they were broadcast
+    if rank != 0 and not broadcast_results:
+        return None
 
     # Create the global filename and data
+    global_values = np.asarray(global_values)
     global_save_data = np.hstack((global_values, global_results))
 
     if rank == 0 and results_file is not None:
         # Save the global data
-        np.savetxt(results_file, global_save_data, header=data_header, delimiter=',', fmt='%.6e')
+        if not write_local_results:
+            _save_results(results_file, global_values, global_status, global_results, data_header, metadata)
 
         if interpolate_nan_outputs:
-            global_results_clean = _interp_nan_values(global_values, global_results)
-            global_save_data_clean = np.hstack((global_values, global_results_clean))
+            # Only the outputs are interpolated, the diagnostics are kept as recorded
+            global_results_clean = np.copy(global_results)
+            global_results_clean[:, :len(outputs)] = _interp_nan_values(global_values, global_results[:, :len(outputs)],
+                    method=interpolate_nan_outputs, grid_spacing=_grid_spacing(sweep_params, sampling_type))
 
             head, tail = os.path.split(results_file)
 
@@ -505,7 +2522,19 @@ def parameter_sweep(model, sweep_params, outputs, results_file=None, optimize_fu
             else:
                 interp_file = '%s/interpolated_%s' % (head, tail)
 
-            np.savetxt(interp_file, global_save_data_clean, header=data_header, delimiter=',', fmt='%.6e')
+            _save_results(interp_file, global_values, global_status, global_results_clean, data_header, metadata)
+
+        if mc_tolerance is not None:
+            # The statistics after every batch, always as CSV
+            head, tail = os.path.split(results_file)
+            trace_file = os.path.join(head, 'convergence_%s.csv' % os.path.splitext(tail)[0])
+
+            trace_header = ['num_cases', 'num_converged']
+            for name in mc_settings['outputs']:
+                trace_header += [f'{name}_mean', f'{name}_half_width']
+                trace_header += [f'{name}_q{p:g}' for p in mc_settings['quantiles']]
+
+            np.savetxt(trace_file, mc_trace, header=','.join(trace_header), delimiter=',', fmt='%.6e')
     
     return global_save_data
 
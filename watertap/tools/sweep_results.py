@@ -0,0 +1,411 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+"""
+Binary (HDF5 and NPZ) storage of parameter sweep results.
+
+Every parameter, output and the solver status of each case is stored as its own
+full precision column, together with a dictionary of sweep metadata, so that
+single columns of very large sweeps can be memory mapped for post-processing.
+"""
+
+import os
+import json
+import shutil
+import struct
+import zipfile
+
+import numpy as np
+
+from abc import abstractmethod, ABC
+
+# Number of rows handed to a results writer at a time
+_WRITE_BLOCK_SIZE = 100000
+
+# ================================================================
+
+class ResultsWriter(ABC):
+    """
+    Base class of the binary parameter sweep results writers. A writer is created
+    for a known number of cases and filled in blocks of consecutive rows.
+
+    With ``attach=True``, the writer opens a file that was set up (and detached)
+    by another writer instead, e.g., on another MPI rank, so that several
+    processes can fill the rows of the same file in turn.
+
+    Args:
+        fname : The path and file name of the results file
+        num_cases : The total number of cases (rows) in the file
+        metadata : Dictionary of sweep metadata, which must at least hold the
+                   names of the sweep parameters (``'parameters'``) and of the
+                   outputs (``'outputs'``)
+        attach (optional) : If True, open the file set up by another writer
+                            rather than creating it. The default is False.
+    """
+
+    def __init__(self, fname, num_cases, metadata, attach=False):
+        self.fname = fname
+        self.num_cases = num_cases
+        self.metadata = metadata
+        if attach:
+            self.attach()
+        else:
+            self.setup()
+
+    @abstractmethod
+    def setup(self):
+        pass
+
+    def attach(self):
+        """
+        Open the file set up by another writer for writing. Only needed for
+        writing a file from several processes.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot write a results file from several processes.")
+
+    def detach(self):
+        """
+        Flush the rows written so far and release the file without completing
+        it, so that another writer can attach to it.
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot write a results file from several processes.")
+
+    @abstractmethod
+    def write(self, start, values, status, results):
+        """
+        Write the parameter values, status and outputs of the consecutive
+        cases starting at row ``start``.
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+# ================================================================
+
+class NPZResultsWriter(ResultsWriter):
+    """
+    Writes an uncompressed ``.npz`` archive with one member per column. Columns are
+    filled through memory mapped temporary files (in the directory ``fname + '.columns'``),
+    which are only collected into the archive when the writer is closed.
+    """
+
+    def setup(self):
+        self._tmpdir = self.fname + '.columns'
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        os.makedirs(self._tmpdir)
+        self._columns = dict()
+
+        for member, dtype in _member_names(self.metadata):
+            self._columns[member] = np.lib.format.open_memmap(os.path.join(self._tmpdir, member + '.npy'),
+                    mode='w+', dtype=dtype, shape=(self.num_cases,))
+
+    def attach(self):
+        self._tmpdir = self.fname + '.columns'
+        self._columns = dict()
+
+        for member, dtype in _member_names(self.metadata):
+            self._columns[member] = np.lib.format.open_memmap(os.path.join(self._tmpdir, member + '.npy'),
+                    mode='r+')
+
+    def detach(self):
+        for column in self._columns.values():
+            column.flush()
+        self._columns.clear()
+
+    def write(self, start, values, status, results):
+        stop = start + np.shape(values)[0]
+        num_values = len(self.metadata['parameters'])
+
+        for k in range(num_values):
+            self._columns[f'input_{k:03}'][start:stop] = values[:, k]
+        for k in range(len(self.metadata['outputs'])):
+            self._columns[f'output_{k:03}'][start:stop] = results[:, k]
+        self._columns['status'][start:stop] = status
+
+    def close(self):
+        try:
+            self.detach()
+
+            # Members are stored uncompressed so they can be memory mapped by SweepResults
+            with zipfile.ZipFile(self.fname, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for member, dtype in _member_names(self.metadata):
+                    zf.write(os.path.join(self._tmpdir, member + '.npy'), arcname=member + '.npy')
+                zf.writestr('metadata.json', json.dumps(self.metadata))
+        finally:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+# ================================================================
+
+class HDF5ResultsWriter(ResultsWriter):
+    """
+    Writes an HDF5 file (requires h5py) with one contiguous dataset per column in
+    the ``inputs`` and ``outputs`` groups, a ``status`` dataset and the metadata as
+    a JSON string attribute of the root group.
+    """
+
+    def setup(self):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("Writing parameter sweep results to an HDF5 file requires h5py, "
+                              "which could not be imported from the current environment.")
+
+        self._file = h5py.File(self.fname, 'w')
+        self._file.attrs['metadata'] = json.dumps(self.metadata)
+
+        self._columns = dict()
+        for member, dtype in _member_names(self.metadata):
+            group, _, name = member.partition('_')
+            path = f'{group}s/{name}' if name else group
+            # Contiguous (unchunked) storage lets SweepResults memory map each column
+            self._columns[member] = self._file.create_dataset(path, shape=(self.num_cases,), dtype=dtype)
+
+    def attach(self):
+        import h5py
+
+        self._file = h5py.File(self.fname, 'r+')
+
+        self._columns = dict()
+        for member, dtype in _member_names(self.metadata):
+            group, _, name = member.partition('_')
+            self._columns[member] = self._file[f'{group}s/{name}' if name else group]
+
+    def detach(self):
+        self._columns = dict()
+        self._file.close()
+
+    def write(self, start, values, status, results):
+        stop = start + np.shape(values)[0]
+
+        for k in range(len(self.metadata['parameters'])):
+            self._columns[f'input_{k:03}'][start:stop] = values[:, k]
+        for k in range(len(self.metadata['outputs'])):
+            self._columns[f'output_{k:03}'][start:stop] = results[:, k]
+        self._columns['status'][start:stop] = status
+
+    def close(self):
+        self._file.close()
+
+# ================================================================
+
+_RESULTS_WRITERS = {'.npz': NPZResultsWriter,
+                    '.h5': HDF5ResultsWriter,
+                    '.hdf5': HDF5ResultsWriter}
+
+def register_results_writer(extension, writer_class):
+    """
+    Use ``writer_class`` (a subclass of ResultsWriter) for every results
+    file whose name ends with ``extension`` (e.g., ``'.h5'``).
+    """
+    _RESULTS_WRITERS[extension.lower()] = writer_class
+
+def is_binary_results_file(fname):
+    """
+    Return True if ``fname`` is written by one of the registered binary results writers.
+    """
+    return os.path.splitext(fname)[1].lower() in _RESULTS_WRITERS
+
+def write_sweep_results(fname, values, status, results, metadata, block_size=_WRITE_BLOCK_SIZE):
+    """
+    Write the results of a parameter sweep with the writer registered for the
+    extension of ``fname``, in blocks of at most ``block_size`` rows.
+
+    Args:
+        fname : The path and file name of the results file
+        values : Array (or row-indexable stand-in) of the parameter values of every case
+        status : Vector of the SweepStatus of every case
+        results : Array of the outputs of every case
+        metadata : Dictionary of sweep metadata, see ResultsWriter
+
+    Returns:
+        None
+    """
+    writer_class = _RESULTS_WRITERS[os.path.splitext(fname)[1].lower()]
+
+    num_cases = np.shape(results)[0]
+    writer = writer_class(fname, num_cases, metadata)
+
+    try:
+        for start in range(0, num_cases, block_size):
+            rows = np.arange(start, min(start + block_size, num_cases))
+            writer.write(start, values[rows, :], status[rows], results[rows, :])
+    finally:
+        writer.close()
+
+def write_sweep_results_parallel(fname, indices, values, status, results, metadata, num_cases, comm, rank,
+        num_procs, block_size=_WRITE_BLOCK_SIZE):
+    """
+    Write the results of a parameter sweep from every MPI rank to one file. Rank 0
+    sets up the file for all ``num_cases`` cases, then the ranks attach to it one
+    after another and write their own cases, each run of consecutive rows in blocks
+    of at most ``block_size`` rows, and rank 0 finally completes the file. The file
+    is never written by two ranks at once, so this does not require a parallel HDF5
+    build. Must be called on every rank.
+
+    Args:
+        fname : The path and file name of the results file
+        indices : Vector of the global row indices of the cases of this rank
+        values : Array of the parameter values of the cases of this rank
+        status : Vector of the SweepStatus of the cases of this rank
+        results : Array of the outputs of the cases of this rank
+        metadata : Dictionary of sweep metadata, see ResultsWriter
+        num_cases : The total number of cases of the sweep
+        comm : The MPI communicator of the sweep
+        rank : The rank of this process
+        num_procs : The number of processes in ``comm``
+
+    Returns:
+        None
+    """
+    writer_class = _RESULTS_WRITERS[os.path.splitext(fname)[1].lower()]
+
+    if rank == 0:
+        writer_class(fname, num_cases, metadata).detach()
+    comm.Barrier()
+
+    indices = np.asarray(indices, dtype=np.int64)
+
+    # Runs of consecutive global rows, e.g., one per chunk of a dynamic schedule
+    order = np.argsort(indices, kind='stable')
+    breaks = np.flatnonzero(np.diff(indices[order]) != 1) + 1
+
+    for writing_rank in range(num_procs):
+        if rank == writing_rank and len(indices) > 0:
+            writer = writer_class(fname, num_cases, metadata, attach=True)
+            try:
+                for run in np.split(order, breaks):
+                    for offset in range(0, len(run), block_size):
+                        rows = run[offset:offset + block_size]
+                        writer.write(indices[rows[0]], values[rows, :], status[rows], results[rows, :])
+            finally:
+                writer.detach()
+        comm.Barrier()
+
+    if rank == 0:
+        writer_class(fname, num_cases, metadata, attach=True).close()
+    comm.Barrier()
+
+# ================================================================
+
+class SweepResults:
+    """
+    Read access to a binary parameter sweep results file written by
+    :func:`write_sweep_results`. Each column is memory mapped when it is first
+    accessed, so only the columns that are used are ever read from disk.
+
+    Args:
+        fname : The path and file name of a ``.npz``, ``.h5`` or ``.hdf5`` results file
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self._columns = dict()
+
+        if os.path.splitext(fname)[1].lower() == '.npz':
+            with zipfile.ZipFile(fname, 'r') as zf:
+                self.metadata = json.loads(zf.read('metadata.json'))
+            self._map_column = self._map_npz_column
+        else:
+            try:
+                import h5py
+            except ImportError:
+                raise ImportError("Reading parameter sweep results from an HDF5 file requires h5py, "
+                                  "which could not be imported from the current environment.")
+
+            with h5py.File(fname, 'r') as f:
+                self.metadata = json.loads(f.attrs['metadata'])
+            self._map_column = self._map_hdf5_column
+
+    @property
+    def parameter_names(self):
+        return list(self.metadata['parameters'])
+
+    @property
+    def output_names(self):
+        return list(self.metadata['outputs'])
+
+    @property
+    def status(self):
+        return self._get_column('status')
+
+    def __getitem__(self, name):
+        """
+        Return the column of the sweep parameter or output called ``name``.
+        """
+        if name in self.metadata['parameters']:
+            return self._get_column(f"input_{self.metadata['parameters'].index(name):03}")
+        if name in self.metadata['outputs']:
+            return self._get_column(f"output_{self.metadata['outputs'].index(name):03}")
+        raise KeyError(f"{name} is neither a sweep parameter nor an output in {self.fname}.")
+
+    def to_array(self):
+        """
+        Return the results in the layout returned by ``parameter_sweep``, i.e., the
+        parameter values followed by the outputs of every case, one case per row.
+        """
+        names = self.parameter_names + self.output_names
+        return np.column_stack([self[name] for name in names]) if names else np.zeros((0, 0))
+
+    def _get_column(self, member):
+        if member not in self._columns:
+            self._columns[member] = self._map_column(member)
+        return self._columns[member]
+
+    def _map_npz_column(self, member):
+        with zipfile.ZipFile(self.fname, 'r') as zf:
+            info = zf.getinfo(member + '.npy')
+
+        with open(self.fname, 'rb') as f:
+            # Skip the local file header of the (uncompressed) member
+            f.seek(info.header_offset)
+            local_header = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.fname, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def _map_hdf5_column(self, member):
+        import h5py
+
+        group, _, name = member.partition('_')
+        path = f'{group}s/{name}' if name else group
+
+        with h5py.File(self.fname, 'r') as f:
+            dataset = f[path]
+            shape, dtype = dataset.shape, dataset.dtype
+            offset = dataset.id.get_offset()
+
+        if offset is None or shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.fname, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+# ================================================================
+
+def _member_names(metadata):
+
+    # The name and type of every column stored in a results file
+    members = [(f'input_{k:03}', np.float64) for k in range(len(metadata['parameters']))]
+    members += [(f'output_{k:03}', np.float64) for k in range(len(metadata['outputs']))]
+    members.append(('status', np.int8))
+
+    return members
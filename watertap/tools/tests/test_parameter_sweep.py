@@ -13,45 +13,51 @@
 
 import pytest
 import os
+import json
+import time
+import itertools
+import pickle
 import numpy as np
 import pyomo.environ as pyo
 
 from pyomo.environ import value
+from pyomo.opt import SolverResults
 
+from watertap.core.util.profiling import solver_profiler
+from watertap.tools.sweep_results import SweepResults
 from watertap.tools.parameter_sweep import (_init_mpi,
                                                _build_combinations,
+                                               _GridCombinations,
                                                _divide_combinations,
+                                               _generate_chunks,
+                                               _divide_indices,
+                                               _hilbert_order,
+                                               _WarmStartStore,
+                                               _Continuation,
                                                _update_model_values,
                                                _aggregate_results,
                                                _interp_nan_values,
+                                               _refinement_candidates,
+                                               _RunningStatistics,
+                                               _P2Quantile,
+                                               _pipeline_supported,
                                                parameter_sweep,
                                                LinearSample,
+                                               AdaptiveSample,
                                                UniformSample,
                                                NormalSample,
-                                               SamplingType)
+                                               SobolSample,
+                                               HaltonSample,
+                                               SamplingType,
+                                               SweepStatus,
+                                               SolverLimitExceeded)
 
 # -----------------------------------------------------------------------------
 
 class TestParallelManager():
     @pytest.fixture(scope="class")
     def model(self):
-        m = pyo.ConcreteModel()
-        m.fs = fs = pyo.Block()
-
-        fs.input = pyo.Var(['a','b'], within=pyo.UnitInterval, initialize=0.5)
-        fs.output = pyo.Var(['c', 'd'], within=pyo.UnitInterval, initialize=0.5)
-
-        fs.slack = pyo.Var(['ab_slack', 'cd_slack'], bounds=(0,0), initialize=0.0)
-        fs.slack_penalty = pyo.Param(default=1000., mutable=True, within=pyo.PositiveReals)
-
-        fs.ab_constr = pyo.Constraint(expr=(fs.output['c'] + fs.slack['ab_slack'] == 2*fs.input['a']))
-        fs.cd_constr = pyo.Constraint(expr=(fs.output['d'] + fs.slack['cd_slack'] == 3*fs.input['b']))
-
-        fs.performance = pyo.Expression(expr=pyo.summation(fs.output))
-
-        m.objective = pyo.Objective(expr=m.fs.performance - m.fs.slack_penalty*pyo.summation(m.fs.slack),
-                                    sense=pyo.maximize)
-        return m
+        return _build_model()
 
     @pytest.mark.unit
     def test_init_mpi(self):
@@ -112,6 +118,29 @@ class TestParallelManager():
         assert global_combo_array[-1, 1] == pytest.approx(range_B[1])
         assert global_combo_array[-1, 2] == pytest.approx(range_C[1])
 
+    @pytest.mark.unit
+    def test_grid_combinations(self):
+        param_values = [np.linspace(0.0, 10.0, 4), np.linspace(1.0, 20.0, 5), np.linspace(2.0, 30.0, 6)]
+        grid = _GridCombinations(param_values)
+
+        meshgrid = np.array(np.meshgrid(*param_values, indexing="ij")).reshape(3, -1).T
+
+        assert np.shape(grid) == np.shape(meshgrid)
+        assert len(grid) == 4*5*6
+
+        # Rows are decoded in the same order as the full meshgrid
+        indices = np.array([0, 7, 31, 119, 64])
+        assert np.array_equal(grid[indices, :], meshgrid[indices, :])
+        assert np.array_equal(grid[indices], meshgrid[indices])
+        assert np.array_equal(grid[3:9, 1], meshgrid[3:9, 1])
+        assert np.array_equal(grid[-1, :], meshgrid[-1, :])
+        assert grid[31, 2] == pytest.approx(meshgrid[31, 2])
+        assert np.shape(grid[np.zeros(0, dtype=np.int64), :]) == (0, 3)
+
+        assert np.array_equal(grid.min(axis=0), np.min(meshgrid, axis=0))
+        assert np.array_equal(grid.max(axis=0), np.max(meshgrid, axis=0))
+        assert np.array_equal(np.asarray(grid), meshgrid)
+
     def test_random_build_combinations(self):
         comm, rank, num_procs = _init_mpi()
 
@@ -171,6 +200,144 @@ class TestParallelManager():
 
         assert np.all(global_combo_array[:, 2] == range_C[0])
 
+    @pytest.mark.component
+    def test_random_streams_build_combinations(self):
+        comm, rank, num_procs = _init_mpi()
+
+        A_param = pyo.Param(initialize=0.0, mutable=True)
+        B_param = pyo.Param(initialize=0.0, mutable=True)
+
+        param_dict = dict()
+        param_dict['var_A'] = UniformSample(A_param, 10.0, 20.0)
+        param_dict['var_B'] = NormalSample(B_param, 100.0, 5.0)
+
+        # By default, the sample is drawn from the global numpy state seeded by the sweep
+        np.random.seed(5)
+        legacy = _build_combinations(param_dict, SamplingType.RANDOM, 100, comm, rank, num_procs, seed=5)
+        np.random.seed(5)
+        expected = np.column_stack([np.random.uniform(10.0, 20.0, 100), np.random.normal(100.0, 5.0, 100)])
+        assert np.array_equal(legacy, expected[np.argsort(expected[:, 0]), :])
+
+        # With random streams, the global numpy state is left alone
+        nn = 3000
+        np.random.seed(0)
+        state = np.random.get_state()[1].copy()
+        global_combo_array = _build_combinations(param_dict, SamplingType.RANDOM, nn, comm, rank, num_procs,
+                seed=5, random_streams=True)
+        assert np.array_equal(np.random.get_state()[1], state)
+        assert np.shape(global_combo_array) == (nn, 2)
+
+        values = np.asarray(global_combo_array)
+        assert np.all((10.0 <= values[:, 0]) & (values[:, 0] < 20.0))
+        assert np.mean(values[:, 0]) == pytest.approx(15.0, rel=1e-2)
+        assert np.mean(values[:, 1]) == pytest.approx(100.0, rel=1e-2)
+        assert np.std(values[:, 1]) == pytest.approx(5.0, rel=5e-2)
+
+        # Any block of rows is drawn on its own, without the rest of the sample
+        assert np.array_equal(global_combo_array[2500:, :], values[2500:, :])
+        assert np.array_equal(global_combo_array[[2999, 1023, 1024, 0], :], values[[2999, 1023, 1024, 0], :])
+        assert np.shape(global_combo_array[np.zeros(0, dtype=np.int64), :]) == (0, 2)
+
+        # The same seed gives the same sample
+        same = _build_combinations(param_dict, SamplingType.RANDOM, nn, comm, rank, num_procs, seed=5,
+                random_streams=True)
+        assert np.array_equal(np.asarray(same), values)
+        other = _build_combinations(param_dict, SamplingType.RANDOM, nn, comm, rank, num_procs, seed=6,
+                random_streams=True)
+        assert not np.array_equal(np.asarray(other), values)
+
+        # The range of the sample comes from the marginals
+        span = np.ptp(values, axis=0)
+        assert np.all(np.abs(global_combo_array.min(axis=0) - np.min(values, axis=0)) < 0.1*span)
+        assert np.all(np.abs(global_combo_array.max(axis=0) - np.max(values, axis=0)) < 0.1*span)
+
+        # The sample can be sent to the workers of a process pool
+        assert np.array_equal(np.asarray(pickle.loads(pickle.dumps(global_combo_array))), values)
+
+    @pytest.mark.component
+    def test_quasi_random_build_combinations(self):
+        comm, rank, num_procs = _init_mpi()
+
+        nn = 1024
+
+        A_param = pyo.Param(initialize=0.0, mutable=True)
+        B_param = pyo.Param(initialize=0.0, mutable=True)
+        C_param = pyo.Param(initialize=1.0, mutable=True)
+
+        param_dict = dict()
+        param_dict['var_A'] = SobolSample(A_param, 'uniform', 10.0, 20.0)
+        param_dict['var_B'] = SobolSample(B_param, 'normal', 100.0, 5.0)
+        param_dict['var_C'] = SobolSample(C_param, 'triangular', 0.0, 1.0, 4.0)
+
+        global_combo_array = _build_combinations(param_dict, SamplingType.SOBOL, nn, comm, rank, num_procs,
+                seed=42)
+
+        assert np.shape(global_combo_array) == (nn, len(param_dict))
+
+        values = np.asarray(global_combo_array)
+        assert np.all((10.0 < values[:, 0]) & (values[:, 0] < 20.0))
+        assert np.all((0.0 < values[:, 2]) & (values[:, 2] < 4.0))
+
+        # Quasi-random samples reproduce the moments of each distribution closely
+        assert np.mean(values[:, 0]) == pytest.approx(15.0, rel=1e-3)
+        assert np.mean(values[:, 1]) == pytest.approx(100.0, rel=1e-3)
+        assert np.std(values[:, 1]) == pytest.approx(5.0, rel=1e-2)
+        assert np.mean(values[:, 2]) == pytest.approx(5./3, rel=1e-3)
+
+        # Any block of rows is generated on its own, without the rest of the sample
+        assert np.allclose(global_combo_array[100:200, :], values[100:200, :])
+        assert np.allclose(global_combo_array[[517, 3], 1], values[[517, 3], 1])
+        assert global_combo_array[-1, 0] == pytest.approx(values[-1, 0])
+        assert np.shape(global_combo_array[np.zeros(0, dtype=np.int64), :]) == (0, 3)
+
+        # The same seed gives the same sample
+        same = _build_combinations(param_dict, SamplingType.SOBOL, nn, comm, rank, num_procs, seed=42)
+        assert np.array_equal(np.asarray(same), values)
+
+        # Blocks are generated in any order from the one engine
+        assert np.allclose(same[512:, :], values[512:, :])
+        assert np.allclose(same[:16, :], values[:16, :])
+        assert np.allclose(same[16:32, :], values[16:32, :])
+
+        # The range of the sample comes from the marginals
+        span = np.ptp(values, axis=0)
+        assert np.all(np.abs(global_combo_array.min(axis=0) - np.min(values, axis=0)) < 0.1*span)
+        assert np.all(np.abs(global_combo_array.max(axis=0) - np.max(values, axis=0)) < 0.1*span)
+
+        # The sample can be sent to the workers of a process pool, which rebuild the engine
+        copy = pickle.loads(pickle.dumps(same))
+        assert np.allclose(copy[100:200, :], values[100:200, :])
+        assert np.allclose(copy[:, :], values)
+
+        param_dict = {'var_A': HaltonSample(A_param, 'lognormal', 0.0, 0.5),
+                      'var_B': HaltonSample(B_param, 'uniform', -1.0, 1.0)}
+        global_combo_array = _build_combinations(param_dict, SamplingType.HALTON, 1000, comm, rank, num_procs,
+                seed=42)
+        values = np.asarray(global_combo_array)
+        assert np.shape(values) == (1000, 2)
+        assert np.all(values[:, 0] > 0)
+        assert np.median(values[:, 0]) == pytest.approx(1.0, rel=1e-2)
+        assert np.mean(values[:, 1]) == pytest.approx(0.0, abs=1e-2)
+
+    @pytest.mark.unit
+    def test_quasi_random_sample_errors(self):
+        comm, rank, num_procs = _init_mpi()
+
+        A_param = pyo.Param(initialize=0.0, mutable=True)
+
+        with pytest.raises(ValueError, match="Unknown distribution"):
+            SobolSample(A_param, 'weibull', 1.0, 2.0)
+
+        param_dict = {'var_A': SobolSample(A_param, 'uniform', 0.0, 1.0)}
+        with pytest.raises(ValueError, match="requires num_samples"):
+            _build_combinations(param_dict, SamplingType.SOBOL, None, comm, rank, num_procs)
+        with pytest.warns(UserWarning, match="power of 2"):
+            _build_combinations(param_dict, SamplingType.SOBOL, 100, comm, rank, num_procs)
+
+        values = param_dict['var_A'].sample(8)
+        assert np.shape(values) == (8,)
+        assert np.all((0.0 < values) & (values < 1.0))
+
     @pytest.mark.component
     def test_divide_combinations(self):
         # _divide_combinations(global_combo_array, rank, num_procs)
@@ -216,6 +383,99 @@ class TestParallelManager():
             assert local_combo_array[-1, 1] == pytest.approx(range_B[1])
             assert local_combo_array[-1, 2] == pytest.approx(range_C[1])
 
+    @pytest.mark.unit
+    def test_generate_chunks(self):
+        chunks = list(_generate_chunks(np.arange(10), 4))
+
+        assert len(chunks) == 3
+        assert np.array_equal(chunks[0], [0, 1, 2, 3])
+        assert np.array_equal(chunks[1], [4, 5, 6, 7])
+        assert np.array_equal(chunks[2], [8, 9])
+
+        assert np.array_equal(np.concatenate(list(_generate_chunks(np.arange(7), 1))), np.arange(7))
+
+        # Only the given (e.g., not yet solved) indices are handed out
+        chunks = list(_generate_chunks(np.array([1, 4, 5]), 2))
+        assert len(chunks) == 2
+        assert np.array_equal(chunks[0], [1, 4])
+        assert np.array_equal(chunks[1], [5])
+
+    @pytest.mark.unit
+    def test_divide_indices(self):
+        comm, rank, num_procs = _init_mpi()
+
+        global_combo_array = np.arange(20, dtype=np.float64).reshape(10, 2)
+        local_combo_array = _divide_combinations(global_combo_array, rank, num_procs)
+        local_indices = _divide_indices(10, rank, num_procs)
+
+        assert np.array_equal(global_combo_array[local_indices, :], local_combo_array)
+
+    @pytest.mark.unit
+    def test_hilbert_order(self):
+        values = np.array([[0.0], [0.9], [0.1], [0.5], [1.0], [0.2]])
+        order = _hilbert_order(values)
+
+        assert np.array_equal(order, [0, 2, 5, 3, 1, 4])
+        assert len(_hilbert_order(np.zeros((0, 2)))) == 0
+        assert np.array_equal(_hilbert_order(np.zeros((1, 2))), [0])
+
+        # On a 2**k grid, consecutive points of the curve are neighbours
+        grid = np.array(list(itertools.product(range(8), range(8), range(8))), dtype=float)
+        rng = np.random.default_rng(1)
+        shuffled = grid[rng.permutation(len(grid)), :]
+        order = _hilbert_order(shuffled, num_bits=3)
+        assert sorted(order) == list(range(len(grid)))
+        steps = np.abs(np.diff(shuffled[order, :], axis=0)).sum(axis=1)
+        assert np.all(steps == 1)
+
+        # Far shorter than the original order, and for any number of dimensions
+        values = rng.random((2000, 4))
+        order = _hilbert_order(values)
+        assert np.array_equal(np.sort(order), np.arange(2000))
+        length = np.linalg.norm(np.diff(values[order, :], axis=0), axis=1).sum()
+        assert length < 0.25*np.linalg.norm(np.diff(values, axis=0), axis=1).sum()
+        order = _hilbert_order(rng.random((100, 70)))
+        assert np.array_equal(np.sort(order), np.arange(100))
+
+    @pytest.mark.component
+    def test_warmstart_store(self, model):
+        m = model
+
+        global_values = np.array([[0.0, 0.0], [1.0, 10.0]])
+        store = _WarmStartStore(global_values, max_snapshots=2)
+        assert np.allclose(store.scale(global_values[1, :]), [1.0, 1.0])
+
+        m.fs.input.fix()
+
+        # Nothing to restore from yet
+        m.fs.output['c'].value = 0.3
+        store.restore(m, global_values[0, :])
+        assert value(m.fs.output['c']) == pytest.approx(0.3)
+
+        store.save(m, np.array([0.0, 0.0]))
+        m.fs.output['c'].value = 0.7
+        store.save(m, np.array([1.0, 10.0]))
+
+        store.restore(m, np.array([0.2, 1.0]))
+        assert value(m.fs.output['c']) == pytest.approx(0.3)
+        store.restore(m, np.array([0.4, 9.0]))
+        assert value(m.fs.output['c']) == pytest.approx(0.7)
+
+        # Fixed variables are never overwritten
+        assert m.fs.input['a'].fixed
+        assert value(m.fs.input['a']) == pytest.approx(0.5)
+
+        # The oldest snapshot is dropped when the store is full
+        m.fs.output['c'].value = 0.9
+        store.save(m, np.array([1.0, 10.0]))
+        m.fs.output['c'].value = 0.5
+        store.restore(m, np.array([0.0, 0.0]))
+        assert value(m.fs.output['c']) == pytest.approx(0.7)
+
+        m.fs.input.unfix()
+        for var in m.fs.input.values():
+            var.set_value(0.5)
+
     @pytest.mark.component
     def test_update_model_values(self, model):
         m = model
@@ -280,6 +540,38 @@ class TestParallelManager():
         assert(global_results_clean[8]) == pytest.approx(np.mean(global_results[0:8]))
         assert(global_results_clean[9]) == pytest.approx(global_results[7])
 
+    @pytest.mark.unit
+    def test_interp_nan_values_idw(self):
+
+        # A 5x5x5x5 grid of a linear function of the four parameters,
+        # with two outputs and failed cases in the interior and on a corner
+        axis = np.linspace(0, 1, 5)
+        global_values = np.array(list(itertools.product(axis, axis, axis, axis)))
+        global_results = np.column_stack((np.sum(global_values, axis=1), -np.sum(global_values, axis=1)))
+
+        interior = np.all(global_values == 0.5, axis=1)
+        corner = np.all(global_values == 1, axis=1)
+        expected = np.copy(global_results)
+        global_results[interior | corner, :] = np.nan
+
+        # Sweeps of more than three parameters use inverse distance weighting
+        global_results_clean = _interp_nan_values(global_values, global_results,
+                grid_spacing=np.full(4, 0.25))
+
+        assert np.shape(global_results_clean) == np.shape(global_results)
+        assert global_results_clean[interior, :] == pytest.approx(expected[interior, :])
+        # The corner lies outside of its converged neighbours and is not extrapolated
+        assert np.all(np.isnan(global_results_clean[corner, :]))
+        assert np.array_equal(global_results_clean[~(interior | corner), :],
+                              expected[~(interior | corner), :])
+
+        # The grid spacing defaults to the range of each parameter
+        global_results_clean = _interp_nan_values(global_values, global_results, method='idw')
+        assert global_results_clean[interior, :] == pytest.approx(expected[interior, :])
+
+        with pytest.raises(ValueError, match="Unknown interpolation method"):
+            _interp_nan_values(global_values, global_results, method='cubic')
+
     @pytest.mark.component
     def test_parameter_sweep(self, model, tmp_path):
         comm, rank, num_procs = _init_mpi()
@@ -439,6 +731,942 @@ class TestParallelManager():
             truth_data = [ 0.9, 0.5, np.nan, np.nan, np.nan, np.nan]
             assert np.allclose(data[-1], truth_data, equal_nan=True)
 
+    @pytest.mark.component
+    def test_parameter_sweep_dynamic_scheduling(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        static_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                broadcast_results=True)
+
+        results_file = os.path.join(tmp_path, 'global_results_dynamic.csv')
+        dynamic_data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_direct_evaluation,
+                debugging_data_dir = tmp_path,
+                mpi_comm = comm,
+                dynamic_scheduling=True,
+                chunk_size=3,
+                broadcast_results=True)
+
+        # The scheduling strategy must not change the results or their order
+        assert np.allclose(static_data, dynamic_data, equal_nan=True)
+
+        # Points with 2*a > 1 are "infeasible" for the direct evaluation
+        assert np.isnan(dynamic_data[-1, 2])
+        assert dynamic_data[0, 2] == pytest.approx(0.2)
+
+        if rank == 0:
+            assert os.path.isfile(results_file)
+            data = np.genfromtxt(results_file, skip_header=1, delimiter=',')
+            assert np.allclose(data, dynamic_data, equal_nan=True)
+
+            # Every case is reported exactly once across the local files
+            num_local_cases = 0
+            for k in range(num_procs):
+                fname = os.path.join(tmp_path, f'local_results_{k:03}.csv')
+                assert os.path.isfile(fname)
+                local_data = np.genfromtxt(fname, skip_header=1, delimiter=',')
+                num_local_cases += local_data.reshape(-1, np.shape(dynamic_data)[1]).shape[0]
+            assert num_local_cases == np.shape(dynamic_data)[0]
+
+    @pytest.mark.component
+    @pytest.mark.parametrize("dynamic_scheduling", [False, True])
+    def test_parameter_sweep_checkpoint_resume(self, model, tmp_path, dynamic_scheduling):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        checkpoint_dir = os.path.join(tmp_path, 'checkpoint')
+
+        reference_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                checkpoint_dir=checkpoint_dir,
+                dynamic_scheduling=dynamic_scheduling,
+                broadcast_results=True)
+
+        num_cases = np.shape(reference_data)[0]
+        num_cols = np.shape(reference_data)[1]
+
+        if rank == 0:
+            # Every case is journaled exactly once, with its status
+            journal_data = []
+            for fname in os.listdir(checkpoint_dir):
+                data = np.genfromtxt(os.path.join(checkpoint_dir, fname), comments='#', delimiter=',')
+                journal_data.append(data.reshape(-1, num_cols+2))
+            journal_data = np.vstack(journal_data)
+
+            assert np.array_equal(np.sort(journal_data[:, 0]), np.arange(num_cases))
+            order = np.argsort(journal_data[:, 0])
+            assert np.allclose(journal_data[order, 2:], reference_data, equal_nan=True)
+            failed = journal_data[order, 1] == SweepStatus.FAILED
+            assert np.array_equal(failed, np.isnan(reference_data[:, 2]))
+
+            # Simulate an interrupted run: drop the last few cases from every
+            # journal and leave a partially written line at the end
+            num_dropped = 0
+            for fname in os.listdir(checkpoint_dir):
+                fname = os.path.join(checkpoint_dir, fname)
+                with open(fname, 'r') as f:
+                    lines = f.readlines()
+                keep = max(1, len(lines) - 2)
+                num_dropped += len(lines) - keep
+                with open(fname, 'w') as f:
+                    f.writelines(lines[:keep])
+                    if keep < len(lines):
+                        f.write(lines[keep][:len(lines[keep])//2])
+        else:
+            num_dropped = None
+
+        if comm is not None:
+            num_dropped = comm.bcast(num_dropped, root=0)
+
+        counter = {'count': 0}
+        results_file = os.path.join(tmp_path, 'global_results_resume.csv')
+        resumed_data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_counted_direct_evaluation,
+                optimize_kwargs={'counter': counter},
+                mpi_comm = comm,
+                checkpoint_dir=checkpoint_dir,
+                resume=True,
+                dynamic_scheduling=dynamic_scheduling,
+                broadcast_results=True)
+
+        # Only the cases missing from the journals are solved again
+        num_solves = counter['count']
+        if comm is not None:
+            num_solves = comm.allreduce(num_solves)
+        assert num_solves == num_dropped
+
+        assert np.allclose(resumed_data, reference_data, equal_nan=True)
+
+        if rank == 0:
+            data = np.genfromtxt(results_file, skip_header=1, delimiter=',')
+            assert np.allclose(data, reference_data, equal_nan=True)
+
+        # A second resume finds nothing left to do
+        counter['count'] = 0
+        parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_counted_direct_evaluation,
+                optimize_kwargs={'counter': counter},
+                mpi_comm = comm,
+                checkpoint_dir=checkpoint_dir,
+                resume=True,
+                dynamic_scheduling=dynamic_scheduling)
+        assert counter['count'] == 0
+
+        # The journals cannot be used for a different parameter space
+        sweep_params['input_a'] = (m.fs.input['a'], 0.2, 0.9, 5)
+        with pytest.raises(ValueError, match="do not match the parameter space"):
+            parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    mpi_comm = comm,
+                    checkpoint_dir=checkpoint_dir,
+                    resume=True)
+
+    @pytest.mark.component
+    @pytest.mark.parametrize("dynamic_scheduling", [False, True])
+    def test_parameter_sweep_warmstart(self, model, dynamic_scheduling):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        reference_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                dynamic_scheduling=dynamic_scheduling,
+                broadcast_results=True)
+
+        starts = []
+        warmstart_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_recorded_direct_evaluation,
+                optimize_kwargs={'starts': starts},
+                mpi_comm = comm,
+                dynamic_scheduling=dynamic_scheduling,
+                warmstart=True,
+                broadcast_results=True)
+
+        # The solve order must not change the results or their order
+        assert np.allclose(reference_data, warmstart_data, equal_nan=True)
+
+        # In serial, every feasible case after the first starts from
+        # a solution within one grid step of the new point
+        if num_procs == 1:
+            feasible = [(a, c) for (a, b, c) in starts[1:] if 2*a <= 1 and 3*b <= 1]
+            assert len(feasible) == 8
+            for a, c in feasible:
+                assert abs(c - 2*a) <= 2*0.2 + 1e-8
+
+    @pytest.mark.component
+    @pytest.mark.parametrize("dynamic_scheduling", [False, True])
+    def test_parameter_sweep_broadcast_results(self, model, dynamic_scheduling):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        global_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                dynamic_scheduling=dynamic_scheduling,
+                broadcast_results=True)
+
+        rank0_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                dynamic_scheduling=dynamic_scheduling)
+
+        assert np.shape(global_data) == (20, 5)
+        assert np.allclose(global_data[:, 0], np.repeat(np.linspace(0.1, 0.9, 5), 4))
+        assert np.allclose(global_data[:, 1], np.tile(np.linspace(0.0, 0.5, 4), 5))
+
+        # Without the opt-in only rank 0 receives the results
+        if rank == 0:
+            assert np.allclose(rank0_data, global_data, equal_nan=True)
+        else:
+            assert rank0_data is None
+
+    @pytest.mark.component
+    def test_parameter_sweep_process_pool(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        if num_procs > 1:
+            pytest.skip("The process pool backend replaces MPI")
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        serial_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm)
+
+        results_file = os.path.join(tmp_path, 'global_results_pool.csv')
+        checkpoint_dir = os.path.join(tmp_path, 'checkpoint')
+        pool_data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_direct_evaluation,
+                num_workers=2,
+                chunk_size=3,
+                build_model=_build_model,
+                initialize_function=_set_slack_penalty,
+                initialize_kwargs={'slack_penalty': 10.},
+                checkpoint_dir=checkpoint_dir)
+
+        # The backend must not change the results or their order
+        assert np.allclose(serial_data, pool_data, equal_nan=True)
+
+        data = np.genfromtxt(results_file, skip_header=1, delimiter=',')
+        assert np.allclose(data, serial_data, equal_nan=True)
+
+        # Every case solved by the workers is journaled by the parent process
+        journal_data = np.genfromtxt(os.path.join(checkpoint_dir, 'journal_000.csv'), comments='#', delimiter=',')
+        assert np.array_equal(np.sort(journal_data[:, 0]), np.arange(np.shape(serial_data)[0]))
+
+        with pytest.raises(ValueError, match="build_model function is required"):
+            parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    num_workers=2)
+
+    @pytest.mark.component
+    @pytest.mark.skipif(not _pipeline_supported(),
+                        reason="Pipelined sweeps require a thread-local TempfileManager (Pyomo 6.4.2 or later)")
+    def test_parameter_sweep_pipeline(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        serial_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                broadcast_results=True)
+
+        models = []
+        checkpoint_dir = os.path.join(tmp_path, 'checkpoint')
+        pipeline_data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_subprocess_direct_evaluation,
+                optimize_kwargs={'models': models},
+                mpi_comm = comm,
+                broadcast_results=True,
+                restore_on_failure=True,
+                checkpoint_dir=checkpoint_dir,
+                pipeline=True)
+
+        # The pipeline must not change the results or their order
+        assert np.allclose(serial_data, pipeline_data, equal_nan=True)
+
+        # The cases are solved on the model and on a clone of it
+        assert len(set(models)) == 2
+        assert id(m) in models
+
+        if num_procs == 1:
+            journal_data = np.genfromtxt(os.path.join(checkpoint_dir, 'journal_000.csv'), comments='#', delimiter=',')
+            assert np.array_equal(np.sort(journal_data[:, 0]), np.arange(np.shape(serial_data)[0]))
+
+    @pytest.mark.unit
+    def test_parameter_sweep_pipeline_invalid(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        with pytest.raises(ValueError, match="pipeline cannot be combined"):
+            parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    mpi_comm = comm,
+                    warmstart=True,
+                    pipeline=True)
+
+        # The solver profiler is shared by all threads
+        with pytest.raises(ValueError, match="pipeline cannot be combined"):
+            parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    mpi_comm = comm,
+                    profile_file=os.path.join(tmp_path, 'profile.json'),
+                    pipeline=True)
+
+    @pytest.mark.component
+    @pytest.mark.parametrize("snapshot_converged", [False, True])
+    def test_parameter_sweep_restore_on_failure(self, model, snapshot_converged):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+        m.fs.input['b'].value = 0.1
+        m.fs.output['c'].value = 0.5
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        starts = []
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_diverging_direct_evaluation,
+                optimize_kwargs={'starts': starts},
+                mpi_comm = comm,
+                restore_on_failure=True,
+                snapshot_converged=snapshot_converged,
+                broadcast_results=True)
+
+        assert np.allclose(data[:, 1], [0.2, 0.6, 1.0, np.nan, np.nan], equal_nan=True)
+
+        # No case starts from the diverged values of a failed case
+        assert all(c <= 1 for a, b, c in starts)
+
+        # A failed case is retried once from the saved state
+        if num_procs == 1:
+            assert len(starts) == 7
+            if snapshot_converged:
+                assert starts[-1][2] == pytest.approx(1.0)
+            else:
+                assert starts[-1][2] == pytest.approx(0.5)
+
+        assert value(m.fs.output['c']) <= 1
+
+    @pytest.mark.component
+    @pytest.mark.parametrize("predictor", [False, True])
+    def test_parameter_sweep_continuation(self, model, predictor):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+        m.fs.input['b'].value = 0.1
+        m.fs.output['c'].value = 0.1
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.05, 0.45, 3)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        # Every jump of output_c is too large to converge in a single solve
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_local_direct_evaluation,
+                optimize_kwargs={'starts': []},
+                mpi_comm = comm,
+                broadcast_results=True)
+        if num_procs == 1:
+            assert np.allclose(data[:, 1], [0.1, np.nan, np.nan], equal_nan=True)
+
+        m.fs.output['c'].value = 0.1
+        starts = []
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_local_direct_evaluation,
+                optimize_kwargs={'starts': starts},
+                mpi_comm = comm,
+                continuation=True,
+                continuation_kwargs={'predictor': predictor},
+                broadcast_results=True)
+
+        if num_procs == 1:
+            assert np.allclose(data[:, 1], [0.1, 0.5, 0.9])
+
+            # Each failed case converges in two steps, the second of which starts
+            # from the secant prediction of the solution if the predictor is used
+            assert len(starts) == 7
+            assert starts[2] == pytest.approx((0.15, 0.1))
+            assert starts[3] == pytest.approx((0.25, 0.5 if predictor else 0.3))
+
+    @pytest.mark.unit
+    def test_continuation_gives_up(self, model):
+        m = model
+        m.fs.input['b'].value = 0.1
+        m.fs.input['a'].value = 0.05
+        m.fs.output['c'].value = 0.1
+
+        sweep_params = {'input_a' : LinearSample(m.fs.input['a'], 0.05, 0.45, 3)}
+        continuation = _Continuation(m, min_step=0.25)
+
+        # Nothing to continue from before a case has converged
+        assert not continuation.solve(m, sweep_params, np.array([0.45]), _local_direct_evaluation,
+                {'starts': []})
+
+        continuation.save(np.array([0.05]))
+        starts = []
+        assert not continuation.solve(m, sweep_params, np.array([0.45]), _local_direct_evaluation,
+                {'starts': starts, 'max_jump': 0.01})
+        # Steps of 0.5 and 0.25 fail, after which the model is left at the last converged point
+        assert len(starts) == 2
+        assert value(m.fs.output['c']) == pytest.approx(0.1)
+
+        with pytest.raises(ValueError, match="continuation steps"):
+            _Continuation(m, initial_step=0.1, min_step=0.5)
+
+    @pytest.mark.component
+    def test_parameter_sweep_binary_results(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.5, 4)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d'],
+                   'performance':m.fs.performance}
+
+        results_file = os.path.join(tmp_path, 'global_results.npz')
+        global_data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_direct_evaluation,
+                debugging_data_dir = tmp_path,
+                interpolate_nan_outputs=True,
+                mpi_comm = comm,
+                seed=3)
+
+        if rank == 0:
+            data = SweepResults(results_file)
+
+            assert np.array_equal(data.to_array(), global_data, equal_nan=True)
+            assert np.array_equal(data.status == SweepStatus.FAILED, np.isnan(global_data[:, 2]))
+
+            assert data.parameter_names == ['input_a', 'input_b']
+            assert data.output_names == ['output_c', 'output_d', 'performance']
+            assert data.metadata['parameter_components'] == ['fs.input[a]', 'fs.input[b]']
+            assert data.metadata['output_components'] == ['fs.output[c]', 'fs.output[d]', 'fs.performance']
+            assert data.metadata['sampling_type'] == 'FIXED'
+            assert data.metadata['seed'] == 3
+
+            assert os.path.isfile(os.path.join(tmp_path, 'interpolated_global_results.npz'))
+
+            num_local_cases = 0
+            for k in range(num_procs):
+                local_data = SweepResults(os.path.join(tmp_path, f'local_results_{k:03}.npz'))
+                num_local_cases += len(local_data.status)
+            assert num_local_cases == np.shape(global_data)[0]
+
+    @pytest.mark.component
+    def test_parameter_sweep_limit_exceeded(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+        m.fs.input['b'].value = 0.1
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        counter = {'count': 0}
+        results_file = os.path.join(tmp_path, 'global_results.npz')
+        global_data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_limited_direct_evaluation,
+                reinitialize_function=_counted_direct_evaluation,
+                reinitialize_kwargs={'counter': counter},
+                mpi_comm = comm,
+                restore_on_failure=True)
+
+        # Runaway cases are neither retried nor re-initialized
+        assert counter['count'] == 0
+
+        if rank == 0:
+            assert np.allclose(global_data[:, 1], [0.2, 0.6, 1.0, np.nan, np.nan], equal_nan=True)
+            data = SweepResults(results_file)
+            assert list(data.status) == [SweepStatus.CONVERGED]*3 + [SweepStatus.LIMIT_EXCEEDED]*2
+
+    @pytest.mark.component
+    def test_parameter_sweep_diagnostics(self, model, tmp_path, capsys):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5),
+                        'input_b' : (m.fs.input['b'], 0.0, 0.1, 2)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d']}
+
+        results_file = os.path.join(tmp_path, 'global_results_diagnostics.csv')
+        data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_reported_direct_evaluation,
+                reinitialize_function=_bad_reinitialize,
+                mpi_comm = comm,
+                record_diagnostics=True,
+                interpolate_nan_outputs=True,
+                broadcast_results=True)
+
+        # input_a, input_b, output_c, output_d and the six diagnostic columns
+        assert np.shape(data) == (10, 10)
+        converged = np.isfinite(data[:, 2])
+        assert np.array_equal(converged, [True]*6 + [False]*4)
+
+        wall_time = data[:, 4]
+        assert np.all(wall_time >= 0)
+
+        assert np.array_equal(data[converged, 5], [7]*6)
+        assert np.all(np.isnan(data[~converged, 5]))
+
+        optimal = list(pyo.TerminationCondition).index(pyo.TerminationCondition.optimal)
+        assert np.array_equal(data[converged, 6], [optimal]*6)
+
+        assert np.array_equal(data[:, 7], [0]*6 + [1]*4)
+        assert np.allclose(data[converged, 8], 0.01)
+        assert np.allclose(data[converged, 9], 0.1)
+
+        captured = capsys.readouterr()
+        assert f"Parameter sweep diagnostics (rank {rank})" in captured.out
+
+        if rank == 0:
+            with open(results_file, 'r') as f:
+                header = f.readline()
+            assert header.strip() == ('# input_a,input_b,output_c,output_d,wall_time,iterations,'
+                                      'termination_condition,reinitialized,nl_write_time,solver_time')
+
+            # The diagnostics of failed cases are not interpolated
+            head, tail = os.path.split(results_file)
+            interp_data = np.genfromtxt(os.path.join(head, 'interpolated_' + tail), skip_header=1, delimiter=',')
+            assert np.array_equal(interp_data[:, 7], [0]*6 + [1]*4)
+
+    @pytest.mark.unit
+    def test_refinement_candidates(self):
+        scaled_values = np.linspace(0, 1, 9).reshape(-1, 1)
+        converged = np.ones(9, dtype=bool)
+
+        # A step in the output between 0.5 and 0.625 is refined, the flat parts are not
+        refine_values = np.where(scaled_values[:, 0] > 0.5, 1., 0.)
+        candidates = _refinement_candidates(scaled_values, refine_values, converged, 0.05, 1e-3, 10)
+        assert np.allclose(candidates, [[0.5625]])
+
+        # So is a pair of neighbours of which only one converged
+        converged[0] = False
+        candidates = _refinement_candidates(scaled_values, refine_values, converged, 0.05, 1e-3, 10)
+        assert np.allclose(np.sort(candidates[:, 0]), [0.0625, 0.5625])
+
+        # Edges are not split below twice the finest spacing, nor beyond the budget
+        assert np.shape(_refinement_candidates(scaled_values, refine_values, converged, 0.05, 0.1, 10)) == (0, 1)
+        assert np.shape(_refinement_candidates(scaled_values, refine_values, converged, 0.05, 1e-3, 1)) == (1, 1)
+
+    @pytest.mark.component
+    def test_parameter_sweep_quasi_random(self, model):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+
+        sweep_params = {'input_a' : SobolSample(m.fs.input['a'], 'uniform', 0.0, 0.5),
+                        'input_b' : SobolSample(m.fs.input['b'], 'triangular', 0.0, 0.1, 0.3)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d']}
+
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=64,
+                seed=7,
+                broadcast_results=True)
+
+        assert np.shape(data) == (64, 4)
+        assert np.allclose(data[:, 2], 2*data[:, 0])
+        assert np.allclose(data[:, 3], 3*data[:, 1])
+
+        # Every rank generated its own cases from the same sequence
+        expected = _build_combinations(sweep_params, SamplingType.SOBOL, 64, None, 0, 1, seed=7)
+        assert np.allclose(data[:, :2], np.asarray(expected))
+
+    @pytest.mark.component
+    def test_parameter_sweep_random_streams(self, model):
+        comm, rank, num_procs = _init_mpi()
+
+        m = model
+
+        sweep_params = {'input_a' : UniformSample(m.fs.input['a'], 0.0, 0.5),
+                        'input_b' : NormalSample(m.fs.input['b'], 0.1, 0.02)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d']}
+
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=2000,
+                seed=7,
+                random_streams=True,
+                broadcast_results=True)
+
+        assert np.shape(data) == (2000, 4)
+        assert np.allclose(data[:, 2], 2*data[:, 0])
+        assert np.allclose(data[:, 3], 3*data[:, 1])
+
+        # Every rank drew its own cases from the same streams
+        expected = _build_combinations(sweep_params, SamplingType.RANDOM, 2000, None, 0, 1, seed=7,
+                random_streams=True)
+        assert np.allclose(data[:, :2], np.asarray(expected))
+
+    @pytest.mark.unit
+    def test_running_statistics(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(10.0, 2.0, size=(20000, 2))
+        values[::7, 1] = np.nan
+
+        statistics = _RunningStatistics(2, (0.05, 0.5, 0.95))
+        for batch in np.array_split(values, 13):
+            statistics.update(batch)
+
+        finite = np.isfinite(values[:, 1])
+        assert np.array_equal(statistics.count, [20000, np.sum(finite)])
+        assert statistics.mean == pytest.approx([np.mean(values[:, 0]), np.mean(values[finite, 1])])
+        assert statistics.variance() == pytest.approx([np.var(values[:, 0], ddof=1),
+                                                       np.var(values[finite, 1], ddof=1)])
+        assert statistics.half_width(2.0) == pytest.approx(2.0*np.sqrt(statistics.variance()/statistics.count))
+
+        # The streaming quantiles are close to those of the stored values
+        expected = np.quantile(values[:, 0], [0.05, 0.5, 0.95])
+        assert statistics.quantiles()[0, :] == pytest.approx(expected, abs=0.05)
+
+        # Fewer than five values give the exact quantiles
+        estimator = _P2Quantile(0.5)
+        assert np.isnan(estimator.value())
+        for x in [3., 1., 2.]:
+            estimator.update(x)
+        assert estimator.value() == pytest.approx(2.)
+
+    @pytest.mark.component
+    def test_parameter_sweep_monte_carlo_convergence(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : SobolSample(m.fs.input['a'], 'uniform', 0.0, 0.4),
+                        'input_b' : SobolSample(m.fs.input['b'], 'uniform', 0.0, 0.3)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d']}
+
+        # The relative half-width of the mean of output_c drops below 5% after about
+        # (1.96*0.577/0.05)**2 = 512 cases
+        results_file = os.path.join(tmp_path, 'global_results_mc.csv')
+        data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=4096,
+                seed=3,
+                mc_tolerance=0.05,
+                mc_kwargs={'outputs': ['output_c'], 'batch_size': 128},
+                broadcast_results=True)
+
+        num_cases = np.shape(data)[0]
+        assert 384 <= num_cases <= 768
+        assert num_cases % 128 == 0
+
+        # The cases are the start of the quasi-random sequence
+        expected = _build_combinations(sweep_params, SamplingType.SOBOL, 4096, None, 0, 1, seed=3)
+        assert np.allclose(data[:, :2], expected[:num_cases, :])
+
+        if rank == 0:
+            trace = np.genfromtxt(os.path.join(tmp_path, 'convergence_global_results_mc.csv'),
+                    skip_header=1, delimiter=',')
+            with open(os.path.join(tmp_path, 'convergence_global_results_mc.csv'), 'r') as f:
+                header = f.readline()
+            assert header.strip() == ('# num_cases,num_converged,output_c_mean,output_c_half_width,'
+                                      'output_c_q0.05,output_c_q0.5,output_c_q0.95')
+
+            assert np.shape(trace) == (num_cases//128, 7)
+            assert np.array_equal(trace[:, 0], 128*np.arange(1, num_cases//128 + 1))
+            assert trace[-1, 2] == pytest.approx(np.mean(data[:, 2]), rel=1e-5)
+            assert trace[-1, 3] <= 0.05*trace[-1, 2]
+            assert trace[-2, 3] > 0.05*trace[-2, 2]
+
+        # Without convergence, the sweep stops after num_samples cases
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=96,
+                seed=3,
+                mc_tolerance=1e-6,
+                mc_kwargs={'batch_size': 64},
+                broadcast_results=True)
+        assert np.shape(data) == (96, 4)
+
+        with pytest.raises(ValueError, match="not one of the outputs"):
+            parameter_sweep(m, sweep_params, outputs, optimize_function=_direct_evaluation,
+                    mpi_comm=comm, num_samples=64, mc_tolerance=0.1, mc_kwargs={'outputs': ['output_e']})
+        with pytest.raises(ValueError, match="random or quasi-random samples"):
+            parameter_sweep(m, {'input_a': (m.fs.input['a'], 0.1, 0.4, 3)}, outputs,
+                    optimize_function=_direct_evaluation, mpi_comm=comm, mc_tolerance=0.1)
+
+    @pytest.mark.component
+    def test_parameter_sweep_monte_carlo_atol(self):
+        comm, rank, num_procs = _init_mpi()
+
+        m = _build_model()
+        m.fs.input['b'].value = 0.1
+        # The mean of this output is zero
+        m.fs.centered = pyo.Expression(expr=m.fs.output['c'] - 0.4)
+
+        sweep_params = {'input_a' : SobolSample(m.fs.input['a'], 'uniform', 0.0, 0.4)}
+        outputs = {'centered':m.fs.centered}
+
+        # A relative tolerance alone is never met
+        data = parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=1024,
+                seed=3,
+                mc_tolerance=0.05,
+                mc_kwargs={'batch_size': 128},
+                broadcast_results=True)
+        assert np.shape(data)[0] == 1024
+
+        # The half-width drops below 0.02 after about (1.96*0.231/0.02)**2 = 512 cases
+        for atol in (0.02, {'centered': 0.02}):
+            data = parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    mpi_comm = comm,
+                    num_samples=1024,
+                    seed=3,
+                    mc_tolerance=0.05,
+                    mc_kwargs={'batch_size': 128, 'atol': atol},
+                    broadcast_results=True)
+            assert 384 <= np.shape(data)[0] <= 768
+
+    @pytest.mark.component
+    def test_parameter_sweep_adaptive(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : AdaptiveSample(m.fs.input['a'], 0.0, 1.0, 5),
+                        'input_b' : AdaptiveSample(m.fs.input['b'], 0.0, 1.0, 5)}
+        outputs = {'output_c':m.fs.output['c'],
+                   'output_d':m.fs.output['d']}
+
+        results_file = os.path.join(tmp_path, 'global_results_adaptive.csv')
+        data = parameter_sweep(m, sweep_params, outputs,
+                results_file = results_file,
+                optimize_function=_direct_evaluation,
+                mpi_comm = comm,
+                num_samples=60,
+                refine_output='output_c',
+                refine_tolerance=1.,
+                broadcast_results=True)
+
+        # The sweep starts from the coarse grid ...
+        coarse = np.array(list(itertools.product(np.linspace(0, 1, 5), np.linspace(0, 1, 5))))
+        assert np.allclose(data[:25, :2], coarse)
+        assert 25 < np.shape(data)[0] <= 60
+
+        # ... and only adds cases within one coarse grid spacing of the feasibility
+        # boundary (a = 0.5 or b = 1/3), as output_c never changes by more than the tolerance
+        refined = data[25:, :2]
+        assert np.all((np.abs(refined[:, 0] - 0.5) <= 0.25) | (np.abs(refined[:, 1] - 1./3) <= 0.25))
+        assert len(np.unique(data[:, :2], axis=0)) == np.shape(data)[0]
+
+        converged = np.isfinite(data[:, 2])
+        assert np.allclose(data[converged, 2], 2*data[converged, 0])
+        assert np.array_equal(converged, (data[:, 0] <= 0.5) & (data[:, 1] <= 1./3))
+
+        if rank == 0:
+            saved = np.genfromtxt(results_file, skip_header=1, delimiter=',')
+            assert np.allclose(saved, data, equal_nan=True)
+
+        with pytest.raises(ValueError, match="requires num_samples"):
+            parameter_sweep(m, sweep_params, outputs, optimize_function=_direct_evaluation,
+                    mpi_comm=comm)
+        with pytest.raises(ValueError, match="not one of the outputs"):
+            parameter_sweep(m, sweep_params, outputs, optimize_function=_direct_evaluation,
+                    mpi_comm=comm, num_samples=30, refine_output='output_e')
+
+    @pytest.mark.unit
+    def test_parameter_sweep_profile(self, model, tmp_path):
+        comm, rank, num_procs = _init_mpi()
+        tmp_path = _get_rank0_path(comm, tmp_path)
+
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 5)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        solver_profiler.clear()
+        profile_file = os.path.join(tmp_path, 'profile', 'solver_profile.json')
+        parameter_sweep(m, sweep_params, outputs,
+                optimize_function=_profiled_direct_evaluation,
+                mpi_comm = comm,
+                profile_file=profile_file)
+        assert not solver_profiler.enabled
+
+        if rank == 0:
+            with open(profile_file, 'r') as f:
+                summary = json.load(f)['summary']
+            assert summary['parameter_sweep']['solves'] == 5
+            assert summary['parameter_sweep']['timings']['python.total']['total'] == pytest.approx(0.5)
+        solver_profiler.clear()
+
+    @pytest.mark.unit
+    def test_parameter_sweep_resume_requires_checkpoint_dir(self, model):
+        m = model
+
+        sweep_params = {'input_a' : (m.fs.input['a'], 0.1, 0.9, 3)}
+        outputs = {'output_c':m.fs.output['c']}
+
+        with pytest.raises(ValueError, match="checkpoint_dir is required"):
+            parameter_sweep(m, sweep_params, outputs,
+                    optimize_function=_direct_evaluation,
+                    resume=True)
+
+
+def _build_model():
+    m = pyo.ConcreteModel()
+    m.fs = fs = pyo.Block()
+
+    fs.input = pyo.Var(['a','b'], within=pyo.UnitInterval, initialize=0.5)
+    fs.output = pyo.Var(['c', 'd'], within=pyo.UnitInterval, initialize=0.5)
+
+    fs.slack = pyo.Var(['ab_slack', 'cd_slack'], bounds=(0,0), initialize=0.0)
+    fs.slack_penalty = pyo.Param(default=1000., mutable=True, within=pyo.PositiveReals)
+
+    fs.ab_constr = pyo.Constraint(expr=(fs.output['c'] + fs.slack['ab_slack'] == 2*fs.input['a']))
+    fs.cd_constr = pyo.Constraint(expr=(fs.output['d'] + fs.slack['cd_slack'] == 3*fs.input['b']))
+
+    fs.performance = pyo.Expression(expr=pyo.summation(fs.output))
+
+    m.objective = pyo.Objective(expr=m.fs.performance - m.fs.slack_penalty*pyo.summation(m.fs.slack),
+                                sense=pyo.maximize)
+    return m
+
+def _set_slack_penalty(m, slack_penalty):
+    m.fs.slack_penalty = slack_penalty
+
+def _direct_evaluation(m):
+    # A solver-free stand-in for an optimization, which
+    # fails whenever the outputs would leave the unit interval
+    c = 2*pyo.value(m.fs.input['a'])
+    d = 3*pyo.value(m.fs.input['b'])
+    if c > 1 or d > 1:
+        raise RuntimeError("Outputs out of bounds")
+    m.fs.output['c'].value = c
+    m.fs.output['d'].value = d
+
+def _local_direct_evaluation(m, starts, max_jump=0.25):
+    # Only converges if output_c starts close enough to its solution
+    a = pyo.value(m.fs.input['a'])
+    starts.append((a, pyo.value(m.fs.output['c'])))
+    if abs(2*a - pyo.value(m.fs.output['c'])) > max_jump:
+        raise RuntimeError("Too far from the solution")
+    _direct_evaluation(m)
+
+def _limited_direct_evaluation(m):
+    # Runs into a solver limit wherever output_c would leave the unit interval
+    if 2*pyo.value(m.fs.input['a']) > 1:
+        raise SolverLimitExceeded("The solver was stopped by its time or iteration limit")
+    _direct_evaluation(m)
+
+def _counted_direct_evaluation(m, counter):
+    counter['count'] += 1
+    _direct_evaluation(m)
+
+def _recorded_direct_evaluation(m, starts):
+    starts.append((pyo.value(m.fs.input['a']), pyo.value(m.fs.input['b']), pyo.value(m.fs.output['c'])))
+    _direct_evaluation(m)
+
+def _subprocess_direct_evaluation(m, models):
+    # Wait without holding the GIL, like a solver running as a subprocess
+    models.append(id(m))
+    time.sleep(0.01)
+    _direct_evaluation(m)
+
+def _diverging_direct_evaluation(m, starts):
+    starts.append((pyo.value(m.fs.input['a']), pyo.value(m.fs.input['b']), pyo.value(m.fs.output['c'])))
+    try:
+        _direct_evaluation(m)
+    except RuntimeError:
+        # Leave garbage behind, like a diverged solve would
+        m.fs.output['c'].set_value(1e6, skip_validation=True)
+        raise
+
+def _reported_direct_evaluation(m):
+    # Return a results object like the one returned by a solver
+    _direct_evaluation(m)
+
+    results = SolverResults()
+    results.solver.termination_condition = pyo.TerminationCondition.optimal
+    results.solver.iterations = 7
+    results.solver.nl_write_time = 0.01
+    results.solver.time = 0.1
+    return results
+
+def _profiled_direct_evaluation(m):
+    # Record a profile like the ipopt-watertap solver does for every
+    # solve, whether it converges or not
+    if solver_profiler.enabled:
+        solver_profiler.record({'python': {'total': 0.1}, 'ipopt': {}})
+    _direct_evaluation(m)
 
 def _optimization(m, relax_feasibility=False):
     if relax_feasibility:
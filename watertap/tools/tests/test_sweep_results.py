@@ -0,0 +1,156 @@
+###############################################################################
+# WaterTAP Copyright (c) 2021, The Regents of the University of California,
+# through Lawrence Berkeley National Laboratory, Oak Ridge National
+# Laboratory, National Renewable Energy Laboratory, and National Energy
+# Technology Laboratory (subject to receipt of any required approvals from
+# the U.S. Dept. of Energy). All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. These files are also available online at the URL
+# "https://github.com/watertap-org/watertap/"
+#
+###############################################################################
+
+import pytest
+import os
+import threading
+import numpy as np
+
+from watertap.tools.sweep_results import (write_sweep_results,
+                                          write_sweep_results_parallel,
+                                          is_binary_results_file,
+                                          SweepResults)
+
+# -----------------------------------------------------------------------------
+
+def _extensions():
+    extensions = ['.npz']
+    try:
+        import h5py
+    except ImportError:
+        pass
+    else:
+        extensions.append('.h5')
+    return extensions
+
+class _ThreadComm:
+    # Stand-in for an MPI communicator whose ranks are threads
+    def __init__(self, num_procs):
+        self._barrier = threading.Barrier(num_procs)
+
+    def Barrier(self):
+        self._barrier.wait()
+
+def _write_parallel(fname, rank_indices, values, status, results, metadata, block_size):
+    num_procs = len(rank_indices)
+    comm = _ThreadComm(num_procs)
+    errors = []
+
+    def write(rank):
+        idx = rank_indices[rank]
+        try:
+            write_sweep_results_parallel(fname, idx, values[idx, :], status[idx], results[idx, :], metadata,
+                    np.shape(values)[0], comm, rank, num_procs, block_size=block_size)
+        except Exception as err:
+            errors.append(err)
+            comm._barrier.abort()
+
+    threads = [threading.Thread(target=write, args=(rank,)) for rank in range(num_procs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+
+class TestSweepResults():
+    @pytest.fixture(scope="class")
+    def sweep_data(self):
+        rng = np.random.default_rng(1)
+        values = rng.random((25, 2))
+        results = rng.random((25, 3))
+        results[[3, 17], :] = np.nan
+        status = np.ones(25, dtype=np.int64)
+        status[[3, 17]] = 0
+
+        metadata = {'parameters': ['a/in', 'b'],
+                    'outputs': ['c', 'd', 'performance'],
+                    'sampling_type': 'RANDOM',
+                    'seed': 1}
+
+        return values, status, results, metadata
+
+    @pytest.mark.unit
+    def test_is_binary_results_file(self):
+        assert is_binary_results_file('results.npz')
+        assert is_binary_results_file(os.path.join('out', 'results.H5'))
+        assert is_binary_results_file('results.hdf5')
+        assert not is_binary_results_file('results.csv')
+        assert not is_binary_results_file('results')
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", _extensions())
+    def test_write_read(self, sweep_data, tmp_path, ext):
+        values, status, results, metadata = sweep_data
+        fname = os.path.join(tmp_path, 'results' + ext)
+
+        # Write in several blocks
+        write_sweep_results(fname, values, status, results, metadata, block_size=10)
+
+        data = SweepResults(fname)
+
+        assert data.metadata == metadata
+        assert data.parameter_names == ['a/in', 'b']
+        assert data.output_names == ['c', 'd', 'performance']
+
+        # Full precision, column by column
+        assert isinstance(data['a/in'], np.memmap)
+        assert np.array_equal(data['a/in'], values[:, 0])
+        assert np.array_equal(data['performance'], results[:, 2], equal_nan=True)
+        assert np.array_equal(data.status, status)
+        assert np.array_equal(data.to_array(), np.hstack((values, results)), equal_nan=True)
+
+        with pytest.raises(KeyError, match="neither a sweep parameter nor an output"):
+            data['e']
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", _extensions())
+    def test_write_read_empty(self, tmp_path, ext):
+        fname = os.path.join(tmp_path, 'results' + ext)
+        metadata = {'parameters': ['a'], 'outputs': ['c']}
+
+        write_sweep_results(fname, np.zeros((0, 1)), np.zeros(0, dtype=np.int64), np.zeros((0, 1)), metadata)
+
+        data = SweepResults(fname)
+        assert np.shape(data.to_array()) == (0, 2)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", _extensions())
+    def test_write_parallel(self, sweep_data, tmp_path, ext):
+        values, status, results, metadata = sweep_data
+        fname = os.path.join(tmp_path, 'results' + ext)
+
+        # Chunks of a dynamic schedule, and a rank without any cases
+        rank_indices = [np.array([3, 4, 5, 12, 13, 14, 15, 16, 17, 18, 19, 24]),
+                        np.array([0, 1, 2, 6, 7, 8, 9, 10, 11, 20, 21, 22, 23]),
+                        np.zeros(0, dtype=np.int64)]
+        _write_parallel(fname, rank_indices, values, status, results, metadata, block_size=4)
+
+        data = SweepResults(fname)
+        assert data.metadata == metadata
+        assert np.array_equal(data.status, status)
+        assert np.array_equal(data.to_array(), np.hstack((values, results)), equal_nan=True)
+        assert not os.path.exists(fname + '.columns')
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", _extensions())
+    def test_write_parallel_empty(self, tmp_path, ext):
+        fname = os.path.join(tmp_path, 'results' + ext)
+        metadata = {'parameters': ['a'], 'outputs': ['c']}
+
+        empty = np.zeros(0, dtype=np.int64)
+        _write_parallel(fname, [empty, empty], np.zeros((0, 1)), empty, np.zeros((0, 1)), metadata,
+                block_size=4)
+
+        data = SweepResults(fname)
+        assert np.shape(data.to_array()) == (0, 2)
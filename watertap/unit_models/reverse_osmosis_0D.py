@@ -27,7 +27,7 @@ from idaes.core import (ControlVolume0DBlock,
 from idaes.core.util.exceptions import ConfigurationError
 from idaes.core.util import get_solver
 import idaes.core.util.scaling as iscale
-from watertap.core.util.initialization import check_solve, check_dof
+from watertap.core.util.initialization import check_solve, check_dof, label_initialization_solves
 from watertap.unit_models._reverse_osmosis_base import (ConcentrationPolarizationType,
         MassTransferCoefficient,
         PressureChangeType,
@@ -670,7 +670,8 @@ class ReverseOsmosisData(_ReverseOsmosisBaseData):
 
         # ---------------------------------------------------------------------
         # Solve unit
-        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
+        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc, \
+                label_initialization_solves(blk, 'Initialization Step 3'):
             res = opt.solve(blk, tee=slc.tee)
             # occasionally it might be worth retrying a solve
             if not check_optimal_termination(res):
@@ -32,7 +32,7 @@ from idaes.core.control_volume1d import DistributedVars
 from idaes.core.util.misc import add_object_reference
 from idaes.core.util import get_solver, scaling as iscale
 from idaes.core.util.initialization import solve_indexed_blocks
-from watertap.core.util.initialization import check_solve, check_dof
+from watertap.core.util.initialization import check_solve, check_dof, label_initialization_solves
 from watertap.unit_models._reverse_osmosis_base import (ConcentrationPolarizationType,
         MassTransferCoefficient,
         PressureChangeType,
@@ -761,7 +761,8 @@ class ReverseOsmosis1DData(_ReverseOsmosisBaseData):
 
         # ---------------------------------------------------------------------
         # Solve unit
-        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
+        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc, \
+                label_initialization_solves(blk, 'Initialization Step 3'):
             res = opt.solve(blk, tee=slc.tee)
             # occasionally it might be worth retrying a solve
             if not check_optimal_termination(res):
@@ -24,6 +24,11 @@ import idaes.logger as idaeslog
 from idaes.core.util import get_solver
 from idaes.core.util.exceptions import InitializationError
 
+from pyomo.common.collections import ComponentSet
+
+from watertap.core.zero_order_evaluation import (
+    evaluate_constraints, is_known, set_known_value)
+
 # Some more inforation about this module
 __author__ = "Andrew Lee"
 
@@ -170,3 +175,54 @@ class FeedZOData(FeedData):
             raise InitializationError(
                 f"{blk.name} failed to initialize successfully. Please check "
                 f"the output logs for more information.")
+
+    def evaluate(blk, known=None, outlvl=idaeslog.NOTSET):
+        '''
+        This method evaluates the feed directly (i.e. without calling a
+        solver), calculating the component mass flows from the volumetric
+        flowrate and concentrations.
+
+        Keyword Arguments:
+            known : ComponentSet of unfixed variables whose values are known;
+                    the variables calculated here are added to it
+                    (default = None)
+            outlvl : sets output level of logging
+
+        Returns:
+            None
+        '''
+        init_log = idaeslog.getInitLogger(blk.name, outlvl, tag="unit")
+
+        if known is None:
+            known = ComponentSet()
+
+        for t in blk.flowsheet().time:
+            props = blk.properties[t]
+            solutes = props.params.solute_set
+            if not (is_known(blk.flow_vol[t], known) and
+                    all(is_known(blk.conc_mass_comp[t, j], known)
+                        for j in solutes)):
+                continue
+
+            flow_vol = value(blk.flow_vol[t])
+            for j in solutes:
+                set_known_value(props.flow_mass_comp[j],
+                                flow_vol*value(blk.conc_mass_comp[t, j]),
+                                known)
+            set_known_value(
+                props.flow_mass_comp["H2O"],
+                flow_vol*value(props.dens_mass) -
+                sum(value(blk.conc_mass_comp[t, j])*flow_vol
+                    for j in solutes),
+                known)
+
+        # Other specifications (e.g. fixed mass flows) are evaluated from the
+        # constraints of the feed
+        unresolved = evaluate_constraints(blk, known)
+        if unresolved:
+            raise InitializationError(
+                f"{blk.name} could not be evaluated directly, as the "
+                f"constraints {[c.name for c in unresolved]} have more than "
+                f"one unknown variable.")
+
+        init_log.info("Direct evaluation complete.")
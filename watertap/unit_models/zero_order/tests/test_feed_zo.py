@@ -20,7 +20,8 @@ from pyomo.util.check_units import assert_units_consistent
 
 from idaes.core import FlowsheetBlock
 from idaes.core.util import get_solver
-from idaes.core.util.model_statistics import degrees_of_freedom
+from idaes.core.util.model_statistics import (degrees_of_freedom,
+                                              large_residuals_set)
 from idaes.core.util.testing import initialization_tester
 
 from watertap.unit_models.zero_order import FeedZO
@@ -162,3 +163,24 @@ def test_initialize():
 
     for (t, j), v in m.fs.unit.outlet.flow_mass_comp.items():
         assert value(v) == pytest.approx(res[j], rel=1e-5)
+
+
+@pytest.mark.component
+def test_evaluate():
+    m = ConcreteModel()
+    m.db = Database()
+
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.params = WaterParameterBlock(default={"database": m.db})
+
+    m.fs.unit = FeedZO(default={"property_package": m.fs.params})
+
+    m.fs.unit.load_feed_data_from_database()
+
+    m.fs.unit.evaluate()
+
+    assert len(large_residuals_set(m, 1e-8)) == 0
+    assert (pytest.approx(4263.816948529999, rel=1e-8) ==
+            value(m.fs.unit.outlet.flow_mass_comp[0, "H2O"]))
+    assert (pytest.approx(160.41549999999995, rel=1e-8) ==
+            value(m.fs.unit.outlet.flow_mass_comp[0, "tds"]))